@@ -0,0 +1,155 @@
+"""
+Append one or more trading sessions and bring the derived stores up to date.
+
+    python -m analytics.daily_append data/raw/daily/2024-01-01.csv [...]
+
+Each file holds one session of price_history rows (date, entity_id, open,
+high, low, close, volume), as CSV or parquet. For every session the rows
+are validated against the published store, the indicator state advances
+by that session, every index that traded gets that day's ranks appended
+to the rank history, and the rows are then published as a daily price
+segment. Publishing is a single rename, so readers move from one version
+to the next in one step. Derived rows are written first and are keyed by
+session, so an interrupted run can simply be repeated.
+
+Lookups run on the shared store (the price matrix plus earlier segments
+when it is built), so the work per session grows with the number of
+entities and not with the length of the history. The matrix and base file
+fold the segments in on their next full build.
+"""
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analytics.indicators import append_indicator_session
+from analytics.rank_history import append_rank_session, session_ranks
+from data_access.asof import AppendedAsOf, AsOfIndex
+from data_access.build_price_history import MARKET_TZ, PRICE_COLUMNS
+from data_access.constituent_history import get_membership_history
+from data_access.indicator_store import INDICATOR_DIR
+from data_access.price_matrix import PRICE_MATRIX_DIR, get_shared_store
+from data_access.price_store import PRICE_FILE, append_price_segment
+from data_access.rank_store import RANK_HISTORY_DIR, rank_history_available
+
+REQUIRED_COLUMNS = ["date", "entity_id", "close"]
+BAR_COLUMNS = ["open", "high", "low", "close"]
+
+
+def read_session_file(path: Path) -> pd.DataFrame:
+    path = Path(path)
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path)
+    return pd.read_csv(path, dtype={"entity_id": "string"})
+
+
+def validate_session(day: pd.DataFrame, store) -> pd.DataFrame:
+    """
+    Rows of one new session, cleaned to the price_history columns, or a
+    ValueError listing every problem found.
+    """
+    missing = [c for c in REQUIRED_COLUMNS if c not in day]
+    if missing:
+        raise ValueError(f"session rows lack columns: {', '.join(missing)}")
+
+    day = day.reindex(columns=PRICE_COLUMNS).reset_index(drop=True)
+    day["entity_id"] = day["entity_id"].astype(str)
+    dates = pd.to_datetime(day["date"])
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_convert(MARKET_TZ).dt.tz_localize(None)
+    day["date"] = dates.dt.normalize()
+    day[PRICE_COLUMNS[2:]] = day[PRICE_COLUMNS[2:]].astype("float64")
+
+    problems = []
+    sessions = day["date"].unique()
+    if len(sessions) != 1:
+        problems.append(f"expected one session, got {len(sessions)}")
+    elif sessions[0] <= store.max_date:
+        problems.append(f"session {sessions[0]:%Y-%m-%d} is not after the stored {store.max_date:%Y-%m-%d}")
+
+    duplicated = day.loc[day["entity_id"].duplicated(), "entity_id"]
+    if len(duplicated):
+        problems.append(f"{len(duplicated)} duplicated entities, e.g. {duplicated.iloc[0]}")
+
+    unknown = day.loc[~day["entity_id"].isin(store.codes.ids), "entity_id"]
+    if len(unknown):
+        problems.append(f"{len(unknown)} entities not in entity_master, e.g. {unknown.iloc[0]}")
+
+    # Prices must be positive where given; close is always required
+    bars = day[BAR_COLUMNS]
+    bad = (bars <= 0).any(axis=1) | np.isinf(bars).any(axis=1) | day["close"].isna()
+    if bad.any():
+        problems.append(f"{bad.sum()} rows with a missing, zero or negative price")
+    if (day["volume"] < 0).any():
+        problems.append(f"{(day['volume'] < 0).sum()} rows with negative volume")
+    outside = (day["high"] < day["low"]) | (day["close"] > day["high"]) | (day["close"] < day["low"])
+    if outside.any():
+        problems.append(f"{outside.sum()} rows with close outside [low, high], e.g. {day.loc[outside, 'entity_id'].iloc[0]}")
+
+    if problems:
+        raise ValueError("rejected session rows:\n  " + "\n  ".join(problems))
+    return day.sort_values("entity_id", kind="stable", ignore_index=True)
+
+
+def session_asof(store, day: pd.DataFrame) -> AppendedAsOf:
+    """The store's as-of index with the new session's rows on top."""
+    values = {c: day[c].to_numpy() for c in PRICE_COLUMNS[2:]}
+    return AppendedAsOf(store.asof, AsOfIndex(day["entity_id"].to_numpy(), day["date"].to_numpy(), values))
+
+
+def append_session(
+    day: pd.DataFrame,
+    path: Path = PRICE_FILE,
+    matrix_dir: Path = PRICE_MATRIX_DIR,
+    indicator_dir: Path = INDICATOR_DIR,
+    rank_dir: Path = RANK_HISTORY_DIR,
+    membership=None,
+) -> dict:
+    store = get_shared_store(matrix_dir, path)
+    day = validate_session(day, store)
+    membership = membership or get_membership_history()
+
+    date = day["date"].iloc[0]
+
+    indicators = append_indicator_session(day, indicator_dir, path)
+    ranks = session_ranks(session_asof(store, day), membership, date)
+    if ranks and rank_history_available(rank_dir, path):
+        append_rank_session(ranks, rank_dir)
+
+    # Publishing the prices is the switch to the new version
+    segment = append_price_segment(day, path)
+
+    return {
+        "date": date,
+        "rows": len(day),
+        "segment": segment,
+        "indicators": indicators,
+        "ranks": ranks,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("files", type=Path, nargs="+")
+    parser.add_argument("--prices", type=Path, default=PRICE_FILE)
+    args = parser.parse_args(argv)
+
+    sessions = [read_session_file(f) for f in args.files]
+    sessions.sort(key=lambda df: pd.to_datetime(df["date"]).min())
+
+    for day in sessions:
+        started = time.perf_counter()
+        summary = append_session(day, args.prices)
+        elapsed = time.perf_counter() - started
+        indicators = summary["indicators"]
+        print(
+            f"Appended {summary['rows']:,} rows for {summary['date']:%Y-%m-%d} "
+            f"({0 if indicators is None else len(indicators):,} indicator rows, "
+            f"ranks for {len(summary['ranks'])} indices) to {summary['segment']} in {elapsed:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,664 @@
+"""
+Compute the dashboard tables without Streamlit.
+
+    python -m analytics.dashboards --start 2025-01-01 --end 2025-06-30 [--pages 1 4 9] [--out DIR]
+
+Each page_* function returns what its page displays. The pages only add
+widgets and styling on top. The CLI evaluates pages 1-5 and 9 on every
+session from --start to --end with the pages' default settings. Pages 6 and
+7 cover the last --weeks week-ends up to --end, and page 8 the year up to
+--end. Each page is written to one parquet file with a ref_date column
+(index_entity_id where the page is per index), and the directory is
+swapped in once every page is written.
+"""
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analytics.duckdb_engine import backend_trailing_returns
+from analytics.indicators import entity_indicators
+from analytics.momentum_maturity import DEFAULT_WINDOW, STAGES, momentum_maturity
+from analytics.rank_history import relative_ranks
+from analytics.returns import horizon_returns
+from analytics.snapshot import universe_snapshot
+from data_access.atomic import fresh_tmp_dir, swap_in_dir
+from data_access.constituent_history import get_membership_history
+from data_access.constituents import get_constituent_index
+from data_access.indicator_store import indicators_available, read_indicators
+from data_access.price_store import get_price_store
+from data_access.reference_data import DATA_DIR, load_entity_master
+from data_access.trading_calendar import HORIZONS, TradingCalendar
+
+DASHBOARD_DIR = DATA_DIR / "dashboards"
+
+TIMEFRAMES = list(HORIZONS)
+NIFTY_50 = "IDX_NIFTY 50"
+
+# Page 1 default selection
+BENCHMARK_INDICES = [
+    "IDX_NIFTY 50",
+    "IDX_NIFTY NEXT 50",
+    "IDX_NIFTY 500",
+    "IDX_NIFTY MIDCAP 150",
+    "IDX_NIFTY SMLCAP 250"
+]
+
+# Page 2 frozen sector universe
+SECTOR_INDICES = [
+    "IDX_NIFTY AUTO",
+    "IDX_NIFTY BANK",
+    "IDX_NIFTY ENERGY",
+    "IDX_NIFTY FMCG",
+    "IDX_NIFTY IT",
+    "IDX_NIFTY MEDIA",
+    "IDX_NIFTY METAL",
+    "IDX_NIFTY OIL AND GAS",
+    "IDX_NIFTY PHARMA",
+    "IDX_NIFTY PSU BANK",
+    "IDX_NIFTY PVT BANK",
+    "IDX_NIFTY REALTY",
+    "IDX_NIFTY INFRA",
+    "IDX_NIFTY MNC",
+    "IDX_NIFTY CONSUMPTION",
+    "IDX_NIFTY FINANCIAL SERVICES"
+    "IDX_NIFTY CPSE"
+    "IDX_NIFTY PSE"
+    "IDX_NIFTY INDIA DEFENCE"
+    "IDX_NIFTY INDIA TOURISM"
+    "IDX_NIFTY COMMODITIES"
+    "IDX_NIFTY FIN SERVICE"
+    "IDX_NIFTY CAPITAL MARKETS"
+
+]
+
+# Page 5 leaves out broad market indices
+MARKET_INDICES = {
+    "IDX_NIFTY 50",
+    "IDX_NIFTY 100",
+    "IDX_NIFTY 200",
+    "IDX_NIFTY 500",
+    "IDX_NIFTY MIDCAP 100",
+    "IDX_NIFTY MIDCAP 150",
+    "IDX_NIFTY MIDCAP 50",
+    "IDX_NIFTY NEXT 50",
+    "IDX_NIFTY SMLCAP 50",
+    "IDX_NIFTY SMLCAP 100",
+    "IDX_NIFTY SMLCAP 250",
+    "IDX_NIFTY TOTAL MKT"
+}
+
+# Page 7 leaves out only the largest market-wide indices
+RANK_TREND_EXCLUDED = {
+    "IDX_NIFTY 50",
+    "IDX_NIFTY 100",
+    "IDX_NIFTY 200",
+    "IDX_NIFTY 500"
+}
+
+RANK_TREND_WEEKS = 8
+
+SECTOR_MATRIX_COLUMNS = {
+    "1W": "1 Week",
+    "1M": "1 Month",
+    "3M": "3 Month",
+    "6M": "6 Month",
+    "1Y": "1 Year",
+}
+
+
+# -------------------------------------------------
+# PAGES 1 AND 2 — INDEX RETURNS
+# -------------------------------------------------
+def page_index_returns(store, index_ids, ref_date, period, label="Index", prefix="IDX_", rets=None) -> pd.DataFrame:
+    """
+    Return (%) per index, strongest first, without indices lacking a window.
+    `rets` may carry the trailing returns for ref_date and period already.
+    """
+    # First close inside the window to the last close on or before the date
+    if rets is None:
+        rets = backend_trailing_returns(
+            store.asof, index_ids, ref_date, period, start_side="after"
+        )
+
+    return (
+        pd.DataFrame({
+            label: rets.index.str.replace(prefix, ""),
+            "Return (%)": rets.round(2).to_numpy()
+        })
+        .dropna()
+        .sort_values("Return (%)", ascending=False)
+    )
+
+
+# -------------------------------------------------
+# PAGE 3 — NIFTY 50 RELATIVE STRENGTH
+# -------------------------------------------------
+def nearest_trade_date(store, entity_id, ref_date):
+    """The entity's last trading day on or before ref_date, NaT if none."""
+    return store.asof.lookup([entity_id], pd.Timestamp(ref_date).to_datetime64())[0][0]
+
+
+def page_relative_strength(store, membership, trade_date, index_id=NIFTY_50) -> pd.DataFrame:
+    """Returns, index-minus-stock gaps, ranks and percentile score on trade_date."""
+    # Members as of that day, not today's list
+    stock_ids = membership.members_on(index_id, trade_date)
+
+    ranks = relative_ranks(
+        store.asof, index_id, stock_ids, [trade_date]
+    ).loc[pd.Timestamp(trade_date)]
+
+    df = pd.DataFrame({
+        "entity_id": stock_ids,
+        "ret_3M": ranks["ret_3M"].to_numpy(),
+        "ret_6M": ranks["ret_6M"].to_numpy(),
+        "ret_1Y": ranks["ret_1Y"].to_numpy()
+    })
+
+    # Stored relative returns are stock minus index; this page shows index minus stock
+    df["rel_3M"] = -ranks["rel_3M"].to_numpy()
+    df["rel_6M"] = -ranks["rel_6M"].to_numpy()
+    df["rel_1Y"] = -ranks["rel_1Y"].to_numpy()
+
+    # Lowest index-minus-stock gap ranks first, same as highest stock-minus-index
+    df["rank_3M"] = ranks["rank_3M"].to_numpy()
+    df["rank_6M"] = ranks["rank_6M"].to_numpy()
+    df["rank_1Y"] = ranks["rank_1Y"].to_numpy()
+
+    max_rank = len(df)
+
+    df[["rank_3M", "rank_6M", "rank_1Y"]] = (
+        df[["rank_3M", "rank_6M", "rank_1Y"]]
+        .fillna(max_rank)
+    )
+
+    df["avg_rank"] = df[["rank_3M", "rank_6M", "rank_1Y"]].mean(axis=1)
+
+    df["percentile_score"] = (
+        1 - (df["avg_rank"] - 1) / (max_rank - 1)
+    ) * 100
+
+    for c in ["ret_3M", "ret_6M", "ret_1Y", "rel_3M", "rel_6M", "rel_1Y"]:
+        df[c] = df[c].round(1)
+
+    df[["rank_3M", "rank_6M", "rank_1Y", "avg_rank", "percentile_score"]] = (
+        df[["rank_3M", "rank_6M", "rank_1Y", "avg_rank", "percentile_score"]]
+        .round(0)
+        .astype(int)
+    )
+
+    # Sort by strength
+    return df.sort_values("percentile_score", ascending=False)
+
+
+# -------------------------------------------------
+# PAGE 4 — INDEX STOCK RANKS
+# -------------------------------------------------
+def page_index_stock_ranks(store, membership, index_id, ref_date, ranks=None):
+    """
+    Ranked members of index_id on ref_date, or None if it has none.
+    `ranks` may carry relative_ranks rows for ref_date, indexed by
+    entity_id, already ranked among that day's members.
+    """
+    ref_date = pd.Timestamp(ref_date)
+    stocks_in_index = membership.members_on(index_id, ref_date)
+
+    if not stocks_in_index:
+        return None
+
+    if ranks is None:
+        ranks = relative_ranks(
+            store.asof, index_id, stocks_in_index, [ref_date]
+        ).loc[ref_date]
+    else:
+        ranks = ranks.reindex(stocks_in_index)
+
+    out = ranks[[
+        "ret_3M", "ret_6M", "ret_1Y",
+        "rel_3M", "rel_6M", "rel_1Y",
+        "rank_3M", "rank_6M", "rank_1Y",
+        "avg_rank"
+    ]].sort_index()
+
+    out.insert(0, "ret_1M", backend_trailing_returns(store.asof, out.index, ref_date, "1M"))
+    out.insert(0, "entity_id", out.index)
+
+    # Average over the available windows only
+    out["avg_rank"] = out["avg_rank"].round(0)
+
+    out = out.dropna(subset=["avg_rank"])
+
+    out["avg_rank"] = out["avg_rank"].astype(int)
+
+    n = len(out)
+    out["percentile_score"] = (
+        (n - out["avg_rank"]) / n * 100
+    ).round(0).astype(int)
+
+    for c in ["ret_1M", "ret_3M", "ret_6M", "ret_1Y", "rel_3M", "rel_6M", "rel_1Y"]:
+        out[c] = out[c].round(1)
+
+    return out.sort_values("avg_rank")
+
+
+# -------------------------------------------------
+# PAGE 5 — SECTOR RANK MATRIX
+# -------------------------------------------------
+def sector_indices(store) -> list:
+    return sorted(
+        i for i in store.index_ids if i not in MARKET_INDICES
+    )
+
+
+def page_sector_rank_matrix(store, ref_date, sector_ids=None, returns=None) -> pd.DataFrame:
+    """
+    Column-wise return ranks per sector (rows) and horizon (columns).
+    `returns` may map each horizon to the trailing returns for ref_date.
+    """
+    if sector_ids is None:
+        sector_ids = sector_indices(store)
+    if returns is None:
+        returns = {h: backend_trailing_returns(store.asof, sector_ids, ref_date, h) for h in SECTOR_MATRIX_COLUMNS}
+
+    # Series align on entity_id, so label the rows from the aligned index
+    mat = pd.DataFrame({
+        column: returns[h] for h, column in SECTOR_MATRIX_COLUMNS.items()
+    }).sort_index().rename_axis("Sector")
+
+    return mat.rank(ascending=False, method="min")
+
+
+def page_sector_rank_snapshot(cube, ref_date) -> pd.DataFrame:
+    """page_sector_rank_matrix for ref_date, as a SectorCube slice."""
+    # Before the first session no sector is listed, whichever row -1 reads
+    row = cube.row(ref_date)
+    listed = cube.listed[row] & (row >= 0)
+
+    return pd.DataFrame(
+        cube.rank[row, listed].astype("float64"),
+        index=cube.sector_ids[listed].rename("Sector"),
+        columns=[SECTOR_MATRIX_COLUMNS[h] for h in cube.horizons],
+    )
+
+
+def page_sector_rotation(cube, start=None, end=None, freq="week_ends"):
+    """
+    (ranks, sessions, sector_ids) for a playback of the matrix between
+    start and end: ranks is (sessions x sectors x horizons), over the
+    sectors listed at some point in the window. None if no session falls
+    in it.
+    """
+    rows = cube.rows(start, end, freq)
+    if not len(rows):
+        return None
+
+    keep = cube.listed[rows].any(axis=0)
+    return cube.rank[rows][:, keep], cube.dates[rows], cube.sector_ids[keep]
+
+
+# -------------------------------------------------
+# PAGES 6 AND 7 — RANK TRENDS
+# -------------------------------------------------
+def rank_trend_sectors(membership) -> list:
+    return [
+        i for i in sorted(membership.index_ids) if i not in RANK_TREND_EXCLUDED
+    ]
+
+
+def recent_week_ends(store, index_id, n_weeks, end=None) -> pd.DatetimeIndex:
+    """The index's last n_weeks week-ends, up to `end` when given."""
+    # Last session of each week, so holiday Fridays fall back to Thursday
+    week_ends = TradingCalendar(store.history(index_id)["date"]).week_ends
+    if end is not None:
+        week_ends = week_ends[week_ends <= pd.Timestamp(end)]
+    return week_ends[-n_weeks:]
+
+
+def page_rank_trend(store, membership, index_id, week_ends):
+    """
+    Rounded avg_rank per stock (rows) and week-end (columns), or None if
+    nobody was in the index over those weeks.
+    """
+    # Anyone in the index during the window; cells outside membership stay blank
+    stocks = membership.ever_members(index_id, week_ends[0], week_ends[-1])
+
+    if not stocks:
+        return None
+
+    members = membership.member_mask(index_id, stocks, week_ends)
+    ranks = relative_ranks(store.asof, index_id, stocks, week_ends, members=members)
+
+    matrix = (
+        ranks["avg_rank"]
+        .round(0)
+        .unstack("date")
+        .reindex(stocks)
+    )
+    return matrix.dropna(how="all").astype("Int64")
+
+
+# -------------------------------------------------
+# PAGE 8 — SMA TREND LINES
+# -------------------------------------------------
+def page_sma_trend(store, stock_id, end=None):
+    """
+    (SMA_50 / SMA_200 by date, start, end) over the year up to the stock's
+    last close on or before `end`, or None without price data.
+    """
+    stk_df = store.history(stock_id)
+    if end is not None:
+        stk_df = stk_df[stk_df["date"] <= pd.Timestamp(end)]
+
+    if stk_df.empty:
+        return None
+
+    end_date = stk_df["date"].max()
+    start_date = end_date - pd.DateOffset(years=1)
+
+    # Windows run over the full history, so SMA_200 is defined from day one
+    df = entity_indicators(store, stock_id, start=start_date).rename(
+        columns={"sma_50": "SMA_50", "sma_200": "SMA_200"}
+    )
+    df = df[df["date"] <= end_date]
+
+    return df.set_index("date")[["SMA_50", "SMA_200"]], start_date, end_date
+
+
+# -------------------------------------------------
+# PAGE 9 — UNIVERSE SNAPSHOT
+# -------------------------------------------------
+def snapshot_trade_date(store, ref_date):
+    """Last stock trading day on or before ref_date, NaT if none."""
+    available_dates = store.stock_dates
+    return available_dates[available_dates <= pd.Timestamp(ref_date)].max()
+
+
+def _yn(cond):
+    return np.where(cond, "Yes", "No")
+
+
+def _pct_label(values):
+    return values.map(lambda v: f"{v}%" if pd.notna(v) else np.nan)
+
+
+def page_universe_snapshot(store, master_df, ref_date, indicators=None) -> pd.DataFrame:
+    """
+    One display row per stock with a close on ref_date; `indicators` is
+    passed on to universe_snapshot.
+    """
+    stocks = master_df.loc[
+        master_df["entity_type"] == "STOCK",
+        ["entity_id", "entity_name", "symbol"]
+    ]
+
+    snap = universe_snapshot(
+        store, stocks["entity_id"], ref_date, indicators=indicators
+    ).merge(
+        stocks, on="entity_id", how="left"
+    )
+
+    return pd.DataFrame({
+        "entity_id": snap["entity_id"],
+        "symbol": snap["symbol"],
+        "entity_name": snap["entity_name"],
+        "Close": snap["close"].round(1),
+        "1M_Return_%": snap["ret_1M"].round(1),
+        "3M_Return_%": snap["ret_3M"].round(1),
+        "6M_Return_%": snap["ret_6M"].round(1),
+        "1Y_Return_%": snap["ret_1Y"].round(1),
+        "SMA_20": snap["sma_20"].round(1),
+        "SMA_50": snap["sma_50"].round(1),
+        "SMA_100": snap["sma_100"].round(1),
+        "SMA_200": snap["sma_200"].round(1),
+        "20D_SMA_gt_50D_SMA": _yn(snap["sma_20_gt_50"]),
+        "50D_SMA_gt_100D_SMA": _yn(snap["sma_50_gt_100"]),
+        "100D_SMA_gt_200D_SMA": _yn(snap["sma_100_gt_200"]),
+        "Pct_Diff_52W_High": _pct_label(snap["pct_from_52w_high"].round(1))
+    })
+
+
+# -------------------------------------------------
+# PAGE 10 — RANK TRAJECTORY MAPS
+# -------------------------------------------------
+def page_rank_trajectory(cube, stock_id, start=None, end=None) -> pd.DataFrame:
+    """One stock's horizon ranks and avg_rank by date, as a RankCube slice."""
+    out = cube.stock_trajectory(stock_id, start, end)
+    return out.drop(columns="percentile_score").round(1)
+
+
+def page_rank_map(cube, start=None, end=None, freq=None):
+    """
+    Rounded avg_rank per stock (rows) and session (columns), strongest at
+    the end of the window first, or None if nobody was ranked in it.
+    """
+    matrix = cube.rank_map(start, end, freq)
+    if matrix.empty:
+        return None
+
+    latest = matrix.ffill(axis=1).iloc[:, -1]
+    return matrix.loc[latest.sort_values(kind="stable").index].round(0)
+
+
+# -------------------------------------------------
+# PAGE 11 — MOMENTUM MATURITY MATRIX
+# -------------------------------------------------
+def page_momentum_maturity(cube, ref_date=None, window=DEFAULT_WINDOW):
+    """
+    Stage, avg_rank and rank trend per stock ranked on ref_date, ordered by
+    stage and then strength, or None if nobody was ranked that day.
+    """
+    out = momentum_maturity(cube, ref_date, stage_window=window)
+    out = out.dropna(subset=["stage"])
+    if out.empty:
+        return None
+
+    out = out.assign(stage=pd.Categorical(out["stage"], categories=STAGES, ordered=True))
+    out = out.sort_values(["stage", "avg_rank"], kind="stable")
+
+    out.insert(0, "entity_id", out.index)
+    out["avg_rank"] = out["avg_rank"].round(1)
+    out["percentile_score"] = out["percentile_score"].round(0)
+    trend = [c for c in out if c.startswith(("slope_", "curvature_"))]
+    out[trend] = out[trend].round(3)
+    return out.reset_index(drop=True)
+
+
+# -------------------------------------------------
+# PAGE 12 — ROTATION SIGNALS
+# -------------------------------------------------
+def page_rotation_signals(events, start=None, end=None, event_names=None) -> pd.DataFrame:
+    """Events between start and end, newest first, optionally of some kinds only."""
+    dates = events.index.get_level_values("date")
+    keep = np.ones(len(events), dtype=bool)
+    if start is not None:
+        keep &= dates >= pd.Timestamp(start)
+    if end is not None:
+        keep &= dates <= pd.Timestamp(end)
+    if event_names is not None:
+        keep &= events["event"].isin(event_names).to_numpy()
+
+    out = events[keep].reset_index()
+    out["event"] = out["event"].astype(str)
+    out["value"] = out["value"].round(2)
+    return out.sort_values("date", ascending=False, kind="stable", ignore_index=True)
+
+
+# -------------------------------------------------
+# BATCH
+# -------------------------------------------------
+def _rows(frames) -> pd.DataFrame:
+    frames = [f for f in frames if f is not None and not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def _long_trend(matrix, index_id):
+    if matrix is None:
+        return None
+    return (
+        matrix.rename_axis(index="entity_id", columns="ref_date")
+        .stack()
+        .rename("avg_rank")
+        .reset_index()
+        .assign(index_entity_id=index_id)
+    )
+
+
+def _index_stock_ranks(store, membership, index_id, sessions):
+    """(date, page 4 table) pairs, ranking the whole range in one call."""
+    stocks = membership.ever_members(index_id, sessions[0], sessions[-1])
+    if not stocks:
+        return
+
+    members = membership.member_mask(index_id, stocks, sessions)
+    ranks = relative_ranks(store.asof, index_id, stocks, sessions, members=members)
+
+    for d in sessions:
+        out = page_index_stock_ranks(store, membership, index_id, d, ranks.loc[d])
+        if out is not None:
+            yield d, out
+
+
+def _returns_by_date(store, entity_ids, sessions, start_side="before") -> dict:
+    """
+    (date, horizon) -> trailing returns as trailing_returns gives them,
+    from one horizon_returns call over every session and horizon.
+    """
+    ids = np.asarray(list(entity_ids), dtype=object)
+    returns = horizon_returns(store.asof, ids, sessions, TIMEFRAMES, start_side=start_side)
+    has_end = store.asof.rows(ids[None, :], sessions.to_numpy()[:, None]) >= 0
+
+    return {
+        (d, h): pd.Series(returns[h][i][has_end[i]], index=pd.Index(ids[has_end[i]], name="entity_id"))
+        for i, d in enumerate(sessions)
+        for h in TIMEFRAMES
+    }
+
+
+def _indicators_by_date(dates) -> dict:
+    """Stored indicators for each date as indicators_on would return them."""
+    if not dates or not indicators_available():
+        return {}
+    df = read_indicators(dates=dates)
+    return {d: g.set_index("entity_id") for d, g in df.groupby("date")}
+
+
+def dashboard_tables(store, membership, sessions, pages=range(1, 10), n_weeks=RANK_TREND_WEEKS) -> dict:
+    """File name -> long table for each requested page over `sessions`."""
+    sessions = pd.DatetimeIndex(sessions)
+    end = sessions[-1]
+    pages = set(pages)
+    tables = {}
+
+    if 1 in pages:
+        rets = _returns_by_date(store, BENCHMARK_INDICES, sessions, "after")
+        tables["1_benchmark_returns"] = _rows(
+            page_index_returns(store, BENCHMARK_INDICES, d, p, rets=rets[d, p]).assign(ref_date=d, period=p)
+            for d in sessions for p in TIMEFRAMES
+        )
+
+    if 2 in pages:
+        rets = _returns_by_date(store, SECTOR_INDICES, sessions, "after")
+        tables["2_sector_returns"] = _rows(
+            page_index_returns(store, SECTOR_INDICES, d, p, "Sector", "IDX_NIFTY ", rets[d, p])
+            .assign(ref_date=d, period=p)
+            for d in sessions for p in TIMEFRAMES
+        )
+
+    if 3 in pages:
+        trade_dates = {d: nearest_trade_date(store, NIFTY_50, d) for d in sessions}
+        tables["3_nifty50_ranks"] = _rows(
+            page_relative_strength(store, membership, t).assign(ref_date=d)
+            for d, t in trade_dates.items() if not pd.isna(t)
+        )
+
+    if 4 in pages:
+        tables["4_index_stock_ranks"] = _rows(
+            out.assign(ref_date=d, index_entity_id=index_id)
+            for index_id in sorted(store.index_ids)
+            for d, out in _index_stock_ranks(store, membership, index_id, sessions)
+        )
+
+    if 5 in pages:
+        sectors = sector_indices(store)
+        rets = _returns_by_date(store, sectors, sessions)
+        tables["5_sector_rank_matrix"] = _rows(
+            page_sector_rank_matrix(store, d, sectors, {h: rets[d, h] for h in TIMEFRAMES})
+            .reset_index().assign(ref_date=d)
+            for d in sessions
+        )
+
+    if 6 in pages:
+        week_ends = recent_week_ends(store, NIFTY_50, n_weeks, end)
+        tables["6_nifty50_rank_trend"] = _rows(
+            [_long_trend(page_rank_trend(store, membership, NIFTY_50, week_ends), NIFTY_50)]
+            if len(week_ends) else []
+        )
+
+    if 7 in pages:
+        trends = []
+        for index_id in rank_trend_sectors(membership):
+            week_ends = recent_week_ends(store, index_id, n_weeks, end)
+            if len(week_ends):
+                trends.append(_long_trend(page_rank_trend(store, membership, index_id, week_ends), index_id))
+        tables["7_sector_rank_trend"] = _rows(trends)
+
+    if 8 in pages:
+        trends = []
+        for stock_id in sorted(get_constituent_index().member_ids(NIFTY_50)):
+            trend = page_sma_trend(store, stock_id, end)
+            if trend is not None:
+                trends.append(trend[0].reset_index().assign(entity_id=stock_id))
+        tables["8_sma_trend"] = _rows(trends)
+
+    if 9 in pages:
+        master_df = load_entity_master()
+        trade_dates = {d: snapshot_trade_date(store, d) for d in sessions}
+        stored = _indicators_by_date([t for t in trade_dates.values() if not pd.isna(t)])
+        tables["9_universe_snapshot"] = _rows(
+            page_universe_snapshot(store, master_df, t, stored.get(t)).assign(ref_date=d)
+            for d, t in trade_dates.items() if not pd.isna(t)
+        )
+
+    return tables
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--start", type=pd.Timestamp, default=None)
+    parser.add_argument("--end", type=pd.Timestamp, default=None)
+    parser.add_argument("--pages", type=int, nargs="+", choices=range(1, 10), default=list(range(1, 10)))
+    parser.add_argument("--weeks", type=int, default=RANK_TREND_WEEKS)
+    parser.add_argument("--out", type=Path, default=DASHBOARD_DIR)
+    args = parser.parse_args(argv)
+
+    store = get_price_store()
+    end = args.end or store.max_date
+    start = args.start or end
+    sessions = store.dates[(store.dates >= start) & (store.dates <= end)]
+
+    if sessions.empty:
+        parser.error(f"no sessions between {start.date()} and {end.date()}")
+
+    membership = get_membership_history()
+    tmp_dir = fresh_tmp_dir(args.out)
+
+    started = time.perf_counter()
+    for page in args.pages:
+        page_started = time.perf_counter()
+        for name, df in dashboard_tables(store, membership, sessions, [page], args.weeks).items():
+            df.to_parquet(tmp_dir / f"{name}.parquet", index=False)
+            print(f"{name:<24} {len(df):>10,} rows in {time.perf_counter() - page_started:.1f}s")
+    swap_in_dir(tmp_dir, args.out)
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"Wrote {len(args.pages)} pages for {len(sessions)} sessions "
+        f"({sessions[0].date()} to {sessions[-1].date()}) to {args.out} in {elapsed:.1f}s"
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from analytics.ranks import RANK_HORIZONS, relative_rank_matrix
+from analytics.returns import trailing_returns
+from data_access.price_store import PRICE_FILE, price_files, price_version
+from data_access.trading_calendar import TradingCalendar
+
+# Deployments opt into DuckDB with RTA_QUERY_BACKEND=duckdb: trailing returns
+# and computed relative ranks then run as SQL, with ASOF joins finding the
+# closes at each end and horizon start date and RANK() ranking within each
+# date. Horizon starts come from the same TradingCalendar, so both backends
+# return the same tables. duckdb is only imported when selected.
+QUERY_BACKEND_ENV = "RTA_QUERY_BACKEND"
+QUERY_BACKENDS = ("pandas", "duckdb")
+
+
+def selected_backend() -> str:
+    backend = os.environ.get(QUERY_BACKEND_ENV, "pandas").strip().lower() or "pandas"
+    if backend not in QUERY_BACKENDS:
+        raise ValueError(f"{QUERY_BACKEND_ENV} must be one of {QUERY_BACKENDS}, got {backend!r}")
+    return backend
+
+
+# Closes at each query's end date and horizon start date, per entity.
+# start_side picks the last close on or before the start ("before") or the
+# first close on or after it ("after").
+_CLOSES_SQL = """
+WITH series AS (
+    SELECT * FROM prices
+    WHERE entity_id IN (SELECT DISTINCT entity_id FROM {queries})
+)
+SELECT
+    q.*,
+    e.date  AS end_row_date,
+    e.close AS end_close,
+    s.date  AS start_row_date,
+    s.close AS start_close
+FROM {queries} q
+ASOF LEFT JOIN series e
+    ON q.entity_id = e.entity_id AND q.end_date >= e.date
+ASOF LEFT JOIN series s
+    ON q.entity_id = s.entity_id AND q.start_date {start_op} s.date
+"""
+
+_RETURNS_SQL = """
+SELECT
+    query_pos,
+    end_row_date IS NOT NULL AS has_end,
+    CASE WHEN {start_ok} THEN (end_close / start_close - 1) * 100 END AS ret
+FROM ({closes})
+"""
+
+# Stock rows carry is_member; the benchmark's rows have it NULL. The
+# relative return is ranked among the member stocks of each date and horizon.
+_RANKS_SQL = """
+WITH returns AS MATERIALIZED (
+    SELECT
+        ref_pos, horizon, entity_id, is_member,
+        (end_close / start_close - 1) * 100 AS ret
+    FROM ({closes})
+),
+relative AS (
+    SELECT
+        s.ref_pos, s.horizon, s.entity_id, s.ret,
+        CASE WHEN s.is_member THEN s.ret - b.ret END AS rel
+    FROM returns s
+    JOIN returns b
+        ON b.ref_pos = s.ref_pos AND b.horizon = s.horizon AND b.is_member IS NULL
+    WHERE s.is_member IS NOT NULL
+)
+SELECT
+    ref_pos, horizon, entity_id, ret, rel,
+    CASE WHEN rel IS NOT NULL THEN
+        RANK() OVER (PARTITION BY ref_pos, horizon, rel IS NULL ORDER BY rel DESC)
+    END AS rank
+FROM relative
+"""
+
+
+class DuckDBEngine:
+    """
+    One in-process DuckDB database holding the date, entity and close
+    columns of the parquet store and its daily segments, loaded once per
+    published version. Each call runs on its own cursor, so sessions can
+    query concurrently.
+    """
+
+    def __init__(self, path: Path = PRICE_FILE):
+        import duckdb
+
+        self.path = Path(path)
+        self._con = duckdb.connect()
+
+        # Missing or non-positive closes become NULL, as analytics.returns
+        # treats them, which also keeps NaN from ranking first; tz-aware
+        # files are read as exchange-local times, like PriceStore
+        date = "date"
+        tz = getattr(pq.read_schema(self.path).field("date").type, "tz", None)
+        if tz is not None:
+            date = f"timezone('{_sql_string(tz)}', date)"
+        files = ", ".join(f"'{_sql_string(f)}'" for f in price_files(self.path))
+        self._con.execute(
+            "CREATE TABLE prices AS "
+            f"SELECT entity_id, CAST({date} AS TIMESTAMP) AS date, "
+            "CASE WHEN isfinite(close) AND close > 0 THEN close END AS close "
+            f"FROM read_parquet([{files}])"
+        )
+        dates = self._con.execute("SELECT DISTINCT date FROM prices ORDER BY date").df()["date"]
+        self.calendar = TradingCalendar(dates)
+
+    def _query(self, sql: str, tables: dict) -> pd.DataFrame:
+        cursor = self._con.cursor()
+        try:
+            for name, df in tables.items():
+                cursor.register(name, df)
+            return cursor.execute(sql).df()
+        finally:
+            cursor.close()
+
+    def trailing_returns(self, entity_ids, end_date, horizon: str, start_side: str = "before") -> pd.Series:
+        """analytics.returns.trailing_returns as one ASOF join."""
+        entity_ids = np.asarray(list(entity_ids), dtype=object)
+        end_date = pd.Timestamp(end_date)
+        start_date = self.calendar.horizon_start([end_date.to_datetime64()], horizon, side=start_side)[0]
+
+        queries = pd.DataFrame({
+            "query_pos": np.arange(len(entity_ids)),
+            "entity_id": entity_ids.astype(str),
+            "end_date": end_date,
+            "start_date": pd.Timestamp(start_date),
+        })
+        start_op, start_ok = (">=", "start_row_date IS NOT NULL")
+        if start_side == "after":
+            start_op, start_ok = ("<=", "start_row_date < end_row_date")
+
+        closes = _CLOSES_SQL.format(queries="queries", start_op=start_op)
+        out = self._query(
+            _RETURNS_SQL.format(closes=closes, start_ok=start_ok), {"queries": queries}
+        ).sort_values("query_pos")
+
+        has_end = out["has_end"].to_numpy(dtype=bool)
+        return pd.Series(
+            out["ret"].to_numpy(dtype="float64")[has_end],
+            index=pd.Index(entity_ids[has_end], name="entity_id"),
+        )
+
+    def relative_rank_matrix(
+        self,
+        benchmark_id: str,
+        stock_ids,
+        ref_dates,
+        horizons=RANK_HORIZONS,
+        members=None,
+    ) -> pd.DataFrame:
+        """analytics.ranks.relative_rank_matrix with ASOF joins and RANK()."""
+        stock_ids = list(stock_ids)
+        ref_dates = pd.DatetimeIndex(ref_dates)
+        n_dates, n_stocks = len(ref_dates), len(stock_ids)
+
+        is_member = np.ones((n_dates, n_stocks), dtype=bool) if members is None else np.asarray(members, dtype=bool)
+        ref_pos = np.arange(n_dates)
+
+        grid = []
+        for label in horizons:
+            starts = pd.DatetimeIndex(self.calendar.horizon_start(ref_dates, label))
+            grid.append(pd.DataFrame({
+                "ref_pos": np.repeat(ref_pos, n_stocks),
+                "horizon": label,
+                "entity_id": np.tile(np.array(stock_ids, dtype=str), n_dates),
+                "is_member": pd.array(is_member.ravel(), dtype="boolean"),
+                "end_date": np.repeat(ref_dates, n_stocks),
+                "start_date": np.repeat(starts, n_stocks),
+            }))
+            grid.append(pd.DataFrame({
+                "ref_pos": ref_pos,
+                "horizon": label,
+                "entity_id": benchmark_id,
+                "is_member": pd.array([pd.NA] * n_dates, dtype="boolean"),
+                "end_date": ref_dates,
+                "start_date": starts,
+            }))
+        queries = pd.concat(grid, ignore_index=True)
+
+        closes = _CLOSES_SQL.format(queries="queries", start_op=">=")
+        long = self._query(_RANKS_SQL.format(closes=closes), {"queries": queries})
+
+        index = pd.MultiIndex.from_product(
+            [ref_dates, stock_ids], names=["date", "entity_id"]
+        )
+        cols = pd.Index(stock_ids).get_indexer(long["entity_id"])
+        flat = long["ref_pos"].to_numpy() * n_stocks + cols
+
+        out = {}
+        ranks = []
+        for label in horizons:
+            rows = (long["horizon"] == label).to_numpy()
+            for kind in ("ret", "rel", "rank"):
+                values = np.full(n_dates * n_stocks, np.nan)
+                values[flat[rows]] = long.loc[rows, kind].to_numpy(dtype="float64", na_value=np.nan)
+                out[f"{kind}_{label}"] = values
+            ranks.append(f"rank_{label}")
+
+        out = pd.DataFrame(out, index=index)
+        out["avg_rank"] = out[ranks].mean(axis=1, skipna=True)
+        return out
+
+
+def _sql_string(value) -> str:
+    return str(value).replace("'", "''")
+
+
+@lru_cache(maxsize=2)
+def _open_engine(path: Path, version: str) -> DuckDBEngine:
+    return DuckDBEngine(path)
+
+
+def get_duckdb_engine(path: Path = PRICE_FILE) -> DuckDBEngine:
+    """The process-wide engine for `path`, reopened when a new version is published."""
+    path = Path(path)
+    return _open_engine(path, price_version(path))
+
+
+def backend_trailing_returns(asof, entity_ids, end_date, horizon: str, start_side: str = "before") -> pd.Series:
+    """trailing_returns on the deployment's query backend."""
+    if selected_backend() == "duckdb":
+        return get_duckdb_engine().trailing_returns(entity_ids, end_date, horizon, start_side)
+    return trailing_returns(asof, entity_ids, end_date, horizon, start_side=start_side)
+
+
+def backend_relative_rank_matrix(asof, benchmark_id: str, stock_ids, ref_dates, members=None) -> pd.DataFrame:
+    """relative_rank_matrix on the deployment's query backend."""
+    if selected_backend() == "duckdb":
+        return get_duckdb_engine().relative_rank_matrix(benchmark_id, stock_ids, ref_dates, members=members)
+    return relative_rank_matrix(asof, benchmark_id, stock_ids, ref_dates, members=members)
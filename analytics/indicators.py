@@ -0,0 +1,346 @@
+"""
+Maintain rolling indicators (SMAs and the 52-week high) for every entity.
+
+    python -m analytics.indicators            # full rebuild
+    python -m analytics.indicators --update   # append sessions newer than the store
+
+The full build runs one grouped rolling pass over price_history. Alongside
+it a small running state is saved (the last 200 closes, running window sums
+and a monotonic queue of 52-week high candidates per entity), so each new
+session is appended in O(entities) without re-reading any history.
+"""
+import argparse
+import json
+import os
+import time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from analytics.snapshot import HIGH_52W_DAYS, SMA_WINDOWS
+from data_access.atomic import fresh_tmp_dir, swap_in_dir
+from data_access.indicator_store import (
+    INDICATOR_BASE_FILE,
+    INDICATOR_DIR,
+    INDICATOR_META_FILE,
+    INDICATOR_STATE_FILE,
+    indicators_available,
+    read_indicators,
+)
+from data_access.price_store import PRICE_FILE, get_price_store, source_stamp
+
+INDICATOR_COLUMNS = [f"sma_{n}" for n in SMA_WINDOWS] + ["high_52w"]
+INDICATOR_SCHEMA = pa.schema(
+    [("entity_id", pa.string()), ("date", pa.timestamp("ns"))]
+    + [(c, pa.float64()) for c in INDICATOR_COLUMNS]
+)
+# Small row groups keep single-entity reads cheap on the sorted base file
+INDICATOR_ROW_GROUP = 50_000
+
+RING = max(SMA_WINDOWS)
+HIGH_WINDOW = np.timedelta64(HIGH_52W_DAYS, "D")
+
+
+def compute_indicators(prices: pd.DataFrame) -> pd.DataFrame:
+    """Indicators for every row of `prices`, which must be sorted by (entity_id, date)."""
+    prices = prices.reset_index(drop=True)
+    groups = prices.groupby("entity_id", sort=False)
+
+    out = prices[["entity_id", "date"]].copy()
+    for n in SMA_WINDOWS:
+        out[f"sma_{n}"] = groups["close"].rolling(n).mean().to_numpy()
+
+    out["high_52w"] = (
+        groups.rolling(f"{HIGH_52W_DAYS}D", on="date", closed="both")["close"]
+        .max()
+        .to_numpy()
+    )
+    return out
+
+
+class IndicatorState:
+    """
+    Everything needed to extend the indicators by one session.
+
+    ring holds each entity's last RING closes at position count % RING, sums
+    the running sum of the last min(count, n) closes per SMA window, and
+    highs a deque of (date, close) pairs with strictly decreasing closes
+    whose head is the current 52-week high.
+    """
+
+    def __init__(self, entity_ids, counts, ring, sums, last_dates, highs):
+        self.entity_ids = pd.Index(entity_ids)
+        self.counts = counts
+        self.ring = ring
+        self.sums = sums
+        self.last_dates = last_dates
+        self.highs = highs
+
+    @classmethod
+    def from_store(cls, store):
+        ids = store.entity_ids
+        starts, stops = store.bounds(ids)
+        close = store.prices["close"].to_numpy("float64")
+        dates = store.prices["date"].to_numpy("datetime64[ns]")
+
+        counts = (stops - starts).astype(np.int64)
+        ring = np.full((len(ids), RING), np.nan)
+        sums = np.zeros((len(ids), len(SMA_WINDOWS)))
+
+        for k in range(RING):
+            pos = stops - 1 - k
+            has = pos >= starts
+            values = np.where(has, close[np.maximum(pos, 0)], 0.0)
+            ring[has, (counts[has] - 1 - k) % RING] = values[has]
+            for j, n in enumerate(SMA_WINDOWS):
+                if k < n:
+                    sums[:, j] += values
+
+        highs = []
+        for start, stop in zip(starts, stops):
+            lo = start + np.searchsorted(dates[start:stop], dates[stop - 1] - HIGH_WINDOW)
+            window = close[lo:stop]
+            # Keep closes strictly above everything after them
+            later_max = np.r_[np.maximum.accumulate(window[::-1])[::-1][1:], -np.inf]
+            keep = np.flatnonzero(window > later_max)
+            highs.append(deque(zip(dates[lo:stop][keep], window[keep])))
+
+        return cls(ids, counts, ring, sums, dates[stops - 1], highs)
+
+    def _add_entities(self, entity_ids):
+        n = len(entity_ids)
+        self.entity_ids = self.entity_ids.append(pd.Index(entity_ids))
+        self.counts = np.r_[self.counts, np.zeros(n, dtype=np.int64)]
+        self.ring = np.vstack([self.ring, np.full((n, RING), np.nan)])
+        self.sums = np.vstack([self.sums, np.zeros((n, len(SMA_WINDOWS)))])
+        self.last_dates = np.r_[self.last_dates, np.full(n, np.datetime64("NaT"), "datetime64[ns]")]
+        self.highs += [deque() for _ in range(n)]
+
+    def append(self, day: pd.DataFrame) -> pd.DataFrame:
+        """
+        Advance by one session. `day` holds entity_id, date and close, one
+        row per entity; returns the indicator rows for those entities.
+        Closes must be finite and positive: the running sums and high
+        deques would carry a bad one into every later session.
+        """
+        if day["entity_id"].duplicated().any():
+            raise ValueError("append takes at most one row per entity")
+
+        close = day["close"].to_numpy("float64")
+        bad = ~(np.isfinite(close) & (close > 0))
+        if bad.any():
+            raise ValueError(
+                f"{bad.sum()} rows with a missing, zero or negative close, "
+                f"e.g. {day['entity_id'].iloc[np.flatnonzero(bad)[0]]}"
+            )
+
+        new = day.loc[~day["entity_id"].isin(self.entity_ids), "entity_id"]
+        if len(new):
+            self._add_entities(new.tolist())
+
+        codes = self.entity_ids.get_indexer(day["entity_id"])
+        dates = day["date"].to_numpy("datetime64[ns]")
+
+        last = self.last_dates[codes]
+        if (~np.isnat(last) & (dates <= last)).any():
+            raise ValueError("appended rows must be newer than the stored history")
+
+        counts = self.counts[codes]
+        out = {"entity_id": day["entity_id"].to_numpy(), "date": dates}
+
+        for j, n in enumerate(SMA_WINDOWS):
+            leaving = np.where(counts >= n, self.ring[codes, (counts - n) % RING], 0.0)
+            self.sums[codes, j] += close - leaving
+            out[f"sma_{n}"] = np.where(counts + 1 >= n, self.sums[codes, j] / n, np.nan)
+
+        self.ring[codes, counts % RING] = close
+        self.counts[codes] = counts + 1
+        self.last_dates[codes] = dates
+
+        high = np.empty(len(codes))
+        for i, (code, date, value) in enumerate(zip(codes, dates, close)):
+            queue = self.highs[code]
+            while queue and queue[-1][1] <= value:
+                queue.pop()
+            queue.append((date, value))
+            while queue[0][0] < date - HIGH_WINDOW:
+                queue.popleft()
+            high[i] = queue[0][1]
+        out["high_52w"] = high
+
+        return pd.DataFrame(out)
+
+    def save(self, path: Path):
+        lengths = np.array([len(q) for q in self.highs], dtype=np.int64)
+        pairs = [pair for q in self.highs for pair in q]
+
+        tmp_path = Path(path).with_name("_" + Path(path).name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                entity_ids=np.asarray(self.entity_ids, dtype=str),
+                counts=self.counts,
+                ring=self.ring,
+                sums=self.sums,
+                last_dates=self.last_dates,
+                high_lengths=lengths,
+                high_dates=np.array([d for d, _ in pairs], dtype="datetime64[ns]"),
+                high_values=np.array([v for _, v in pairs], dtype="float64"),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path):
+        with np.load(path) as f:
+            bounds = np.r_[0, np.cumsum(f["high_lengths"])]
+            high_dates, high_values = f["high_dates"], f["high_values"]
+            highs = [
+                deque(zip(high_dates[a:b], high_values[a:b]))
+                for a, b in zip(bounds[:-1], bounds[1:])
+            ]
+            return cls(
+                f["entity_ids"].astype(object),
+                f["counts"],
+                f["ring"],
+                f["sums"],
+                f["last_dates"],
+                highs,
+            )
+
+
+def _write_rows(df: pd.DataFrame, path: Path):
+    table = pa.Table.from_pandas(df[INDICATOR_SCHEMA.names], schema=INDICATOR_SCHEMA, preserve_index=False)
+    tmp_path = path.with_name("_" + path.name + ".tmp")
+    pq.write_table(table, tmp_path, compression="zstd", row_group_size=INDICATOR_ROW_GROUP)
+    os.replace(tmp_path, path)
+
+
+def build_indicators(store, out_dir: Path = INDICATOR_DIR, source: Path = PRICE_FILE) -> dict:
+    """Full rebuild from `store`, expected to hold the prices of `source`, whose stamp it records."""
+    out_dir = Path(out_dir)
+    tmp_dir = fresh_tmp_dir(out_dir)
+    # Stamped before computing, so a file replaced mid-build reads as stale
+    stamp = source_stamp(source) if Path(source).exists() else None
+
+    df = compute_indicators(store.prices)
+    _write_rows(df, tmp_dir / INDICATOR_BASE_FILE)
+    IndicatorState.from_store(store).save(tmp_dir / INDICATOR_STATE_FILE)
+    meta = {"built_at": pd.Timestamp.now().isoformat(), "source": stamp}
+    (tmp_dir / INDICATOR_META_FILE).write_text(json.dumps(meta, indent=2))
+
+    swap_in_dir(tmp_dir, out_dir)
+    return {"rows": len(df), "entities": len(store.entity_ids)}
+
+
+def update_indicators(store, path: Path = INDICATOR_DIR) -> dict:
+    """
+    Append every price row newer than the stored state, one session at a
+    time. The run's rows land in append-<last session>.parquet and the state
+    is saved after it, so an interrupted run is redone cleanly on the next.
+    """
+    path = Path(path)
+    state = IndicatorState.load(path / INDICATOR_STATE_FILE)
+
+    prices = store.prices[["entity_id", "date", "close"]]
+    codes = state.entity_ids.get_indexer(prices["entity_id"])
+    last = state.last_dates[np.maximum(codes, 0)]
+    fresh = (codes < 0) | (prices["date"].to_numpy() > last)
+
+    appended = []
+    sessions = []
+    for date, day in prices[fresh].groupby("date", sort=True):
+        appended.append(state.append(day))
+        sessions.append(date)
+
+    if not sessions:
+        return {"rows": 0, "sessions": sessions}
+
+    df = pd.concat(appended, ignore_index=True)
+    _write_rows(df, path / f"append-{sessions[-1]:%Y%m%d}.parquet")
+    state.save(path / INDICATOR_STATE_FILE)
+    return {"rows": len(df), "sessions": sessions}
+
+
+def append_indicator_session(day: pd.DataFrame, path: Path = INDICATOR_DIR, source: Path = PRICE_FILE) -> pd.DataFrame:
+    """
+    Advance the stored indicators by one session of entity_id, date and
+    close rows, without touching the price store. Returns the new rows, or
+    None if indicators are not built from `source` or already hold the
+    session.
+    """
+    path = Path(path)
+    if not indicators_available(path, source):
+        return None
+
+    state = IndicatorState.load(path / INDICATOR_STATE_FILE)
+    date = pd.Timestamp(day["date"].iloc[0])
+
+    codes = state.entity_ids.get_indexer(day["entity_id"])
+    done = (codes >= 0) & (state.last_dates[np.maximum(codes, 0)] >= date.to_datetime64())
+    if done.all():
+        return None
+
+    df = state.append(day.loc[~done, ["entity_id", "date", "close"]])
+    _write_rows(df, path / f"append-{date:%Y%m%d}.parquet")
+    state.save(path / INDICATOR_STATE_FILE)
+    return df
+
+
+def entity_indicators(
+    store, entity_id: str, start=None, path: Path = INDICATOR_DIR, source: Path = PRICE_FILE
+) -> pd.DataFrame:
+    """
+    Indicator rows for one entity from `start` on, read from the store when
+    it is built from `source` and current for that entity, and computed
+    over its full history otherwise.
+    """
+    history = store.history(entity_id)
+
+    if indicators_available(path, source) and not history.empty:
+        df = read_indicators([entity_id], start=start, path=path)
+        if not df.empty and df["date"].iloc[-1] >= history["date"].iloc[-1]:
+            return df
+
+    df = compute_indicators(history)
+    if start is not None:
+        df = df[df["date"] >= pd.Timestamp(start)]
+    return df.reset_index(drop=True)
+
+
+def indicators_on(ref_date, path: Path = INDICATOR_DIR, source: Path = PRICE_FILE):
+    """Stored indicators on `ref_date` indexed by entity_id, or None if not built from `source`."""
+    if not indicators_available(path, source):
+        return None
+    return read_indicators(dates=[ref_date], path=path).set_index("entity_id")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", type=Path, default=INDICATOR_DIR)
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="append sessions newer than the stored state instead of rebuilding",
+    )
+    args = parser.parse_args(argv)
+
+    store = get_price_store()
+    started = time.perf_counter()
+
+    if args.update and indicators_available(args.out):
+        summary = update_indicators(store, args.out)
+        done = f"Appended {summary['rows']:,} rows for {len(summary['sessions'])} sessions"
+    else:
+        summary = build_indicators(store, args.out)
+        done = f"Wrote {summary['rows']:,} rows for {summary['entities']} entities"
+
+    elapsed = time.perf_counter() - started
+    print(f"{done} to {args.out} in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+
+from data_access.profiling import span
+
+# The Momentum Maturity Matrix places each stock in a stage of its momentum
+# cycle from the shape of its avg_rank trajectory (analytics.rank_trajectories).
+# Over a window of sessions ending on each date, a least-squares quadratic
+# gives the trend (slope, ranks per session) and its curvature (second
+# derivative, ranks per session squared). Rank 1 is the strongest, so a
+# negative slope is an improving rank. The fits are fixed linear filters of
+# the ranks, applied to every stock and date at once.
+MATURITY_WINDOWS = (21, 63)
+DEFAULT_WINDOW = 63
+
+# A stock whose fitted rank moves by less than this share of the ranked field
+# over the window is treated as flat
+FLAT_BAND = 0.05
+
+STAGES = ("Emerging", "Accelerating", "Mature", "Fading", "Bottoming", "Lagging")
+
+
+def _fit_weights(window: int) -> np.ndarray:
+    """(window x 2) weights turning a window of values into slope and curvature."""
+    if window < 3:
+        raise ValueError(f"window must be at least 3 sessions, got {window}")
+
+    # Centred time and its orthogonal quadratic, so the two fits are independent
+    t = np.arange(window) - (window - 1) / 2
+    q = t**2 - (t**2).mean()
+    return np.column_stack([t / (t @ t), 2 * q / (q @ q)])
+
+
+def rolling_trend(values, window: int = DEFAULT_WINDOW):
+    """
+    (slope, curvature) of a least-squares quadratic over the `window`
+    sessions ending on each row of a (dates x stocks) array, both shaped
+    like it. Rows without a full window, or with a gap in it, are NaN.
+    """
+    values = np.asarray(values, dtype="float64")
+    weights = _fit_weights(window)
+
+    slope = np.full(values.shape, np.nan)
+    curvature = np.full(values.shape, np.nan)
+    n = len(values) - window + 1
+    if n <= 0:
+        return slope, curvature
+
+    # One pass per window offset keeps memory at one dates x stocks array
+    fit_slope = np.zeros((n, *values.shape[1:]))
+    fit_curvature = np.zeros((n, *values.shape[1:]))
+    for k in range(window):
+        block = values[k:k + n]
+        fit_slope += weights[k, 0] * block
+        fit_curvature += weights[k, 1] * block
+
+    slope[window - 1:] = fit_slope
+    curvature[window - 1:] = fit_curvature
+    return slope, curvature
+
+
+def classify_stages(percentile_score, slope, curvature, n_ranked, window: int = DEFAULT_WINDOW) -> np.ndarray:
+    """
+    Stage label per cell, None where the fit is undefined. Leaders are in
+    the top half by percentile score.
+
+    Emerging      lower half, rank improving
+    Accelerating  upper half, improving at a steady or quickening pace
+    Mature        upper half, flat or improving ever more slowly
+    Fading        upper half, rank worsening
+    Bottoming     lower half, flat or worsening, but turning up
+    Lagging       lower half, flat or worsening
+    """
+    percentile_score = np.asarray(percentile_score, dtype="float64")
+    slope = np.asarray(slope, dtype="float64")
+    curvature = np.asarray(curvature, dtype="float64")
+
+    band = FLAT_BAND * np.asarray(n_ranked, dtype="float64") / (window - 1)
+    leading = percentile_score >= 50
+    improving = slope < -band
+    worsening = slope > band
+
+    stage = np.select(
+        [
+            ~leading & improving,
+            leading & improving & (curvature <= 0),
+            leading & ~worsening,
+            leading & worsening,
+            ~leading & (curvature < 0),
+        ],
+        STAGES[:5],
+        STAGES[5],
+    ).astype(object)
+
+    undefined = np.isnan(percentile_score) | np.isnan(slope) | np.isnan(curvature)
+    stage[undefined] = None
+    return stage
+
+
+def maturity_stages(cube, window: int = DEFAULT_WINDOW, start=None, end=None) -> pd.DataFrame:
+    """Stage per session (rows) and stock (columns) of a RankCube, between start and end."""
+    with span("maturity stages", rows=cube.avg_rank.size):
+        slope, curvature = rolling_trend(cube.avg_rank, window)
+        n_ranked = (~np.isnan(cube.avg_rank)).sum(axis=1, keepdims=True)
+        stage = classify_stages(cube.percentile_score, slope, curvature, n_ranked, window)
+
+    rows = cube.span(start, end)
+    return pd.DataFrame(stage[rows], index=cube.dates[rows].rename("date"), columns=cube.stock_ids)
+
+
+def momentum_maturity(cube, ref_date=None, windows=MATURITY_WINDOWS, stage_window: int = DEFAULT_WINDOW) -> pd.DataFrame:
+    """
+    One row per stock ranked on the last session on or before ref_date:
+    avg_rank, percentile_score, slope_<w> and curvature_<w> per window,
+    and the stage from the stage_window fit. Only the sessions the fits
+    need are read from the cube.
+    """
+    row = len(cube.dates) - 1 if ref_date is None else cube.dates.searchsorted(pd.Timestamp(ref_date), "right") - 1
+    if row < 0:
+        return pd.DataFrame()
+
+    windows = sorted(set(windows) | {stage_window})
+    lo = max(0, row + 1 - max(windows))
+
+    avg_rank = cube.avg_rank[row]
+    ranked = ~np.isnan(avg_rank)
+    out = pd.DataFrame({
+        "avg_rank": avg_rank,
+        "percentile_score": cube.percentile_score[row],
+    }, index=cube.stock_ids.rename("entity_id"))
+
+    fits = {}
+    for w in windows:
+        slope, curvature = rolling_trend(cube.avg_rank[lo:row + 1], w)
+        fits[w] = slope[-1], curvature[-1]
+        out[f"slope_{w}"] = slope[-1]
+        out[f"curvature_{w}"] = curvature[-1]
+
+    out["stage"] = classify_stages(out["percentile_score"], *fits[stage_window], ranked.sum(), stage_window)
+    return out[ranked]
@@ -0,0 +1,200 @@
+"""
+Materialize relative-strength ranks for every index on every trading day.
+
+    python -m analytics.rank_history
+
+Each index has its members ranked against it on each of the index's
+trading days, using the membership in force on that day. The result goes to
+data/processed/rank_history/, partitioned by index and year, and pages
+read slices of it through data_access.rank_store.
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from analytics.duckdb_engine import backend_relative_rank_matrix
+from analytics.ranks import RANK_HORIZONS, relative_rank_matrix
+from data_access.atomic import fresh_tmp_dir, swap_in_dir
+from data_access.constituent_history import get_membership_history
+from data_access.price_store import PRICE_FILE, get_price_store, source_stamp
+from data_access.rank_store import (
+    RANK_HISTORY_DIR,
+    RANK_META_FILE,
+    rank_history_available,
+    read_rank_history,
+)
+
+
+def add_percentile_score(ranks: pd.DataFrame) -> pd.DataFrame:
+    """Percentile of the rounded avg_rank among ranked stocks on each date."""
+    n = ranks["avg_rank"].notna().groupby(level="date").transform("sum")
+    ranks["percentile_score"] = (n - ranks["avg_rank"].round(0)) / n * 100
+    return ranks
+
+
+def index_rank_history(asof, index_id: str, stock_ids, dates, members=None) -> pd.DataFrame:
+    ranks = add_percentile_score(
+        relative_rank_matrix(asof, index_id, stock_ids, dates, members=members)
+    )
+
+    # Ranks and scores are small exact values; returns only feed display
+    return ranks.astype("float32").reset_index()
+
+
+def _partitioned(df: pd.DataFrame, index_id: str) -> pa.Table:
+    df = df.assign(
+        index_entity_id=index_id,
+        year=df["date"].dt.year.astype("int16"),
+    )
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def _write_partitions(table: pa.Table, out_dir: Path, basename_template: str):
+    ds.write_dataset(
+        table,
+        out_dir,
+        format="parquet",
+        file_options=ds.ParquetFileFormat().make_write_options(compression="zstd"),
+        partitioning=ds.partitioning(
+            pa.schema([("index_entity_id", pa.string()), ("year", pa.int16())]),
+            flavor="hive",
+        ),
+        basename_template=basename_template,
+        existing_data_behavior="overwrite_or_ignore",
+    )
+
+
+def materialize_rank_history(store, membership, out_dir: Path = RANK_HISTORY_DIR, source: Path = PRICE_FILE) -> dict:
+    """
+    Rank every stock that was in each index at some point of its history,
+    counting it only on the dates it was a member. `store` is expected to
+    hold the prices of `source`, whose stamp the build records.
+    """
+    out_dir = Path(out_dir)
+    tmp_dir = fresh_tmp_dir(out_dir)
+    # Stamped before ranking, so a file replaced mid-build reads as stale
+    stamp = source_stamp(source) if Path(source).exists() else None
+
+    rows = 0
+    indices = []
+    for index_id in sorted(membership.index_ids):
+        dates = store.history(index_id)["date"]
+        if dates.empty:
+            continue
+
+        stock_ids = membership.ever_members(index_id, dates.iloc[0], dates.iloc[-1])
+        members = membership.member_mask(index_id, stock_ids, dates)
+        df = index_rank_history(store.asof, index_id, stock_ids, dates, members)
+
+        _write_partitions(_partitioned(df, index_id), tmp_dir, "part-{i}.parquet")
+        rows += len(df)
+        indices.append(index_id)
+
+    meta = {"built_at": pd.Timestamp.now().isoformat(), "source": stamp}
+    (tmp_dir / RANK_META_FILE).write_text(json.dumps(meta, indent=2))
+
+    # Swap the finished tree in so readers never see a partial build
+    swap_in_dir(tmp_dir, out_dir)
+
+    return {"rows": rows, "indices": indices}
+
+
+def session_ranks(asof, membership, date) -> dict:
+    """
+    Index ID -> rank rows on `date` for every index with a close that day,
+    over the stocks the full materialization ranks (every stock in the
+    index at some point since its first close), so appended sessions line
+    up with rebuilt ones.
+    """
+    date = pd.Timestamp(date)
+    out = {}
+    for index_id in sorted(membership.index_ids):
+        if asof.take_dates(asof.rows([index_id], [date]))[0] != date.to_datetime64():
+            continue
+
+        first = asof.take_dates(asof.rows([index_id], [np.datetime64("1900-01-01")], side="after"))[0]
+        stock_ids = membership.ever_members(index_id, first, date)
+        members = membership.member_mask(index_id, stock_ids, [date])
+        out[index_id] = index_rank_history(asof, index_id, stock_ids, [date], members)
+    return out
+
+
+def append_rank_session(ranks: dict, path: Path = RANK_HISTORY_DIR):
+    """
+    Add one session of session_ranks output to the history. Files are
+    written aside and renamed into their partitions, and named by session,
+    so a repeated run replaces them.
+    """
+    path = Path(path)
+    tmp_dir = fresh_tmp_dir(path.with_name(path.name + ".append"))
+
+    for index_id, df in ranks.items():
+        date = df["date"].iloc[0]
+        _write_partitions(_partitioned(df, index_id), tmp_dir, f"append-{date:%Y%m%d}-{{i}}.parquet")
+
+    for f in sorted(tmp_dir.rglob("*.parquet")):
+        target = path / f.relative_to(tmp_dir)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(f, target)
+    shutil.rmtree(tmp_dir)
+
+
+def relative_ranks(
+    asof,
+    benchmark_id: str,
+    stock_ids,
+    ref_dates,
+    path: Path = RANK_HISTORY_DIR,
+    members=None,
+    source: Path = PRICE_FILE,
+) -> pd.DataFrame:
+    """
+    relative_rank_matrix, served from the materialized history when it was
+    built from the current `source` and holds every requested date and
+    stock, and computed on the query backend otherwise. The history is
+    already point-in-time; `members` applies to computed ranks.
+    """
+    stock_ids = list(stock_ids)
+    ref_dates = pd.DatetimeIndex(ref_dates)
+
+    if rank_history_available(path, source):
+        df = read_rank_history(benchmark_id, dates=ref_dates, path=path)
+        df = df[df["entity_id"].isin(stock_ids)]
+
+        if len(df) == len(ref_dates) * len(stock_ids):
+            index = pd.MultiIndex.from_product(
+                [ref_dates, stock_ids], names=["date", "entity_id"]
+            )
+            df = df.set_index(["date", "entity_id"]).reindex(index)
+            return df.astype("float64")
+
+    return add_percentile_score(
+        backend_relative_rank_matrix(asof, benchmark_id, stock_ids, ref_dates, members=members)
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", type=Path, default=RANK_HISTORY_DIR)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    summary = materialize_rank_history(get_price_store(), get_membership_history(), args.out)
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"Wrote {summary['rows']:,} rank rows for {len(summary['indices'])} indices "
+        f"({', '.join(RANK_HORIZONS)}) to {args.out} in {elapsed:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
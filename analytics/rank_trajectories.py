@@ -0,0 +1,137 @@
+from functools import cached_property, lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analytics.ranks import RANK_HORIZONS, descending_ranks
+from analytics.returns import horizon_returns, relative_returns
+from data_access.constituent_history import get_membership_history, membership_version
+from data_access.price_matrix import PRICE_MATRIX_DIR, get_shared_store
+from data_access.price_store import PRICE_FILE, price_version
+from data_access.profiling import span
+from data_access.trading_calendar import TradingCalendar
+
+# Rank Trajectory Maps rank an index's stocks on every session of its
+# history at once: one horizon_returns call per side fills a (dates x
+# stocks x horizons) relative-return cube, masked to the membership in force
+# on each date, and one sort ranks every (date, horizon) slice. A stock's
+# trajectory or the index's map is then a slice of the cube. The ranks are
+# the ones analytics.rank_history materializes for the same index.
+
+
+class RankCube:
+    """
+    Ranks of every stock that was in an index at some point, on each of
+    the index's sessions, per horizon. rank[d, s, h] is NaN where stock s
+    was not a member on date d or lacks the history for horizon h.
+    """
+
+    def __init__(self, index_id: str, dates, stock_ids, rank: np.ndarray, horizons=RANK_HORIZONS):
+        self.index_id = index_id
+        self.dates = pd.DatetimeIndex(dates)
+        self.stock_ids = pd.Index(list(stock_ids))
+        self.horizons = tuple(horizons)
+        self.rank = rank
+
+    @cached_property
+    def avg_rank(self) -> np.ndarray:
+        """(dates x stocks) mean of the available horizon ranks."""
+        with np.errstate(invalid="ignore"):
+            ranked = ~np.isnan(self.rank)
+            total = np.where(ranked, self.rank, 0).sum(axis=2, dtype="float64")
+            return total / np.where(ranked.any(axis=2), ranked.sum(axis=2), np.nan)
+
+    @cached_property
+    def percentile_score(self) -> np.ndarray:
+        """(dates x stocks) percentile of the rounded avg_rank, as rank_history scores it."""
+        ranked = (~np.isnan(self.avg_rank)).sum(axis=1, keepdims=True)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (ranked - np.round(self.avg_rank)) / ranked * 100
+
+    def span(self, start=None, end=None) -> slice:
+        """Positional slice of the sessions between start and end."""
+        lo = 0 if start is None else self.dates.searchsorted(pd.Timestamp(start), "left")
+        hi = len(self.dates) if end is None else self.dates.searchsorted(pd.Timestamp(end), "right")
+        return slice(lo, hi)
+
+    def stock_trajectory(self, stock_id: str, start=None, end=None) -> pd.DataFrame:
+        """
+        rank_<h>, avg_rank and percentile_score of one stock by date, over
+        the dates it was ranked on; empty if it never was.
+        """
+        col = self.stock_ids.get_indexer([stock_id])[0]
+        span = self.span(start, end)
+        if col < 0:
+            return pd.DataFrame(columns=[*(f"rank_{h}" for h in self.horizons), "avg_rank", "percentile_score"])
+
+        out = pd.DataFrame(
+            self.rank[span, col, :],
+            index=self.dates[span].rename("date"),
+            columns=[f"rank_{h}" for h in self.horizons],
+        )
+        out["avg_rank"] = self.avg_rank[span, col]
+        out["percentile_score"] = self.percentile_score[span, col]
+        return out[out["avg_rank"].notna()]
+
+    def rank_map(self, start=None, end=None, freq: str = None) -> pd.DataFrame:
+        """
+        avg_rank per stock (rows) and date (columns) between start and end,
+        on every session or only the last of each week or month ("week_ends",
+        "month_ends"). Stocks never ranked in the window are left out.
+        """
+        span = self.span(start, end)
+        rows = np.arange(len(self.dates))[span]
+        if freq is not None:
+            ends = getattr(TradingCalendar(self.dates[span]), freq)
+            rows = rows[self.dates[span].isin(ends)]
+
+        values = self.avg_rank[rows]
+        keep = ~np.isnan(values).all(axis=0)
+        return pd.DataFrame(
+            values[:, keep].T,
+            index=self.stock_ids[keep].rename("entity_id"),
+            columns=self.dates[rows].rename("date"),
+        )
+
+
+def rank_cube(store, membership, index_id: str, horizons=RANK_HORIZONS, start=None) -> RankCube:
+    """
+    The RankCube of an index over its full history, or from `start` on.
+    Stocks are everyone in the index during those sessions.
+    """
+    dates = pd.DatetimeIndex(store.history(index_id)["date"])
+    if start is not None:
+        dates = dates[dates >= pd.Timestamp(start)]
+    if dates.empty:
+        raise ValueError(f"no sessions for {index_id}")
+
+    stock_ids = membership.ever_members(index_id, dates[0], dates[-1])
+    members = membership.member_mask(index_id, stock_ids, dates)
+
+    with span("rank cube", rows=len(dates) * len(stock_ids)):
+        stock_returns = horizon_returns(store.asof, stock_ids, dates, horizons)
+        bench_returns = horizon_returns(store.asof, [index_id], dates, horizons)
+
+        rel = np.empty((len(dates), len(stock_ids), len(horizons)))
+        for i, label in enumerate(horizons):
+            rel[:, :, i] = np.where(members, relative_returns(stock_returns[label], bench_returns[label]), np.nan)
+
+        # Small exact values, so float32 halves the cube without changing a rank
+        rank = descending_ranks(rel, axis=1).astype("float32")
+    return RankCube(index_id, dates, stock_ids, rank, horizons)
+
+
+@lru_cache(maxsize=8)
+def _cached_cube(index_id: str, matrix_dir: Path, source: Path, version: str, membership: str) -> RankCube:
+    store = get_shared_store(matrix_dir, source)
+    return rank_cube(store, get_membership_history(), index_id)
+
+
+def get_rank_cube(index_id: str, matrix_dir: Path = PRICE_MATRIX_DIR, source: Path = PRICE_FILE) -> RankCube:
+    """
+    The process-wide RankCube of an index, rebuilt when a new price version
+    is published or membership is re-recorded.
+    """
+    source = Path(source)
+    return _cached_cube(index_id, Path(matrix_dir), source, price_version(source), membership_version())
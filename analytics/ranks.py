@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+from analytics.returns import horizon_returns, relative_returns
+from data_access.profiling import span
+
+# Trading-calendar horizons used by the relative strength pages
+RANK_HORIZONS = ("3M", "6M", "1Y")
+
+
+def descending_ranks(values, axis: int = -1) -> np.ndarray:
+    """
+    Competition ranks along `axis` (pandas method="min", descending): 1 is
+    the largest value, ties share the best rank, NaN stays unranked. Every
+    slice is ranked by one sort of the whole array.
+    """
+    values = np.moveaxis(np.asarray(values, dtype="float64"), axis, -1)
+    shape = values.shape
+    if not values.size:
+        return np.moveaxis(values.copy(), -1, axis)
+    flat = values.reshape(-1, shape[-1])
+
+    # NaN sorts last; each sorted cell takes the position its run of ties starts at
+    keys = np.where(np.isnan(flat), np.inf, -flat)
+    order = np.argsort(keys, axis=1, kind="stable")
+    ordered = np.take_along_axis(keys, order, axis=1)
+    starts = np.zeros(ordered.shape, dtype=np.int64)
+    starts[:, 1:] = np.where(ordered[:, 1:] != ordered[:, :-1], np.arange(1, shape[-1]), 0)
+    np.maximum.accumulate(starts, axis=1, out=starts)
+
+    ranks = np.empty(flat.shape)
+    np.put_along_axis(ranks, order, starts + 1.0, axis=1)
+    ranks[np.isnan(flat)] = np.nan
+    return np.moveaxis(ranks.reshape(shape), -1, axis)
+
+
+def relative_rank_matrix(
+    asof,
+    benchmark_id: str,
+    stock_ids,
+    ref_dates,
+    horizons=RANK_HORIZONS,
+    members=None,
+) -> pd.DataFrame:
+    """
+    Returns, benchmark-relative returns and within-set ranks for every
+    (reference date, stock) pair in one pass.
+
+    The result is indexed by (date, entity_id) with ret_<h>, rel_<h> and
+    rank_<h> columns per horizon plus avg_rank, the mean of the available
+    horizon ranks. Rank 1 is the strongest relative return on that date.
+
+    `members` is an optional (dates x stocks) bool matrix; stocks outside
+    the index on a date are left unranked there and do not affect the
+    ranks of the others.
+    """
+    stock_ids = list(stock_ids)
+    ref_dates = pd.DatetimeIndex(ref_dates)
+
+    index = pd.MultiIndex.from_product(
+        [ref_dates, stock_ids], names=["date", "entity_id"]
+    )
+    out = {}
+    ranks = []
+
+    with span("relative ranks", rows=len(ref_dates) * len(stock_ids)):
+        stock_returns = horizon_returns(asof, stock_ids, ref_dates, horizons)
+        bench_returns = horizon_returns(asof, [benchmark_id], ref_dates, horizons)
+
+        for label in horizons:
+            ret = stock_returns[label]
+            rel = relative_returns(ret, bench_returns[label])
+            if members is not None:
+                rel = np.where(members, rel, np.nan)
+
+            rank = descending_ranks(rel, axis=1)
+
+            out[f"ret_{label}"] = ret.ravel()
+            out[f"rel_{label}"] = rel.ravel()
+            out[f"rank_{label}"] = rank.ravel()
+            ranks.append(f"rank_{label}")
+
+    out = pd.DataFrame(out, index=index)
+    out["avg_rank"] = out[ranks].mean(axis=1, skipna=True)
+
+    return out
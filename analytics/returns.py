@@ -1,8 +1,132 @@
+import numpy as np
 import pandas as pd
 
+from data_access.profiling import span
+from data_access.trading_calendar import HORIZONS
+
+RETURN_KINDS = ("simple", "log", "annualized")
+DAYS_PER_YEAR = 365.25
+
+
 def absolute_return(start_price: float, end_price: float) -> float:
     return (end_price / start_price) - 1
 
 
 def cagr(start_price: float, end_price: float, years: float) -> float:
     return (end_price / start_price) ** (1 / years) - 1
+
+
+def _prices(*prices):
+    # Returns are only defined between positive, finite prices
+    out = []
+    for p in prices:
+        p = np.asarray(p, dtype="float64")
+        out.append(np.where(np.isfinite(p) & (p > 0), p, np.nan))
+    return out
+
+
+def pct_return(start_price, end_price):
+    """Simple return in percent, elementwise; NaN unless both prices are positive."""
+    start, end = _prices(start_price, end_price)
+    return (end / start - 1) * 100
+
+
+def log_return(start_price, end_price):
+    """Log return in percent (100 * ln(end / start)), elementwise."""
+    start, end = _prices(start_price, end_price)
+    return np.log(end / start) * 100
+
+
+def annualized_return(start_price, end_price, days):
+    """
+    Compound annual return in percent over `days` calendar days,
+    elementwise; NaN where no time has passed.
+    """
+    start, end = _prices(start_price, end_price)
+    days = np.asarray(days, dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        years = np.where(days > 0, days / DAYS_PER_YEAR, np.nan)
+        return ((end / start) ** (1 / years) - 1) * 100
+
+
+def relative_returns(returns, benchmark):
+    """
+    Returns minus a benchmark's, broadcasting a (dates x 1) benchmark
+    across (dates x entities) returns. NaN on either side gives NaN.
+    """
+    return np.asarray(returns, dtype="float64") - np.asarray(benchmark, dtype="float64")
+
+
+def horizon_returns(
+    asof,
+    entity_ids,
+    dates,
+    horizons=tuple(HORIZONS),
+    kind: str = "simple",
+    start_side: str = "before",
+) -> dict:
+    """
+    Horizon label -> (dates x entities) returns in percent, for every
+    (date, entity) pair at once.
+
+    Each return runs to the last close on or before the date, from the
+    close at the horizon start resolved on the trading calendar. With
+    start_side="before" the start is the last close on or before the
+    horizon start, so an entity whose history does not reach back that far
+    gets NaN. With start_side="after" it is the first close inside the
+    window, so short histories give a partial-window return, but at least
+    two closes are needed.
+
+    NaN also marks dates before the entity's first close, horizon starts
+    before the calendar, and missing or non-positive prices. kind is
+    "simple", "log" or "annualized" (compounded over the calendar days
+    between the two closes).
+    """
+    if kind not in RETURN_KINDS:
+        raise ValueError(f"kind must be one of {RETURN_KINDS}, got {kind!r}")
+
+    entities = np.asarray(list(entity_ids), dtype=object)[None, :]
+    dates = pd.DatetimeIndex(dates)
+
+    with span("horizon returns", rows=dates.size * entities.size):
+        end_rows = asof.rows(entities, dates.to_numpy()[:, None])
+        end = asof.take(end_rows)
+        if kind == "annualized":
+            end_dates = asof.take_dates(end_rows)
+
+        out = {}
+        for label in horizons:
+            starts = asof.calendar.horizon_start(dates, label, side=start_side)
+            start_rows = asof.rows(entities, starts[:, None], side=start_side)
+            if start_side == "after":
+                start_rows = np.where(start_rows < end_rows, start_rows, -1)
+            start = asof.take(start_rows)
+
+            if kind == "simple":
+                out[label] = pct_return(start, end)
+            elif kind == "log":
+                out[label] = log_return(start, end)
+            else:
+                days = (end_dates - asof.take_dates(start_rows)) / np.timedelta64(1, "D")
+                out[label] = annualized_return(start, end, days)
+    return out
+
+
+def trailing_returns(asof, entity_ids, end_date, horizon: str, start_side: str = "before") -> pd.Series:
+    """
+    Percent return per entity over a calendar horizon ending at the last
+    close on or before `end_date`; horizon_returns for one date and horizon.
+
+    Entities with no close by `end_date` are dropped; a missing start
+    close gives NaN.
+    """
+    entity_ids = np.asarray(list(entity_ids), dtype=object)
+    end_date = pd.Timestamp(end_date)
+
+    ret = horizon_returns(asof, entity_ids, [end_date], [horizon], start_side=start_side)[horizon][0]
+    has_end = asof.rows(entity_ids, end_date.to_datetime64()) >= 0
+
+    return pd.Series(
+        ret[has_end],
+        index=pd.Index(entity_ids[has_end], name="entity_id"),
+    )
@@ -0,0 +1,256 @@
+"""
+Scan the full price history for rotation-signal events.
+
+    python -m analytics.rotation_signals [--index "IDX_NIFTY 500" ...] [--out FILE]
+
+Events are SMA crossovers (each SMA crossing the next slower one, the pairs
+behind page 9's flags), new 52-week closing highs, and percentile-score
+moves across rank thresholds within an index (analytics.rank_trajectories).
+Every stock and session is scanned at once. Each stock's rows are stacked
+into a (rows x stocks) array, so rolling windows, crossings and window
+maxima are whole-array operations. The result is one table indexed by
+(date, entity_id), written to data/processed/rotation_signals.parquet.
+"""
+import argparse
+import os
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analytics.rank_trajectories import get_rank_cube, rank_cube
+from analytics.snapshot import HIGH_52W_DAYS, SMA_WINDOWS
+from data_access.constituent_history import get_membership_history, membership_version
+from data_access.price_store import PRICE_FILE, get_price_store, price_version
+from data_access.profiling import span
+from data_access.reference_data import DATA_DIR
+
+ROTATION_SIGNALS_FILE = DATA_DIR / "rotation_signals.parquet"
+
+SMA_CROSSES = tuple(zip(SMA_WINDOWS, SMA_WINDOWS[1:]))
+# Percentile-score levels whose crossing is a rank breakout or breakdown
+RANK_THRESHOLDS = (80, 50)
+RANK_SIGNAL_INDICES = ("IDX_NIFTY 500",)
+
+EVENTS = (
+    *(f"sma_{fast}_{direction}_{slow}" for fast, slow in SMA_CROSSES for direction in ("above", "below")),
+    "high_52w",
+    *(f"rank_{direction}_{p}" for p in RANK_THRESHOLDS for direction in ("above", "below")),
+)
+
+
+def _stacked(store, entity_ids):
+    """
+    (rows, valid): row k of column j is the position of entity j's k-th
+    price row, and valid marks the cells that exist.
+    """
+    starts, stops = store.bounds(entity_ids)
+    lengths = stops - starts
+    k = np.arange(lengths.max(initial=0))[:, None]
+    valid = k < lengths[None, :]
+    return np.where(valid, starts[None, :] + k, 0), valid
+
+
+def rolling_means(close, valid, windows=SMA_WINDOWS) -> dict:
+    """
+    Window -> mean of each stacked column's last n closes, NaN until n
+    closes exist or where one of them is missing, as compute_indicators
+    gives them.
+    """
+    present = valid & np.isfinite(close)
+    zero = np.zeros((1, close.shape[1]))
+    sums = np.vstack([zero, np.cumsum(np.where(present, close, 0.0), axis=0)])
+    gaps = np.vstack([zero, np.cumsum(valid & ~present, axis=0)])
+
+    out = {}
+    for n in windows:
+        mean = np.full(close.shape, np.nan)
+        if n <= len(close):
+            full = (gaps[n:] - gaps[:-n] == 0) & valid[n - 1:]
+            mean[n - 1:] = np.where(full, (sums[n:] - sums[:-n]) / n, np.nan)
+        out[n] = mean
+    return out
+
+
+def _crossings(above, defined):
+    """(up, down) masks of rows where `above` flips, with both rows defined."""
+    up = np.zeros(above.shape, dtype=bool)
+    down = np.zeros(above.shape, dtype=bool)
+    both = defined[1:] & defined[:-1]
+    up[1:] = both & above[1:] & ~above[:-1]
+    down[1:] = both & ~above[1:] & above[:-1]
+    return up, down
+
+
+def prior_window_max(close, days, valid, window_days: int = HIGH_52W_DAYS):
+    """
+    Highest close over the `window_days` calendar days before each stacked
+    cell (the window start included, the cell itself not); NaN when the
+    window holds no close. Padding cells must hold NaN closes.
+
+    Windows have a different number of rows per cell, so they are answered
+    from doubling range maxima: level l holds max(close[i:i + 2**l]) and a
+    window of length L is covered by two overlapping level floor(log2 L)
+    blocks. Only one level is held at a time.
+    """
+    n_rows, n_cols = close.shape
+    cols = np.broadcast_to(np.arange(n_cols), close.shape)
+
+    # Per column, the first row dated on or after each cell's window start;
+    # columns are searched together by offsetting their days apart, with
+    # padding cells keyed last in their column
+    days = np.where(valid, days - days[valid].min(initial=0), 0)
+    span = int(days.max(initial=0)) + window_days + 1
+    keys = np.where(valid, days + cols * span, (cols + 1) * span - 1).T.ravel()
+    lo = np.searchsorted(keys, (days - window_days + cols * span).T.ravel()).reshape(n_cols, n_rows).T
+    lo -= np.arange(n_cols) * n_rows
+    length = np.where(valid, np.arange(n_rows)[:, None] - lo, 0)
+
+    # Cells grouped by level, as flat positions into the C-ordered arrays
+    cells = np.flatnonzero(length > 0)
+    level = np.log2(length.ravel()[cells]).astype(np.int8)
+    order = np.argsort(level, kind="stable")
+    cells = cells[order]
+    bounds = np.r_[0, np.cumsum(np.bincount(level, minlength=1))]
+    first = lo.ravel()[cells] * n_cols + cells % n_cols
+
+    prior = np.full(close.size, np.nan)
+    block = np.array(close, dtype="float64")
+    for lv in range(len(bounds) - 1):
+        at = slice(bounds[lv], bounds[lv + 1])
+        flat = block.ravel()
+        prior[cells[at]] = np.fmax(flat[first[at]], flat[cells[at] - 2**lv * n_cols])
+        step = 2**lv
+        if step < n_rows:
+            block[:-step] = np.fmax(block[:-step], block[step:])
+    return prior.reshape(close.shape)
+
+
+def _events(mask, dates, entity_ids, event, value, index_id=None) -> pd.DataFrame:
+    ks, js = np.nonzero(mask)
+    return pd.DataFrame({
+        "date": dates[ks, js] if dates.ndim == 2 else dates[ks],
+        "entity_id": np.asarray(entity_ids, dtype=object)[js],
+        "event": event,
+        "value": value[ks, js],
+        "index_entity_id": index_id,
+    })
+
+
+def scan_price_signals(store, entity_ids=None) -> list:
+    """SMA crossover and 52-week-high event frames for a PriceStore's stocks."""
+    entity_ids = list(store.stock_ids if entity_ids is None else entity_ids)
+    if not entity_ids:
+        return []
+    rows, valid = _stacked(store, entity_ids)
+
+    close = np.where(valid, store.prices["close"].to_numpy("float64")[rows], np.nan)
+    dates = store.prices["date"].to_numpy("datetime64[ns]")[rows]
+
+    frames = []
+    smas = rolling_means(close, valid)
+    for fast, slow in SMA_CROSSES:
+        defined = ~np.isnan(smas[fast]) & ~np.isnan(smas[slow])
+        up, down = _crossings(smas[fast] > smas[slow], defined)
+        frames.append(_events(up, dates, entity_ids, f"sma_{fast}_above_{slow}", smas[fast]))
+        frames.append(_events(down, dates, entity_ids, f"sma_{fast}_below_{slow}", smas[fast]))
+
+    # New highs count once the stock has a full window of history behind it
+    days = dates.astype("datetime64[D]").astype(np.int64)
+    prior = prior_window_max(close, days, valid)
+    seasoned = days - days[0] >= HIGH_52W_DAYS
+    frames.append(_events(valid & seasoned & (close > prior), dates, entity_ids, "high_52w", close))
+    return frames
+
+
+def scan_rank_signals(cube, thresholds=RANK_THRESHOLDS) -> list:
+    """Event frames for percentile-score crossings of each threshold in a RankCube."""
+    score = cube.percentile_score
+    defined = ~np.isnan(score)
+    dates = cube.dates.to_numpy()
+
+    frames = []
+    for p in thresholds:
+        up, down = _crossings(score >= p, defined)
+        frames.append(_events(up, dates, cube.stock_ids, f"rank_above_{p}", score, cube.index_id))
+        frames.append(_events(down, dates, cube.stock_ids, f"rank_below_{p}", score, cube.index_id))
+    return frames
+
+
+def scan_signals(store, cubes=(), entity_ids=None) -> pd.DataFrame:
+    """
+    Every rotation-signal event, indexed by (date, entity_id) and sorted,
+    with the event name, the value that triggered it (the faster SMA, the
+    new high close, or the percentile score) and, for rank events, the
+    index ranked against.
+    """
+    with span("signal scan") as scan:
+        frames = scan_price_signals(store, entity_ids)
+        for cube in cubes:
+            frames += scan_rank_signals(cube)
+        scan.rows = sum(len(f) for f in frames)
+
+    if not frames:
+        frames = [pd.DataFrame({
+            "date": pd.Series(dtype="datetime64[ns]"),
+            "entity_id": pd.Series(dtype=object),
+            "event": pd.Series(dtype=object),
+            "value": pd.Series(dtype="float64"),
+            "index_entity_id": pd.Series(dtype=object),
+        })]
+    out = pd.concat(frames, ignore_index=True)
+    out["event"] = pd.Categorical(out["event"], categories=EVENTS)
+    out["index_entity_id"] = out["index_entity_id"].astype("string")
+    return out.set_index(["date", "entity_id"]).sort_index(kind="stable")
+
+
+def ranked_indices(store, index_ids) -> list:
+    """The index_ids with price history in `store`, the ones rank events can be scanned for."""
+    priced = set(store.index_ids)
+    return [i for i in index_ids if i in priced]
+
+
+@lru_cache(maxsize=2)
+def _cached_signals(path: Path, version: str, membership: str, index_ids: tuple) -> pd.DataFrame:
+    store = get_price_store(path)
+    return scan_signals(store, [get_rank_cube(i) for i in ranked_indices(store, index_ids)])
+
+
+def get_rotation_signals(index_ids=RANK_SIGNAL_INDICES, path: Path = PRICE_FILE) -> pd.DataFrame:
+    """
+    The process-wide event table, rescanned when a new price version is
+    published or membership is re-recorded.
+    """
+    path = Path(path)
+    return _cached_signals(path, price_version(path), membership_version(), tuple(index_ids))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--index", dest="indices", nargs="+", default=list(RANK_SIGNAL_INDICES))
+    parser.add_argument("--out", type=Path, default=ROTATION_SIGNALS_FILE)
+    args = parser.parse_args(argv)
+
+    store = get_price_store()
+    membership = get_membership_history()
+    cubes = [rank_cube(store, membership, i) for i in ranked_indices(store, args.indices)]
+
+    started = time.perf_counter()
+    events = scan_signals(store, cubes)
+    elapsed = time.perf_counter() - started
+
+    tmp_path = args.out.with_name("_" + args.out.name + ".tmp")
+    events.to_parquet(tmp_path)
+    os.replace(tmp_path, args.out)
+
+    print(
+        f"Wrote {len(events):,} events for {len(store.stock_ids):,} stocks "
+        f"({', '.join(f'{e} {n:,}' for e, n in events['event'].value_counts(sort=False).items())}) "
+        f"to {args.out}, scanned in {elapsed:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
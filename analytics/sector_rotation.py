@@ -0,0 +1,81 @@
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analytics.ranks import descending_ranks
+from analytics.returns import horizon_returns
+from data_access.price_matrix import PRICE_MATRIX_DIR, get_shared_store
+from data_access.price_store import PRICE_FILE, price_version
+from data_access.profiling import span
+from data_access.trading_calendar import HORIZONS, TradingCalendar
+
+# The Sectoral Momentum Matrix (page 5) ranks sector indices on their
+# trailing return per horizon. Here one horizon_returns call covers every
+# session of the calendar, and one sort ranks every (date, horizon) column
+# of the (dates x sectors x horizons) cube, so a reference date on the page
+# and each frame of its rotation playback is a slice of the cube.
+
+
+class SectorCube:
+    """
+    Return ranks of sector indices on every session, per horizon.
+    rank[d, s, h] is NaN where sector s lacks the history for horizon h on
+    date d; listed[d, s] marks the sectors with a close by date d, the rows
+    the page shows.
+    """
+
+    def __init__(self, dates, sector_ids, rank: np.ndarray, listed: np.ndarray, horizons=tuple(HORIZONS)):
+        self.dates = pd.DatetimeIndex(dates)
+        self.sector_ids = pd.Index(list(sector_ids))
+        self.horizons = tuple(horizons)
+        self.rank = rank
+        self.listed = listed
+
+    def row(self, ref_date) -> int:
+        """Position of the last session on or before ref_date, -1 if none."""
+        return int(self.dates.searchsorted(pd.Timestamp(ref_date), "right")) - 1
+
+    def rows(self, start=None, end=None, freq: str = None) -> np.ndarray:
+        """
+        Positions of the sessions between start and end, every one or only
+        the last of each week or month ("week_ends", "month_ends").
+        """
+        lo = 0 if start is None else self.dates.searchsorted(pd.Timestamp(start), "left")
+        hi = len(self.dates) if end is None else self.dates.searchsorted(pd.Timestamp(end), "right")
+        rows = np.arange(lo, hi)
+        if freq is not None:
+            ends = getattr(TradingCalendar(self.dates), freq)
+            rows = rows[self.dates[rows].isin(ends)]
+        return rows
+
+
+def sector_cube(store, sector_ids, horizons=tuple(HORIZONS), start=None) -> SectorCube:
+    """The SectorCube of sector_ids over the store's calendar, or from `start` on."""
+    sector_ids = sorted(sector_ids)
+    dates = store.asof.calendar.sessions
+    if start is not None:
+        dates = dates[dates >= pd.Timestamp(start)]
+    if dates.empty:
+        raise ValueError("no sessions to rank sectors on")
+
+    ids = np.asarray(sector_ids, dtype=object)
+    with span("sector cube", rows=len(dates) * len(sector_ids)):
+        returns = horizon_returns(store.asof, ids, dates, horizons)
+        listed = store.asof.rows(ids[None, :], dates.to_numpy()[:, None]) >= 0
+
+        # Ranks are small whole numbers, exact in float32
+        rank = descending_ranks(np.stack([returns[h] for h in horizons], axis=2), axis=1).astype("float32")
+    return SectorCube(dates, sector_ids, rank, listed, horizons)
+
+
+@lru_cache(maxsize=2)
+def _cached_cube(sector_ids: tuple, matrix_dir: Path, source: Path, version: str) -> SectorCube:
+    return sector_cube(get_shared_store(matrix_dir, source), sector_ids)
+
+
+def get_sector_cube(sector_ids, matrix_dir: Path = PRICE_MATRIX_DIR, source: Path = PRICE_FILE) -> SectorCube:
+    """The process-wide SectorCube, rebuilt when a new price version is published."""
+    source = Path(source)
+    return _cached_cube(tuple(sorted(sector_ids)), Path(matrix_dir), source, price_version(source))
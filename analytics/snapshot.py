@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+from analytics.returns import horizon_returns
+
+# Trading-calendar horizons used by the all-universe snapshot
+SNAPSHOT_HORIZONS = ("1M", "3M", "6M", "1Y")
+SMA_WINDOWS = (20, 50, 100, 200)
+HIGH_52W_DAYS = 365
+
+
+def _window(values, pos, start, n) -> np.ndarray:
+    """(entities x n) values ending at `pos`; NaN rows where history is short."""
+    idx = pos[:, None] - np.arange(n - 1, -1, -1)[None, :]
+    window = values[np.maximum(idx, 0)]
+    return np.where((pos - n + 1 >= start)[:, None], window, np.nan)
+
+
+def _range_max(values, lo, hi) -> np.ndarray:
+    """max(values[lo:hi]) per pair; ranges must be non-empty and ascending."""
+    bounds = np.column_stack([lo, hi]).ravel()
+    return np.fmax.reduceat(np.append(values, np.nan), bounds)[::2]
+
+
+def universe_snapshot(store, entity_ids, ref_date, indicators=None) -> pd.DataFrame:
+    """
+    Close, trailing returns, SMAs, SMA crossover flags and distance from the
+    52-week high for every entity with a close on `ref_date`.
+
+    Returns run from the last close on or before each calendar horizon
+    start and need history reaching back that far; SMAs need a full window.
+    Both are NaN otherwise.
+
+    `indicators` (sma_* and high_52w on ref_date, indexed by entity_id) is
+    used instead of the window scans when it covers every traded entity.
+    """
+    ref_date = pd.Timestamp(ref_date)
+
+    starts, stops = store.bounds(entity_ids)
+    order = np.argsort(starts, kind="stable")
+    ids = np.asarray(list(entity_ids), dtype=object)[order]
+    starts, stops = starts[order], stops[order]
+
+    pos = store.asof.rows(ids, ref_date.to_datetime64())
+    dates = store.prices["date"].to_numpy()
+    traded = (pos >= 0) & (dates[np.maximum(pos, 0)] == ref_date.to_datetime64())
+
+    ids, pos, starts = ids[traded], pos[traded], starts[traded]
+    # Compact stores hold float32 closes; compute in float64 either way
+    close_all = store.prices["close"].to_numpy()
+    close = close_all[pos].astype("float64")
+
+    out = {"entity_id": ids, "close": close}
+
+    # Every remaining entity has a close on ref_date, so nothing is dropped
+    returns = horizon_returns(store.asof, ids, [ref_date], SNAPSHOT_HORIZONS)
+    for label in SNAPSHOT_HORIZONS:
+        out[f"ret_{label}"] = returns[label][0]
+
+    stored = None
+    if indicators is not None and pd.Index(ids).isin(indicators.index).all():
+        stored = indicators.reindex(ids)
+
+    for n in SMA_WINDOWS:
+        if stored is not None:
+            out[f"sma_{n}"] = stored[f"sma_{n}"].to_numpy()
+        else:
+            out[f"sma_{n}"] = _window(close_all, pos, starts, n).mean(axis=1, dtype="float64")
+
+    for fast, slow in zip(SMA_WINDOWS, SMA_WINDOWS[1:]):
+        out[f"sma_{fast}_gt_{slow}"] = out[f"sma_{fast}"] > out[f"sma_{slow}"]
+
+    if stored is not None:
+        high = stored["high_52w"].to_numpy()
+    else:
+        window_start = (ref_date - pd.Timedelta(days=HIGH_52W_DAYS)).to_datetime64()
+        lo = store.asof.rows(ids, window_start, side="after")
+        high = _range_max(close_all, lo, pos + 1).astype("float64")
+    out["high_52w"] = high
+    out["pct_from_52w_high"] = (close - high) / high * 100
+
+    return pd.DataFrame(out)
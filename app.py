@@ -1,10 +1,18 @@
 import streamlit as st
 
+from data_access.price_matrix import matrix_available
+from data_access.price_store import warm_up
+
 st.set_page_config(
     page_title="Rank Trajectory Analytics (RTA)",
     layout="wide"
 )
 
+# Pages map the published price matrix when there is one; otherwise start
+# loading the shared price store while the landing page renders
+if not matrix_available():
+    warm_up()
+
 # -------------------------
 # Header
 # -------------------------
@@ -32,6 +40,21 @@ st.markdown(
   
   Stock-level relative strength analysis within NIFTY 50 using  
   3M, 6M, 1Y returns, relative ranks, average rank and percentile score.
+
+- 👉 **[Rank Trajectory Maps](./Rank_Trajectory_Maps)**
+  
+  Daily relative-strength rank trajectories of an index's stocks across  
+  its full history, per stock or as a map of the whole index.
+
+- 👉 **[Momentum Maturity Matrix](./Momentum_Maturity_Matrix)**
+  
+  Momentum stage of each stock in an index, from the slope and curvature  
+  of its rank trajectory.
+
+- 👉 **[Rotation Signals](./Rotation_Signals)**
+  
+  SMA crossovers, 52-week highs and rank breakouts across the universe  
+  and its full history.
 """
 )
 
@@ -41,6 +64,5 @@ st.markdown("---")
 # Footer / roadmap hint
 # -------------------------
 st.caption(
-    "More modules coming next: Rank Trajectory Maps, Momentum Maturity Matrix, "
-    "Rotation Signals, and AI-assisted insights."
+    "More modules coming next: AI-assisted insights."
 )
@@ -0,0 +1,531 @@
+"""
+Check the vectorized engines against the pages' original pandas logic.
+
+    python -m benchmarks.equivalence [--stocks 750] [--dates 12] [--data-dir DIR]
+
+Runs on a synthetic market (generated on first use) at a sample of
+sessions, and prints one line per check with the number of values
+compared, the largest difference and any NaN disagreement. Exits non-zero
+if any check fails. The reference implementations live in
+benchmarks.reference.
+"""
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analytics.daily_append import append_session
+from analytics.dashboards import page_sector_rank_matrix, page_sector_rank_snapshot
+from analytics.duckdb_engine import DuckDBEngine
+from analytics.indicators import build_indicators, compute_indicators, update_indicators
+from analytics.momentum_maturity import MATURITY_WINDOWS, rolling_trend
+from analytics.rank_history import add_percentile_score, index_rank_history
+from analytics.rank_trajectories import rank_cube
+from analytics.ranks import RANK_HORIZONS, relative_rank_matrix
+from analytics.rotation_signals import SMA_CROSSES, scan_price_signals
+from analytics.sector_rotation import sector_cube
+from analytics.returns import horizon_returns, trailing_returns
+from analytics.snapshot import HIGH_52W_DAYS, SMA_WINDOWS, SNAPSHOT_HORIZONS, universe_snapshot
+from benchmarks import reference
+from benchmarks.synthetic_market import (
+    BROAD_INDICES,
+    SECTOR_INDICES,
+    generate_market,
+    market_dir,
+    open_market,
+)
+from data_access.indicator_store import read_indicators
+from data_access.price_matrix import MatrixStore, PriceMatrix, build_price_matrix, get_shared_store
+from data_access.price_store import (
+    COMPACT_COLUMNS,
+    PriceStore,
+    compact_prices,
+    load_price_history,
+    read_prices,
+    write_price_history,
+)
+from data_access.trading_calendar import HORIZONS
+
+# Calendar offsets the old pages passed to calc_return per horizon label
+REFERENCE_OFFSETS = {
+    "1W": {"weeks": 1},
+    "1M": {"months": 1},
+    "3M": {"months": 3},
+    "6M": {"months": 6},
+    "1Y": {"months": 12},
+}
+RELATIVE_TOLERANCE = 1e-9
+# Compact stores round closes to float32 (relative error under 6e-8), which
+# moves percent returns by up to about 1e-5 points
+FLOAT32_TOLERANCE = 1e-4
+
+
+class Report:
+    def __init__(self):
+        self.rows = []
+
+    def compare(self, check: str, engine, expected, tolerance: float = RELATIVE_TOLERANCE):
+        engine = np.asarray(engine, dtype="float64").ravel()
+        expected = np.asarray(expected, dtype="float64").ravel()
+
+        nan_mismatch = int((np.isnan(engine) != np.isnan(expected)).sum())
+        both = ~np.isnan(engine) & ~np.isnan(expected)
+        diff = np.abs(engine[both] - expected[both])
+        scale = np.maximum(np.abs(expected[both]), 1.0)
+
+        max_diff = float(diff.max()) if diff.size else 0.0
+        ok = nan_mismatch == 0 and bool((diff <= tolerance * scale).all())
+        self.rows.append((check, len(engine), max_diff, nan_mismatch, ok))
+        print(
+            f"{'ok' if ok else 'FAIL':<5} {check:<44} n={len(engine):>8,}  "
+            f"max diff={max_diff:.2e}  NaN mismatch={nan_mismatch}",
+            flush=True,
+        )
+
+    @property
+    def ok(self) -> bool:
+        return all(row[-1] for row in self.rows)
+
+
+def _frame(store, entity_ids) -> pd.DataFrame:
+    """Plain object-ID price frame for the reference functions."""
+    df = store.select(entity_ids)
+    return df.assign(entity_id=df["entity_id"].astype(object)).reset_index(drop=True)
+
+
+def check_window_returns(report, store, index_ids, dates):
+    """Pages 1 and 2: first-to-last close inside each window."""
+    prices = _frame(store, index_ids)
+    engine, expected = [], []
+    for date in dates:
+        for label in HORIZONS:
+            ret = trailing_returns(store.asof, index_ids, date, label, start_side="after")
+            start = reference.target_start_date(date, label)
+            for index_id in index_ids:
+                ref = reference.window_return(prices[prices["entity_id"] == index_id], start, date)
+                engine.append(ret.get(index_id, np.nan))
+                expected.append(np.nan if ref is None else ref)
+    report.compare("p1/p2 window returns", engine, expected)
+
+
+def check_calc_returns(report, store, entity_ids, dates, check):
+    """Pages 4 to 7: last close on or before each end of the horizon."""
+    prices = _frame(store, entity_ids)
+    engine, expected = [], []
+    for date in dates:
+        for label, offset in REFERENCE_OFFSETS.items():
+            ret = trailing_returns(store.asof, entity_ids, date, label)
+            ref = reference.calc_return(prices, date, **offset)
+            engine.append(ret.reindex(entity_ids).to_numpy())
+            expected.append(ref.reindex(entity_ids).to_numpy())
+    report.compare(check, np.concatenate(engine), np.concatenate(expected))
+
+
+def check_return_kinds(report, store, entity_ids, dates):
+    """Log and annualized horizon returns against closes found with merge_asof."""
+    prices = _frame(store, entity_ids)[["entity_id", "date", "close"]].sort_values("date")
+    prices = prices.assign(entity_id=prices["entity_id"].astype(str), row_date=prices["date"])
+
+    def closes(query_dates):
+        queries = pd.DataFrame({
+            "entity_id": np.tile(np.asarray(entity_ids, dtype=str), len(query_dates)),
+            "date": np.repeat(pd.DatetimeIndex(query_dates), len(entity_ids)),
+        })
+        found = pd.merge_asof(queries.dropna().sort_values("date"), prices, on="date", by="entity_id")
+        return queries.merge(found, on=["entity_id", "date"], how="left")
+
+    end = closes(dates)
+    for kind in ("log", "annualized"):
+        engine, expected = [], []
+        for label in HORIZONS:
+            start = closes(store.asof.calendar.horizon_start(dates, label))
+            ratio = end["close"].to_numpy() / start["close"].to_numpy()
+            if kind == "log":
+                ref = np.log(ratio) * 100
+            else:
+                days = (end["row_date"] - start["row_date"]).dt.days.to_numpy()
+                ref = (ratio ** (365.25 / days) - 1) * 100
+            engine.append(horizon_returns(store.asof, entity_ids, dates, [label], kind=kind)[label].ravel())
+            expected.append(ref)
+        report.compare(f"{kind} horizon returns", np.concatenate(engine), np.concatenate(expected))
+
+
+def check_ranks(report, store, membership, index_id, dates):
+    """Pages 4, 6 and 7: relative returns and ranks against an index."""
+    stocks = membership.members_on(index_id, dates[-1])
+    prices = _frame(store, [index_id] + stocks)
+
+    engine = relative_rank_matrix(store.asof, index_id, stocks, dates)
+    expected = pd.concat(
+        {date: reference.relative_rank_frame(prices, index_id, stocks, date) for date in dates},
+        names=["date"],
+    )
+    columns = [f"{kind}_{h}" for h in RANK_HORIZONS for kind in ("ret", "rel", "rank")] + ["avg_rank"]
+    report.compare(
+        f"p6/p7 ranks vs {index_id.removeprefix('IDX_')}",
+        engine[columns].to_numpy(),
+        expected.reindex(engine.index)[columns].to_numpy(),
+    )
+
+
+def check_rank_cube(report, store, membership, index_id, dates):
+    """Page 10: the full-history rank cube against the point-in-time rank matrix."""
+    cube = rank_cube(store, membership, index_id)
+    dates = cube.dates[cube.dates.isin(dates)]
+    rows = cube.dates.get_indexer(dates)
+
+    stock_ids = list(cube.stock_ids)
+    mask = membership.member_mask(index_id, stock_ids, dates)
+    expected = add_percentile_score(relative_rank_matrix(store.asof, index_id, stock_ids, dates, members=mask))
+    found = np.column_stack([
+        cube.rank[rows].reshape(-1, len(cube.horizons)),
+        cube.avg_rank[rows].ravel(),
+        cube.percentile_score[rows].ravel(),
+    ])
+    columns = [f"rank_{h}" for h in cube.horizons] + ["avg_rank", "percentile_score"]
+    report.compare(f"p10 {index_id.removeprefix('IDX_')} rank cube", found, expected[columns].to_numpy())
+    check_maturity_fits(report, cube, rows)
+
+
+def check_sector_cube(report, store, sector_ids, dates):
+    """Page 5: rank matrices sliced from the sector cube against the per-date page."""
+    cube = sector_cube(store, sector_ids)
+    found, expected = [], []
+    for date in dates:
+        snapshot = page_sector_rank_snapshot(cube, date)
+        matrix = page_sector_rank_matrix(store, date, sector_ids)
+        if not snapshot.index.equals(matrix.index):
+            found.append([np.nan])
+            expected.append([0.0])
+            continue
+        found.append(snapshot.to_numpy().ravel())
+        expected.append(matrix.to_numpy().ravel())
+    report.compare("p5 sector rank cube", np.concatenate(found), np.concatenate(expected))
+
+
+def check_maturity_fits(report, cube, rows):
+    """Page 11: rolling rank trends against per-stock np.polyfit."""
+    for window in MATURITY_WINDOWS:
+        slope, curvature = rolling_trend(cube.avg_rank, window)
+        found, expected = [], []
+        for row in rows[rows >= window - 1]:
+            block = cube.avg_rank[row + 1 - window:row + 1]
+            for col in np.flatnonzero(~np.isnan(block).any(axis=0)):
+                t = np.arange(window)
+                found.append((slope[row, col], curvature[row, col]))
+                expected.append((np.polyfit(t, block[:, col], 1)[0], 2 * np.polyfit(t, block[:, col], 2)[0]))
+        report.compare(f"p11 rank trend fits ({window} sessions)", found, expected)
+
+
+def check_rotation_signals(report, store):
+    """Page 12: scanned price events against grouped pandas rolling windows."""
+    prices = store.prices[store.codes.is_stock[store.row_codes]].reset_index(drop=True)
+    prices = prices.assign(entity_id=prices["entity_id"].astype(str))
+    smas = compute_indicators(prices)
+    groups = prices.groupby("entity_id", sort=False)
+
+    expected = []
+    continued = prices["entity_id"].eq(prices["entity_id"].shift())
+    for fast, slow in SMA_CROSSES:
+        above = smas[f"sma_{fast}"] > smas[f"sma_{slow}"]
+        defined = smas[f"sma_{fast}"].notna() & smas[f"sma_{slow}"].notna()
+        both = defined & defined.shift(fill_value=False) & continued
+        was_above = above.shift(fill_value=False)
+        expected.append(prices.loc[both & above & ~was_above, ["date", "entity_id"]].assign(event=f"sma_{fast}_above_{slow}"))
+        expected.append(prices.loc[both & ~above & was_above, ["date", "entity_id"]].assign(event=f"sma_{fast}_below_{slow}"))
+
+    prior = groups.rolling(f"{HIGH_52W_DAYS}D", on="date", closed="left")["close"].max().to_numpy()
+    seasoned = (prices["date"] - groups["date"].transform("min")).dt.days >= HIGH_52W_DAYS
+    expected.append(prices.loc[seasoned & (prices["close"] > prior), ["date", "entity_id"]].assign(event="high_52w"))
+
+    keys = ["date", "entity_id", "event"]
+    found = pd.concat(scan_price_signals(store))[keys].assign(found=1.0)
+    expected = pd.concat(expected)[keys].assign(expected=1.0)
+    both = found.merge(expected, on=keys, how="outer").fillna(0.0)
+    report.compare("p12 rotation signal events", both["found"], both["expected"])
+
+
+def check_snapshot(report, store, stock_ids, dates):
+    """Page 9: window scans and stored indicators against per-stock pandas."""
+    prices = _frame(store, stock_ids)
+    groups = dict(tuple(prices.groupby("entity_id", sort=False)))
+    indicators = compute_indicators(_frame(store, stock_ids))
+
+    sma, high, stored_sma, stored_high, ret, ret_ref = [], [], [], [], [], []
+    for date in dates:
+        snap = universe_snapshot(store, stock_ids, date).set_index("entity_id")
+        on_date = indicators[indicators["date"] == date].set_index("entity_id")
+        stored = universe_snapshot(store, stock_ids, date, indicators=on_date).set_index("entity_id")
+
+        for entity_id in snap.index:
+            g = groups[entity_id]
+            for n in SMA_WINDOWS:
+                expected = reference.sma(g, date, n)
+                sma.append((snap.at[entity_id, f"sma_{n}"], expected))
+                stored_sma.append((stored.at[entity_id, f"sma_{n}"], expected))
+            expected = reference.high_52w(g, date)
+            high.append((snap.at[entity_id, "high_52w"], expected))
+            stored_high.append((stored.at[entity_id, "high_52w"], expected))
+
+        # Snapshot returns use the trading-calendar horizons of pages 4 to 7
+        for label in SNAPSHOT_HORIZONS:
+            expected = reference.calc_return(prices, date, **REFERENCE_OFFSETS[label])
+            ret.append(snap[f"ret_{label}"].to_numpy())
+            ret_ref.append(expected.reindex(snap.index).to_numpy())
+
+    report.compare("p9 SMAs (window scan)", *zip(*sma))
+    report.compare("p9 SMAs (stored indicators)", *zip(*stored_sma))
+    report.compare(f"p9 {HIGH_52W_DAYS}-day high (window scan)", *zip(*high))
+    report.compare(f"p9 {HIGH_52W_DAYS}-day high (stored indicators)", *zip(*stored_high))
+    report.compare("p9 trailing returns", np.concatenate(ret), np.concatenate(ret_ref))
+
+
+def check_incremental_indicators(report, store, stock_ids, cut):
+    """Indicators appended session by session equal a full rebuild."""
+    prices = _frame(store, stock_ids)
+    full = PriceStore(prices, store.codes)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / "indicators"
+        build_indicators(PriceStore(prices[prices["date"] < cut].reset_index(drop=True), store.codes), out)
+        update_indicators(full, out)
+        stored = read_indicators(path=out)
+
+    expected = compute_indicators(full.prices)
+    columns = [f"sma_{n}" for n in SMA_WINDOWS] + ["high_52w"]
+    same_keys = (
+        len(stored) == len(expected)
+        and (stored["entity_id"].astype(object).to_numpy() == expected["entity_id"].astype(object).to_numpy()).all()
+        and (stored["date"].to_numpy() == expected["date"].to_numpy()).all()
+    )
+    if not same_keys:
+        report.rows.append(("p8 incremental indicators", len(stored), np.nan, 0, False))
+        print(f"FAIL  p8 incremental indicators: rows differ ({len(stored):,} vs {len(expected):,})")
+        return
+    report.compare("p8 incremental indicators", stored[columns].to_numpy(), expected[columns].to_numpy())
+
+
+def check_nearest_dates(report, store, entity_ids, dates):
+    """Page 3: the last trading date on or before a target."""
+    prices = _frame(store, entity_ids)
+    found, _ = store.asof.lookup(np.asarray(entity_ids, dtype=object)[None, :], dates.to_numpy()[:, None])
+
+    expected = [
+        reference.nearest_trading_date(prices, entity_id, date)
+        for date in dates
+        for entity_id in entity_ids
+    ]
+    report.compare("p3 nearest trading date", _date_values(found.ravel()), _date_values(expected))
+
+
+def check_price_matrix(report, store, dates):
+    """Pages 1-8 on the mapped matrix: as-of lookups and histories match the row store."""
+    with tempfile.TemporaryDirectory() as tmp:
+        build_price_matrix(store, Path(tmp), source=Path(tmp) / "none")
+        mapped = MatrixStore(PriceMatrix(Path(tmp)), store.codes)
+
+        entity_ids = np.asarray(store.entity_ids + ["STK_UNKNOWN"], dtype=object)[None, :]
+        for side in ("before", "after"):
+            for column in ("close", "volume"):
+                found, values = mapped.asof.lookup(entity_ids, dates.to_numpy()[:, None], column, side)
+                expected_found, expected = store.asof.lookup(entity_ids, dates.to_numpy()[:, None], column, side)
+                report.compare(f"matrix as-of {column} ({side})", values, expected)
+            report.compare(f"matrix as-of dates ({side})", _date_values(found.ravel()), _date_values(expected_found.ravel()))
+
+        engine, expected = [], []
+        for entity_id in store.entity_ids[:: max(1, len(store.entity_ids) // 50)]:
+            engine.append(mapped.history(entity_id)[["close", "volume"]].to_numpy())
+            expected.append(store.history(entity_id)[["close", "volume"]].to_numpy())
+        report.compare("matrix histories", np.concatenate(engine), np.concatenate(expected))
+
+
+def check_read_prices(report, store, path, entity_ids, dates):
+    """Pushed-down parquet reads return exactly the filtered store rows."""
+    prices = _frame(store, entity_ids)
+    start, end = dates[0], dates[-1]
+
+    read = read_prices(entity_ids, start=start, end=end, columns=["close"], path=path)
+    expected = prices[(prices["date"] >= start) & (prices["date"] <= end)]
+    report.compare("pushdown entity + date read", read["close"], expected["close"])
+    report.compare("pushdown read dates", _date_values(read["date"]), _date_values(expected["date"]))
+
+    indices = read_prices(entity_type="INDEX", columns=["close"], path=path)
+    report.compare("pushdown entity type read", indices["close"], store.select(store.index_ids)["close"])
+
+
+def check_compact_store(report, store, path, entity_ids, dates):
+    """The compact store gives the full store's returns and snapshot to float32 precision."""
+    prices, constants = compact_prices(load_price_history(path, COMPACT_COLUMNS))
+    compact = PriceStore(prices, store.codes, constants)
+    ids = np.asarray(list(entity_ids), dtype=object)
+
+    found, expected = [], []
+    for date in dates:
+        for horizon in HORIZONS:
+            found.append(trailing_returns(compact.asof, ids, date, horizon))
+            expected.append(trailing_returns(store.asof, ids, date, horizon))
+    report.compare("compact store returns", pd.concat(found), pd.concat(expected), FLOAT32_TOLERANCE)
+
+    stocks = [i for i in ids if i in set(store.stock_ids)]
+    found = pd.concat([universe_snapshot(compact, stocks, date) for date in dates])
+    expected = pd.concat([universe_snapshot(store, stocks, date) for date in dates])
+    columns = ["close"] + [f"sma_{n}" for n in SMA_WINDOWS] + ["high_52w", "pct_from_52w_high"]
+    report.compare("compact store snapshot", found[columns].to_numpy(), expected[columns].to_numpy(), FLOAT32_TOLERANCE)
+
+
+def check_duckdb(report, store, membership, path, entity_ids, index_id, dates):
+    """The DuckDB backend's returns and point-in-time ranks match the as-of engines."""
+    engine = DuckDBEngine(path)
+    entity_ids = list(entity_ids) + ["STK_UNKNOWN"]
+
+    for side in ("before", "after"):
+        found, expected = [], []
+        for date in dates:
+            for horizon in HORIZONS:
+                found.append(engine.trailing_returns(entity_ids, date, horizon, start_side=side))
+                expected.append(trailing_returns(store.asof, entity_ids, date, horizon, start_side=side))
+        report.compare(f"duckdb trailing returns ({side})", pd.concat(found), pd.concat(expected))
+
+    members = membership.ever_members(index_id, dates[0], dates[-1])
+    mask = membership.member_mask(index_id, members, dates)
+    found = engine.relative_rank_matrix(index_id, members, dates, members=mask)
+    expected = relative_rank_matrix(store.asof, index_id, members, dates, members=mask)
+    report.compare(f"duckdb {index_id.removeprefix('IDX_')} ranks", found.to_numpy(), expected.to_numpy())
+
+
+def check_daily_append(report, store, membership, entity_ids, n_sessions: int = 70):
+    """
+    Appending the last sessions one by one gives the same lookups,
+    indicators and ranks as a store built with them. More than a quarter
+    of sessions is appended, so 3M starts fall among the appended rows,
+    and one NIFTY 50 stock halts for a stretch of them and for the last
+    few, so its lookups on those days fall back to earlier appended rows.
+    """
+    prices = store.prices.assign(entity_id=store.prices["entity_id"].astype(str))
+    cut = store.dates[-n_sessions]
+
+    # The shared store takes its codes from the repo's entity_master, so
+    # only entities already in the base build are known to the appends
+    listed = prices.loc[prices["date"] < cut, "entity_id"].unique()
+    prices = prices[prices["entity_id"].isin(listed)]
+
+    halted = sorted(membership.members_on("IDX_NIFTY 50", store.dates[-1]))[0]
+    halt_dates = store.dates[-n_sessions // 2:-n_sessions // 2 + 5].append(store.dates[-3:])
+    prices = prices[~((prices["entity_id"] == halted) & prices["date"].isin(halt_dates))].reset_index(drop=True)
+    store = PriceStore(prices, store.codes)
+    entity_ids = [*entity_ids, halted]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        path = tmp / "price_history.parquet"
+        write_price_history(prices[prices["date"] < cut], path)
+        base = PriceStore(load_price_history(path), store.codes)
+        build_price_matrix(base, tmp / "price_matrix", path)
+        build_indicators(base, tmp / "indicators", path)
+
+        appended = [
+            append_session(day, path, tmp / "price_matrix", tmp / "indicators", tmp / "rank_history", membership)
+            for _, day in prices[prices["date"] >= cut].groupby("date")
+        ]
+        report.compare("append: reloaded closes", load_price_history(path)["close"], prices["close"])
+
+        # The matrix was built before the appends, which are overlaid on it
+        shared = get_shared_store(tmp / "price_matrix", path)
+        ids = np.asarray(list(entity_ids), dtype=object)[None, :]
+        dates = store.dates[-300:].to_numpy()[:, None]
+        for side in ("before", "after"):
+            report.compare(
+                f"append: overlaid as-of closes ({side})",
+                shared.asof.lookup(ids, dates, side=side)[1],
+                store.asof.lookup(ids, dates, side=side)[1],
+            )
+
+    expected = compute_indicators(store.prices)
+    columns = [f"sma_{n}" for n in SMA_WINDOWS] + ["high_52w"]
+    found = pd.concat([s["indicators"] for s in appended]).set_index(["entity_id", "date"])
+    expected = expected.set_index([expected["entity_id"].astype(str), "date"]).loc[found.index]
+    report.compare("append: indicators", found[columns].to_numpy(), expected[columns].to_numpy())
+
+    found, expected = [], []
+    for summary in appended:
+        for index_id, df in summary["ranks"].items():
+            dates = store.history(index_id)["date"]
+            stock_ids = membership.ever_members(index_id, dates.iloc[0], summary["date"])
+            mask = membership.member_mask(index_id, stock_ids, [summary["date"]])
+            found.append(df.drop(columns=["date", "entity_id"]).to_numpy())
+            expected.append(
+                index_rank_history(store.asof, index_id, stock_ids, [summary["date"]], mask)
+                .drop(columns=["date", "entity_id"]).to_numpy()
+            )
+    report.compare("append: session ranks", np.concatenate(found), np.concatenate(expected))
+
+
+def _date_values(dates) -> np.ndarray:
+    dates = pd.DatetimeIndex([pd.NaT if d is None else d for d in dates])
+    return np.where(dates.isna(), np.nan, dates.asi8.astype("float64"))
+
+
+def run_checks(data_dir: Path, n_dates: int, seed: int) -> Report:
+    market = open_market(data_dir)
+    store, membership = market["store"], market["membership"]
+    rng = np.random.default_rng(seed)
+
+    # Sessions across the whole history, so short-history edges are covered
+    sessions = store.dates
+    dates = pd.DatetimeIndex(np.sort(rng.choice(sessions[1:], n_dates, replace=False))).append(sessions[-1:])
+    # Off-calendar dates (weekends, holidays) for the as-of lookup
+    calendar_days = pd.date_range(sessions[0] - pd.Timedelta(days=3), sessions[-1])
+    lookup_dates = pd.DatetimeIndex(np.sort(rng.choice(calendar_days, n_dates, replace=False)))
+
+    stocks = sorted(rng.choice(store.stock_ids, min(40, len(store.stock_ids)), replace=False))
+    indices = [i for i in list(BROAD_INDICES) + SECTOR_INDICES if i in store.asof.entities]
+    sector = max(
+        (i for i in SECTOR_INDICES if i in store.asof.entities),
+        key=lambda i: len(membership.members_on(i, sessions[-1])),
+    )
+
+    report = Report()
+    check_window_returns(report, store, indices, dates)
+    check_calc_returns(report, store, indices, dates, "p5 index returns")
+    check_calc_returns(report, store, stocks, dates, "p4 stock returns")
+    check_return_kinds(report, store, indices + stocks, dates)
+    check_ranks(report, store, membership, "IDX_NIFTY 50", dates)
+    check_ranks(report, store, membership, sector, dates)
+    check_sector_cube(report, store, indices, lookup_dates.append(dates))
+    check_rank_cube(report, store, membership, "IDX_NIFTY 500", dates)
+    check_rotation_signals(report, store)
+    check_nearest_dates(report, store, indices[:3] + stocks[:10], lookup_dates)
+    check_snapshot(report, store, stocks, dates)
+    check_incremental_indicators(report, store, stocks[:10], sessions[-60])
+    check_price_matrix(report, store, lookup_dates.append(dates))
+    check_read_prices(report, store, data_dir / "price_history.parquet", stocks, dates)
+    check_compact_store(report, store, data_dir / "price_history.parquet", indices + stocks, dates)
+    check_duckdb(report, store, membership, data_dir / "price_history.parquet", indices + stocks, sector, dates)
+    check_daily_append(report, store, membership, indices + stocks)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stocks", type=int, default=750)
+    parser.add_argument("--years", type=int, default=20)
+    parser.add_argument("--dates", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--data-dir", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    data_dir = args.data_dir or market_dir(args.stocks, args.years, args.seed)
+    if not (data_dir / "price_history.parquet").exists():
+        generate_market(args.stocks, args.years, args.seed, data_dir)
+
+    report = run_checks(data_dir, args.dates, args.seed)
+    passed = sum(row[-1] for row in report.rows)
+    print(f"{passed}/{len(report.rows)} checks passed")
+    sys.exit(0 if report.ok else 1)
+
+
+if __name__ == "__main__":
+    main()
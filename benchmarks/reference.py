@@ -0,0 +1,103 @@
+"""
+The pages' original pandas logic, kept as the reference the engines are
+checked against. Deliberately slow; do not optimize.
+"""
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+
+def target_start_date(ref_date, period):
+    """Pages 1 and 2."""
+    if period == "1W":
+        return ref_date - timedelta(weeks=1)
+    if period == "1M":
+        return ref_date - pd.DateOffset(months=1)
+    if period == "3M":
+        return ref_date - pd.DateOffset(months=3)
+    if period == "6M":
+        return ref_date - pd.DateOffset(months=6)
+    if period == "1Y":
+        return ref_date - pd.DateOffset(years=1)
+
+
+def window_return(df, window_start, window_end):
+    """Pages 1 and 2: first to last close inside the window."""
+    df_window = df[
+        (df["date"] >= window_start) &
+        (df["date"] <= window_end)
+    ].sort_values("date")
+
+    if len(df_window) < 2:
+        return None
+
+    start_price = df_window.iloc[0]["close"]
+    end_price = df_window.iloc[-1]["close"]
+
+    return (end_price / start_price - 1) * 100
+
+
+def calc_return(df, end_date, months=0, weeks=0):
+    """Pages 4 to 7: last close on or before each end, per entity."""
+    start_date = end_date - pd.DateOffset(months=months, weeks=weeks)
+
+    px_end = (
+        df[df["date"] <= end_date]
+        .sort_values("date")
+        .groupby("entity_id")
+        .tail(1)
+        .set_index("entity_id")["close"]
+    )
+    px_start = (
+        df[df["date"] <= start_date]
+        .sort_values("date")
+        .groupby("entity_id")
+        .tail(1)
+        .set_index("entity_id")["close"]
+    )
+    return (px_end / px_start - 1) * 100
+
+
+def nearest_trading_date(df, entity_id, target_date):
+    """Page 3."""
+    dates = df.loc[df["entity_id"] == entity_id, "date"]
+    dates = dates[dates <= target_date]
+    return dates.max() if not dates.empty else None
+
+
+def relative_rank_frame(price, index_id, stocks, ref_date):
+    """Pages 4, 6 and 7: returns, relative returns and ranks on one date."""
+    idx_df = price[price["entity_id"] == index_id]
+    stk_df = price[price["entity_id"].isin(stocks)]
+
+    out = pd.DataFrame(index=pd.Index(stocks, name="entity_id"))
+    ranks = []
+    for label, months in {"3M": 3, "6M": 6, "1Y": 12}.items():
+        idx_ret = calc_return(idx_df, ref_date, months).iloc[0]
+        out[f"ret_{label}"] = calc_return(stk_df, ref_date, months)
+        out[f"rel_{label}"] = out[f"ret_{label}"] - idx_ret
+        out[f"rank_{label}"] = out[f"rel_{label}"].rank(ascending=False, method="min")
+        ranks.append(f"rank_{label}")
+
+    out["avg_rank"] = out[ranks].mean(axis=1, skipna=True)
+    return out
+
+
+def sma(g, ref_date, n):
+    """Page 9."""
+    d = g[g["date"] <= ref_date].sort_values("date").tail(n)
+    if len(d) < n:
+        return np.nan
+    return d["close"].mean()
+
+
+def high_52w(g, ref_date):
+    """Page 9."""
+    d = g[
+        (g["date"] <= ref_date) &
+        (g["date"] >= ref_date - pd.Timedelta(days=365))
+    ]
+    if d.empty:
+        return np.nan
+    return d["close"].max()
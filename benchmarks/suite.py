@@ -0,0 +1,200 @@
+"""
+Time the compute paths behind pages 1-12 on synthetic markets.
+
+    python -m benchmarks.suite --sizes 750 5000 20000 [--years 20] [--duckdb] [--json out.json]
+
+Each size is generated under data/synthetic/ on first use (see
+benchmarks.synthetic_market) and reused afterwards. Steps call the same
+engines the pages call, without Streamlit, and report the best of
+--repeat runs. Store-backed reads are skipped so every run measures the
+compute path. Pages 1-8, 10 and 11 are timed again on the memory-mapped
+price matrix, which is built next to the market on first use, and with
+--duckdb pages 1-7 are timed on the DuckDB query backend
+(analytics.duckdb_engine).
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+from analytics.duckdb_engine import DuckDBEngine
+from analytics.indicators import compute_indicators
+from analytics.momentum_maturity import maturity_stages
+from analytics.rank_trajectories import rank_cube
+from analytics.rotation_signals import scan_signals
+from analytics.sector_rotation import sector_cube
+from analytics.ranks import relative_rank_matrix
+from analytics.returns import trailing_returns
+from analytics.snapshot import universe_snapshot
+from benchmarks.synthetic_market import (
+    BROAD_INDICES,
+    SECTOR_INDICES,
+    generate_market,
+    market_dir,
+    open_market,
+)
+from data_access.price_matrix import MatrixStore, PriceMatrix, build_price_matrix, matrix_available
+from data_access.trading_calendar import HORIZONS, TradingCalendar
+
+RANK_WEEKS = 104
+
+
+def _best(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def page_steps(store, membership, engine=None) -> dict:
+    """
+    Step name -> zero-argument callable, one or more per page. With a
+    DuckDBEngine, the return and rank steps of pages 1-7 run on it instead.
+    """
+    asof = store.asof
+    ref = store.max_date
+    stocks = store.stock_ids
+
+    broad = [i for i in BROAD_INDICES if i in asof.entities]
+    sectors = [i for i in SECTOR_INDICES if i in asof.entities]
+    largest_sector = max(sectors, key=lambda i: len(membership.members_on(i, ref)))
+
+    def trailing(ids, end, horizon, side="before"):
+        if engine is not None:
+            return engine.trailing_returns(ids, end, horizon, start_side=side)
+        return trailing_returns(asof, ids, end, horizon, start_side=side)
+
+    def rank_matrix(index_id, ids, dates, members=None):
+        if engine is not None:
+            return engine.relative_rank_matrix(index_id, ids, dates, members=members)
+        return relative_rank_matrix(asof, index_id, ids, dates, members=members)
+
+    def returns(ids, side):
+        return lambda: [trailing(ids, ref, h, side) for h in HORIZONS]
+
+    def ranks_on(index_id):
+        return lambda: rank_matrix(index_id, membership.members_on(index_id, ref), [ref])
+
+    def weekly_ranks(index_id):
+        def run():
+            week_ends = TradingCalendar(store.history(index_id)["date"]).week_ends[-RANK_WEEKS:]
+            members = membership.ever_members(index_id, week_ends[0], week_ends[-1])
+            mask = membership.member_mask(index_id, members, week_ends)
+            return rank_matrix(index_id, members, week_ends, members=mask)
+        return run
+
+    cubes = {}
+
+    def maturity(index_id):
+        def run():
+            # The page reuses a cached cube, so only the first run builds it
+            if index_id not in cubes:
+                cubes[index_id] = rank_cube(store, membership, index_id)
+            return maturity_stages(cubes[index_id])
+        return run
+
+    def page4():
+        members = membership.members_on("IDX_NIFTY 500", ref)
+        rank_matrix("IDX_NIFTY 500", members, [ref])
+        trailing(members, ref, "1M")
+
+    steps = {
+        "p1 benchmark index returns": returns(broad, "after"),
+        "p2 sector returns": returns(sectors, "after"),
+        "p3 NIFTY 50 ranks": ranks_on("IDX_NIFTY 50"),
+        "p4 NIFTY 500 ranks": page4,
+        "p5 sector return matrix": returns(sectors, "before"),
+        f"p6 NIFTY 50 ranks x {RANK_WEEKS} weeks": weekly_ranks("IDX_NIFTY 50"),
+        f"p7 {largest_sector.removeprefix('IDX_')} ranks x {RANK_WEEKS} weeks": weekly_ranks(largest_sector),
+        "p8 one-stock SMAs": lambda: compute_indicators(store.history(stocks[0])),
+        "p10 NIFTY 500 rank cube": lambda: rank_cube(store, membership, "IDX_NIFTY 500"),
+        "p11 NIFTY 500 maturity stages": maturity("IDX_NIFTY 500"),
+        "p5 sector rank cube, full history": lambda: sector_cube(store, sectors),
+    }
+    if engine is not None:
+        # DuckDB serves the return and rank steps of pages 1-7
+        return dict(list(steps.items())[:7])
+    # The snapshot and signal scans read price rows, which the matrix does not keep
+    if not isinstance(store, MatrixStore):
+        steps["p9 universe snapshot"] = lambda: universe_snapshot(store, stocks, ref)
+        steps["p12 rotation signals, full history"] = lambda: scan_signals(
+            store, [cubes.get("IDX_NIFTY 500") or rank_cube(store, membership, "IDX_NIFTY 500")]
+        )
+    return steps
+
+
+def run_size(n_stocks: int, years: int, seed: int, repeat: int, with_duckdb: bool = False) -> list:
+    data_dir = market_dir(n_stocks, years, seed)
+    if not (data_dir / "price_history.parquet").exists():
+        generate_market(n_stocks, years, seed, data_dir)
+
+    results = []
+
+    def record(step, seconds):
+        results.append({"stocks": n_stocks, "step": step, "seconds": seconds})
+        print(f"{n_stocks:>7,}  {step:<46} {seconds * 1000:>10.1f} ms", flush=True)
+
+    started = time.perf_counter()
+    market = open_market(data_dir)
+    record("load price store", time.perf_counter() - started)
+
+    store, membership = market["store"], market["membership"]
+    print(f"{n_stocks:>7,}  {len(store.prices):,} rows, {len(store.dates):,} days", flush=True)
+
+    started = time.perf_counter()
+    store.asof
+    record("build as-of index", time.perf_counter() - started)
+
+    for step, fn in page_steps(store, membership).items():
+        fn()  # warm caches shared across reruns, as a live server would
+        record(step, _best(fn, repeat))
+
+    matrix_dir = data_dir / "price_matrix"
+    if not matrix_available(matrix_dir, data_dir / "price_history.parquet"):
+        build_price_matrix(store, matrix_dir, data_dir / "price_history.parquet")
+
+    started = time.perf_counter()
+    mapped = MatrixStore(PriceMatrix(matrix_dir), store.codes)
+    mapped.asof
+    record("open price matrix", time.perf_counter() - started)
+
+    for step, fn in page_steps(mapped, membership).items():
+        fn()
+        record(f"{step} [matrix]", _best(fn, repeat))
+
+    if not with_duckdb:
+        return results
+
+    started = time.perf_counter()
+    engine = DuckDBEngine(data_dir / "price_history.parquet")
+    record("load DuckDB engine", time.perf_counter() - started)
+
+    for step, fn in page_steps(store, membership, engine).items():
+        fn()
+        record(f"{step} [duckdb]", _best(fn, repeat))
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[750, 5000])
+    parser.add_argument("--years", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", type=Path, default=None)
+    parser.add_argument("--duckdb", action="store_true", help="also time pages 1-7 on the DuckDB backend")
+    args = parser.parse_args(argv)
+
+    results = []
+    for n_stocks in args.sizes:
+        results += run_size(n_stocks, args.years, args.seed, args.repeat, args.duckdb)
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+Generate a deterministic synthetic market in the data/processed layout.
+
+    python -m benchmarks.synthetic_market --stocks 5000 --years 20 [--out DIR]
+
+Writes price_history.parquet (sorted by entity_id, date, tz-naive dates,
+in the store's row-group layout),
+entity_master.parquet and index_constituents_map.parquet. The indices use
+the real NIFTY IDs so every page finds what it expects. Stocks follow a
+market + sector + idiosyncratic return model, some list part-way through,
+and each index level is the equal-weighted return of its listed members.
+The same arguments always produce the same files.
+"""
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from data_access.constituent_history import MembershipHistory, load_membership_spells
+from data_access.entity_codes import EntityCodes
+from data_access.price_store import (
+    PRICE_ROW_GROUP,
+    PRICE_SORT_COLUMNS,
+    PriceStore,
+    load_price_history,
+)
+
+SYNTHETIC_DIR = Path("data/synthetic")
+END_DATE = pd.Timestamp("2025-12-31")
+CHUNK_STOCKS = 256
+
+# Broad indices as (first, stop) slices of stocks ranked by size
+BROAD_INDICES = {
+    "IDX_NIFTY 50": (0, 50),
+    "IDX_NIFTY NEXT 50": (50, 100),
+    "IDX_NIFTY 100": (0, 100),
+    "IDX_NIFTY 200": (0, 200),
+    "IDX_NIFTY 500": (0, 500),
+    "IDX_NIFTY MIDCAP 150": (100, 250),
+    "IDX_NIFTY MIDCAP 100": (100, 200),
+    "IDX_NIFTY MIDCAP 50": (100, 150),
+    "IDX_NIFTY SMLCAP 250": (250, 500),
+    "IDX_NIFTY SMLCAP 100": (250, 350),
+    "IDX_NIFTY SMLCAP 50": (250, 300),
+    "IDX_NIFTY TOTAL MKT": (0, None),
+}
+# Sector indices hold the sector's stocks among the largest 500
+SECTOR_INDICES = [
+    "IDX_NIFTY AUTO",
+    "IDX_NIFTY BANK",
+    "IDX_NIFTY ENERGY",
+    "IDX_NIFTY FMCG",
+    "IDX_NIFTY IT",
+    "IDX_NIFTY MEDIA",
+    "IDX_NIFTY METAL",
+    "IDX_NIFTY PHARMA",
+    "IDX_NIFTY PSU BANK",
+    "IDX_NIFTY PVT BANK",
+    "IDX_NIFTY REALTY",
+    "IDX_NIFTY INFRA",
+    "IDX_NIFTY FIN SERVICE",
+    "IDX_NIFTY CONSUMPTION",
+]
+SECTOR_UNIVERSE = 500
+
+PRICE_SCHEMA = pa.schema(
+    [
+        ("date", pa.timestamp("ns")),
+        ("entity_id", pa.string()),
+        ("open", pa.float64()),
+        ("high", pa.float64()),
+        ("low", pa.float64()),
+        ("close", pa.float64()),
+        ("volume", pa.float64()),
+    ]
+)
+
+
+def trading_days(years: int, seed: int, end: pd.Timestamp = END_DATE) -> pd.DatetimeIndex:
+    """Weekdays over `years` years with about a dozen holidays a year."""
+    days = pd.bdate_range(end - pd.DateOffset(years=years) + pd.Timedelta(days=1), end)
+    rng = np.random.default_rng((seed, 0))
+    return days[rng.random(len(days)) >= 12 / 261]
+
+
+class SyntheticMarket:
+    """
+    Model parameters for one universe. Returns for stock chunk k are drawn
+    from their own seeded stream, so a chunk can be regenerated exactly
+    without keeping the whole return matrix in memory.
+    """
+
+    def __init__(self, n_stocks: int, years: int = 20, seed: int = 7):
+        self.n_stocks = n_stocks
+        self.seed = seed
+        self.dates = trading_days(years, seed)
+
+        rng = np.random.default_rng((seed, 1))
+        n_days = len(self.dates)
+
+        self.stock_ids = np.array([f"STK_S{i:05d}" for i in range(n_stocks)], dtype=object)
+        self.sector = rng.integers(0, len(SECTOR_INDICES), n_stocks)
+        self.beta = rng.uniform(0.6, 1.4, n_stocks)
+        self.vol = rng.uniform(0.01, 0.03, n_stocks)
+        self.start_price = np.exp(rng.uniform(np.log(20), np.log(5000), n_stocks))
+
+        # Most of the universe trades throughout; the rest lists later
+        late = rng.random(n_stocks) < 0.3
+        self.listing = np.where(late, rng.integers(0, n_days, n_stocks), 0)
+
+        self.market = rng.normal(0.0003, 0.01, n_days)
+        self.sector_returns = rng.normal(0.0, 0.006, (n_days, len(SECTOR_INDICES)))
+
+    def members(self) -> dict:
+        """Index ID -> member stock positions."""
+        out = {}
+        for index_id, (first, stop) in BROAD_INDICES.items():
+            members = np.arange(self.n_stocks)[first:stop]
+            if len(members):
+                out[index_id] = members
+
+        top = np.arange(min(SECTOR_UNIVERSE, self.n_stocks))
+        for code, index_id in enumerate(SECTOR_INDICES):
+            members = top[self.sector[top] == code]
+            if len(members):
+                out[index_id] = members
+        return out
+
+    def chunk_returns(self, k: int) -> tuple:
+        """(stock positions, days x stocks log returns, NaN before listing)."""
+        cols = np.arange(k * CHUNK_STOCKS, min((k + 1) * CHUNK_STOCKS, self.n_stocks))
+        rng = np.random.default_rng((self.seed, 2, k))
+
+        idio = rng.normal(0.0, 1.0, (len(self.dates), len(cols))) * self.vol[cols]
+        returns = (
+            self.beta[cols] * self.market[:, None]
+            + self.sector_returns[:, self.sector[cols]]
+            + idio
+        )
+
+        listed = np.arange(len(self.dates))[:, None] >= self.listing[cols]
+        return cols, np.where(listed, returns, np.nan)
+
+    @property
+    def n_chunks(self) -> int:
+        return -(-self.n_stocks // CHUNK_STOCKS)
+
+
+def _ohlcv(dates, entity_ids, close, rng, vol, volume_scale) -> pa.Table:
+    """Long rows for a (days x entities) close matrix, entity-major, NaNs dropped."""
+    prev = np.vstack([close[:1], close[:-1]])
+    prev = np.where(np.isnan(prev), close, prev)
+
+    open_ = prev * np.exp(rng.normal(0.0, 0.3, close.shape) * vol)
+    top = np.fmax(open_, close) * np.exp(np.abs(rng.normal(0.0, 0.5, close.shape)) * vol)
+    bottom = np.fmin(open_, close) * np.exp(-np.abs(rng.normal(0.0, 0.5, close.shape)) * vol)
+    volume = np.round(rng.lognormal(12.0, 1.0, close.shape)) * volume_scale
+
+    keep = ~np.isnan(close.T)
+    n_days, n_entities = close.shape
+    columns = {
+        "date": np.broadcast_to(dates.to_numpy(dtype="datetime64[ns]"), (n_entities, n_days))[keep],
+        "entity_id": np.repeat(np.asarray(entity_ids, dtype=object), keep.sum(axis=1)),
+        "open": open_.T[keep],
+        "high": top.T[keep],
+        "low": bottom.T[keep],
+        "close": close.T[keep],
+        "volume": volume.T[keep],
+    }
+    return pa.Table.from_pydict(columns, schema=PRICE_SCHEMA)
+
+
+def generate_market(n_stocks: int, years: int = 20, seed: int = 7, out_dir: Path = SYNTHETIC_DIR) -> dict:
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    market = SyntheticMarket(n_stocks, years, seed)
+    members = market.members()
+    index_ids = sorted(members)
+    n_days = len(market.dates)
+
+    # Pass 1: accumulate equal-weighted member returns per index
+    sums = np.zeros((n_days, len(index_ids)))
+    counts = np.zeros((n_days, len(index_ids)))
+    membership = np.zeros((n_stocks, len(index_ids)), dtype=bool)
+    for j, index_id in enumerate(index_ids):
+        membership[members[index_id], j] = True
+
+    for k in range(market.n_chunks):
+        cols, returns = market.chunk_returns(k)
+        simple = np.expm1(returns)
+        listed = ~np.isnan(simple)
+        in_index = membership[cols].astype(float)
+        sums += np.where(listed, simple, 0.0) @ in_index
+        counts += listed.astype(float) @ in_index
+
+    index_returns = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+    index_close = 1000.0 * np.cumprod(1.0 + index_returns, axis=0)
+
+    # Pass 2: write indices first, then stocks, keeping (entity_id, date) order
+    rows = 0
+    price_path = out_dir / "price_history.parquet"
+    sorting = pq.SortingColumn.from_ordering(PRICE_SCHEMA, PRICE_SORT_COLUMNS)
+    with pq.ParquetWriter(price_path, PRICE_SCHEMA, compression="zstd", sorting_columns=sorting) as writer:
+        rng = np.random.default_rng((seed, 3))
+        table = _ohlcv(market.dates, index_ids, index_close, rng, 0.005, 0.0)
+        writer.write_table(table, row_group_size=PRICE_ROW_GROUP)
+        rows += table.num_rows
+
+        for k in range(market.n_chunks):
+            cols, returns = market.chunk_returns(k)
+            close = market.start_price[cols] * np.exp(np.nancumsum(returns, axis=0))
+            close = np.where(np.isnan(returns), np.nan, close)
+
+            rng = np.random.default_rng((seed, 4, k))
+            table = _ohlcv(market.dates, market.stock_ids[cols], close, rng, market.vol[cols], 1.0)
+            writer.write_table(table, row_group_size=PRICE_ROW_GROUP)
+            rows += table.num_rows
+
+    symbols = [i.removeprefix("IDX_") for i in index_ids] + [s.removeprefix("STK_") for s in market.stock_ids]
+    master = pd.DataFrame({
+        "entity_id": index_ids + market.stock_ids.tolist(),
+        "entity_type": ["INDEX"] * len(index_ids) + ["STOCK"] * n_stocks,
+        "entity_name": [f"Synthetic {s}" for s in symbols],
+        "symbol": symbols,
+        "exchange": "NSE",
+        "sector": None,
+        "is_active": True,
+    })
+    master.to_parquet(out_dir / "entity_master.parquet", index=False)
+
+    const_map = pd.DataFrame(
+        [(i, s) for i in index_ids for s in market.stock_ids[members[i]]],
+        columns=["index_entity_id", "stock_entity_id"],
+    )
+    const_map.to_parquet(out_dir / "index_constituents_map.parquet", index=False)
+
+    return {"rows": rows, "days": n_days, "indices": len(index_ids), "stocks": n_stocks}
+
+
+def market_dir(n_stocks: int, years: int = 20, seed: int = 7) -> Path:
+    return SYNTHETIC_DIR / f"{n_stocks}_{years}y_seed{seed}"
+
+
+def open_market(data_dir: Path) -> dict:
+    """Price store and membership for a generated market directory."""
+    data_dir = Path(data_dir)
+    master = pd.read_parquet(data_dir / "entity_master.parquet")
+
+    store = PriceStore(
+        load_price_history(data_dir / "price_history.parquet"),
+        EntityCodes.from_master(master),
+    )
+    membership = MembershipHistory(
+        load_membership_spells(
+            data_dir / "index_constituents_history.parquet",
+            data_dir / "index_constituents_map.parquet",
+        )
+    )
+    return {"store": store, "membership": membership, "master": master}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stocks", type=int, default=750)
+    parser.add_argument("--years", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    out = args.out or market_dir(args.stocks, args.years, args.seed)
+    started = time.perf_counter()
+    summary = generate_market(args.stocks, args.years, args.seed, out)
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"Wrote {summary['rows']:,} rows ({summary['stocks']:,} stocks, "
+        f"{summary['indices']} indices, {summary['days']:,} days) to {out} in {elapsed:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
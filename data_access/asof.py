@@ -0,0 +1,192 @@
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from data_access.trading_calendar import TradingCalendar
+
+
+class AsOfIndex:
+    """
+    Binary-search index answering "last row on or before date" for any
+    number of (entity, date) pairs in one call.
+
+    Rows must be sorted by (entity, date). Each row gets the key
+    entity_code * (n_dates + 1) + date_position, which is then sorted
+    globally, so a single searchsorted resolves every query at once.
+    Categorical entity IDs are split into runs on their integer codes.
+    """
+
+    def __init__(self, entity_ids, dates, values: dict):
+        if isinstance(getattr(entity_ids, "dtype", None), pd.CategoricalDtype):
+            entity_ids = pd.Categorical(entity_ids)
+            runs, labels = entity_ids.codes, entity_ids.categories.to_numpy(dtype=object)
+        else:
+            runs, labels = np.asarray(entity_ids), None
+        dates = np.asarray(dates, dtype="datetime64[ns]")
+
+        starts = np.flatnonzero(np.r_[True, runs[1:] != runs[:-1]])[: len(runs)]
+        lengths = np.diff(np.r_[starts, len(runs)])
+
+        first = runs[starts]
+        self.entities = pd.Index(labels[first] if labels is not None else first)
+        self.dates = np.unique(dates)
+        self._stride = len(self.dates) + 1
+
+        codes = np.repeat(np.arange(len(starts), dtype=np.int64), lengths)
+        self._keys = codes * self._stride + np.searchsorted(self.dates, dates)
+        self._row_dates = dates
+        self._values = {
+            k: v if isinstance(v, pd.arrays.SparseArray) else np.asarray(v) for k, v in values.items()
+        }
+
+    @cached_property
+    def calendar(self) -> TradingCalendar:
+        """Trading calendar over every date present in the index."""
+        return TradingCalendar(self.dates)
+
+    def codes(self, entity_ids) -> np.ndarray:
+        entity_ids = np.asarray(entity_ids, dtype=object)
+        return self.entities.get_indexer(entity_ids.ravel()).reshape(entity_ids.shape)
+
+    def rows(self, entity_ids, dates, side: str = "before") -> np.ndarray:
+        """
+        Row positions for broadcastable entity/date arrays, -1 where missing.
+
+        side="before" finds the last row on or before each date;
+        side="after" finds the first row on or after it.
+        """
+        codes = self.codes(entity_ids)
+        dates = np.asarray(dates, dtype="datetime64[ns]")
+        codes, dates = np.broadcast_arrays(codes, dates)
+
+        valid = (codes >= 0) & ~np.isnat(dates)
+
+        # Dates outside the index would otherwise borrow a neighbouring
+        # entity's key once clipped below
+        if side == "before":
+            pos = np.searchsorted(self.dates, dates, side="right") - 1
+            valid &= pos >= 0
+            rows = np.searchsorted(self._keys, codes * self._stride + pos, side="right") - 1
+        elif side == "after":
+            pos = np.searchsorted(self.dates, dates, side="left")
+            valid &= pos < len(self.dates)
+            rows = np.searchsorted(self._keys, codes * self._stride + pos, side="left")
+        else:
+            raise ValueError(f"side must be 'before' or 'after', got {side!r}")
+
+        rows = np.clip(rows, 0, max(len(self._keys) - 1, 0))
+        if len(self._keys):
+            valid &= self._keys[rows] // self._stride == codes
+        else:
+            valid[...] = False
+
+        return np.where(valid, rows, -1)
+
+    def take(self, rows: np.ndarray, column: str = "close") -> np.ndarray:
+        rows = np.asarray(rows)
+        column = self._values[column]
+        if isinstance(column, pd.arrays.SparseArray):
+            values = np.asarray(column[np.maximum(rows, 0).ravel()], dtype="float64").reshape(rows.shape)
+        else:
+            values = column[np.maximum(rows, 0)].astype("float64")
+        return np.where(rows >= 0, values, np.nan)
+
+    def take_dates(self, rows: np.ndarray) -> np.ndarray:
+        found = self._row_dates[np.maximum(rows, 0)]
+        return np.where(rows >= 0, found, np.datetime64("NaT"))
+
+    def lookup(self, entity_ids, dates, column: str = "close", side: str = "before"):
+        """Return (row dates, values) for each entity/date pair."""
+        rows = self.rows(entity_ids, dates, side=side)
+        return self.take_dates(rows), self.take(rows, column)
+
+    def extended(self, other: "AsOfIndex") -> "AsOfIndex":
+        """
+        An index over this one's rows and `other`'s, with the columns both
+        hold; where both have a row for an entity and date, other's wins.
+        """
+        def frame(index):
+            df = pd.DataFrame({
+                "entity_id": index.entities.to_numpy(dtype=object)[index._keys // index._stride],
+                "date": index._row_dates,
+            })
+            for c in columns:
+                df[c] = np.asarray(index._values[c])
+            return df
+
+        columns = [c for c in self._values if c in other._values]
+        rows = (
+            pd.concat([frame(self), frame(other)], ignore_index=True)
+            .drop_duplicates(["entity_id", "date"], keep="last")
+            .sort_values(["entity_id", "date"], kind="stable")
+        )
+        return AsOfIndex(rows["entity_id"].to_numpy(), rows["date"].to_numpy(), {c: rows[c].to_numpy() for c in columns})
+
+    def arrays(self) -> dict:
+        """Every array the index holds, by name, for memory accounting."""
+        return {
+            "keys": self._keys,
+            "dates": self._row_dates,
+            **{f"values.{k}": v for k, v in self._values.items()},
+        }
+
+
+# Appended rows are numbered from here up, past any base row position
+TAIL_ROW = 2**62
+
+
+class AppendedAsOf:
+    """
+    An as-of index over `base` plus a `tail` AsOfIndex of rows dated after
+    the base's last date, such as daily segments not yet folded into a
+    rebuilt store.
+
+    Tail rows are numbered from TAIL_ROW, so they sort after every base row
+    and take() can route each row to its source. A base that is itself
+    appended is flattened, its tail merged with `tail`, since two tails
+    would share those numbers.
+    """
+
+    def __init__(self, base, tail: AsOfIndex):
+        if isinstance(base, AppendedAsOf):
+            base, tail = base._base, base._tail.extended(tail)
+        self._base = base
+        self._tail = tail
+        self.entities = base.entities.append(tail.entities.difference(base.entities, sort=False))
+        self.dates = np.union1d(base.dates, tail.dates)
+
+    @cached_property
+    def calendar(self) -> TradingCalendar:
+        return TradingCalendar(self.dates)
+
+    def codes(self, entity_ids) -> np.ndarray:
+        entity_ids = np.asarray(entity_ids, dtype=object)
+        return self.entities.get_indexer(entity_ids.ravel()).reshape(entity_ids.shape)
+
+    def rows(self, entity_ids, dates, side: str = "before") -> np.ndarray:
+        base = self._base.rows(entity_ids, dates, side=side)
+        tail = self._tail.rows(entity_ids, dates, side=side)
+        tail = np.where(tail >= 0, tail + TAIL_ROW, -1)
+
+        # Any tail row is newer than every base row of the same entity
+        if side == "before":
+            return np.where(tail >= 0, tail, base)
+        return np.where(base >= 0, base, tail)
+
+    def _split(self, rows):
+        in_tail = rows >= TAIL_ROW
+        return in_tail, np.where(in_tail, -1, rows), np.where(in_tail, rows - TAIL_ROW, -1)
+
+    def take(self, rows: np.ndarray, column: str = "close") -> np.ndarray:
+        in_tail, base, tail = self._split(rows)
+        return np.where(in_tail, self._tail.take(tail, column), self._base.take(base, column))
+
+    def take_dates(self, rows: np.ndarray) -> np.ndarray:
+        in_tail, base, tail = self._split(rows)
+        return np.where(in_tail, self._tail.take_dates(tail), self._base.take_dates(base))
+
+    def lookup(self, entity_ids, dates, column: str = "close", side: str = "before"):
+        """Return (row dates, values) for each entity/date pair."""
+        rows = self.rows(entity_ids, dates, side=side)
+        return self.take_dates(rows), self.take(rows, column)
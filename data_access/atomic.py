@@ -0,0 +1,21 @@
+import shutil
+from pathlib import Path
+
+
+def swap_in_dir(tmp_dir: Path, out_dir: Path):
+    """Replace `out_dir` with a fully written `tmp_dir`."""
+    tmp_dir, out_dir = Path(tmp_dir), Path(out_dir)
+    old_dir = out_dir.with_name(out_dir.name + ".old")
+
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if out_dir.exists():
+        out_dir.rename(old_dir)
+    tmp_dir.rename(out_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def fresh_tmp_dir(out_dir: Path) -> Path:
+    tmp_dir = Path(out_dir).with_name(Path(out_dir).name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    return tmp_dir
@@ -0,0 +1,137 @@
+"""
+Build data/processed/price_history.parquet from the raw price exports.
+
+    python -m data_access.build_price_history [--workers N]
+
+Raw index files (data/raw/index_prices/NSE_Indices_*-H.csv) and per-symbol
+stock files (data/raw/stock_prices/<SYMBOL>.csv) are parsed in a process
+pool, mapped to entity_master IDs, converted to tz-naive IST dates and
+written sorted by (entity_id, date) with one row per entity per day, in
+small row groups so readers can push entity and date filters down.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from data_access.index_prices_loader import load_index_prices_from_csv
+from data_access.price_store import PRICE_FILE, write_price_history
+from data_access.reference_data import ENTITY_FILE
+from data_access.stock_prices_loader import load_stock_prices_from_csv
+
+RAW_DIR = Path("data/raw")
+INDEX_PRICE_PATTERN = "index_prices/NSE_Indices_*-H.csv"
+STOCK_PRICE_DIR = "stock_prices"
+STOCK_UNIVERSE_FILE = Path("stocks.csv")
+
+MARKET_TZ = "Asia/Kolkata"
+PRICE_COLUMNS = ["date", "entity_id", "open", "high", "low", "close", "volume"]
+
+
+def _read_index_file(path: Path) -> pd.DataFrame:
+    return load_index_prices_from_csv(path).rename(columns={"index_name": "symbol"})
+
+
+def _read_stock_file(path: Path) -> pd.DataFrame:
+    return load_stock_prices_from_csv(path)
+
+
+def _map_entity_ids(df: pd.DataFrame, master: pd.DataFrame, entity_type: str):
+    ids = (
+        master.loc[master["entity_type"] == entity_type]
+        .set_index("symbol")["entity_id"]
+    )
+    df["entity_id"] = df["symbol"].map(ids)
+
+    unmapped = sorted(df.loc[df["entity_id"].isna(), "symbol"].unique())
+    return df.dropna(subset=["entity_id"]), unmapped
+
+
+def stock_price_files(raw_dir: Path = RAW_DIR, universe_file: Path = STOCK_UNIVERSE_FILE):
+    symbols = pd.read_csv(universe_file, dtype="string")["symbol"]
+    files = [raw_dir / STOCK_PRICE_DIR / f"{s}.csv" for s in symbols]
+    return [f for f in files if f.exists()], [f.stem for f in files if not f.exists()]
+
+
+def build_price_history(
+    raw_dir: Path = RAW_DIR,
+    out_path: Path = PRICE_FILE,
+    entity_file: Path = ENTITY_FILE,
+    universe_file: Path = STOCK_UNIVERSE_FILE,
+    workers: int = None,
+) -> dict:
+    raw_dir = Path(raw_dir)
+    master = pd.read_parquet(entity_file)
+
+    index_files = sorted(raw_dir.glob(INDEX_PRICE_PATTERN))
+    stock_files, missing_files = stock_price_files(raw_dir, universe_file)
+
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(stock_files) // (4 * workers))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        index_frames = list(pool.map(_read_index_file, index_files))
+        stock_frames = list(pool.map(_read_stock_file, stock_files, chunksize=chunksize))
+
+    frames, unmapped = [], []
+    for raw, entity_type in [(index_frames, "INDEX"), (stock_frames, "STOCK")]:
+        if not raw:
+            continue
+        df, missing = _map_entity_ids(pd.concat(raw, ignore_index=True), master, entity_type)
+        frames.append(df)
+        unmapped += missing
+
+    prices = pd.concat(frames, ignore_index=True)[PRICE_COLUMNS]
+
+    # Normalize once here so readers never have to touch timezones. Some
+    # exports stamp a session at 09:15 as well as midnight; keep one per day.
+    prices["date"] = (
+        prices["date"].dt.tz_convert(MARKET_TZ).dt.tz_localize(None).dt.normalize()
+    )
+
+    # Later rows win, both across overlapping exports and within a day
+    prices = (
+        prices.drop_duplicates(["entity_id", "date"], keep="last")
+        .sort_values(["entity_id", "date"], kind="stable")
+        .reset_index(drop=True)
+    )
+
+    write_price_history(prices, out_path)
+
+    return {
+        "rows": len(prices),
+        "entities": prices["entity_id"].nunique(),
+        "index_files": len(index_files),
+        "stock_files": len(stock_files),
+        "missing_stock_files": missing_files,
+        "unmapped_names": unmapped,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--raw-dir", type=Path, default=RAW_DIR)
+    parser.add_argument("--out", type=Path, default=PRICE_FILE)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    summary = build_price_history(args.raw_dir, args.out, workers=args.workers)
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"Wrote {summary['rows']:,} rows for {summary['entities']} entities "
+        f"to {args.out} in {elapsed:.1f}s"
+    )
+    if summary["missing_stock_files"]:
+        print(f"No raw file for {len(summary['missing_stock_files'])} symbols", file=sys.stderr)
+    if summary["unmapped_names"]:
+        print(f"Not in entity_master: {', '.join(summary['unmapped_names'])}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Point-in-time index membership.
+
+    python -m data_access.constituent_history [--as-of YYYY-MM-DD]
+
+Membership is a set of spells, one [effective_from, effective_to) interval
+per (index, stock) stretch, stored in index_constituents_history.parquet.
+Running the module records the current index_constituents_map into that
+history as of a date: new pairs open a spell, pairs that left have theirs
+closed. Without a history file, today's map is read as open-ended spells.
+"""
+import argparse
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_access.reference_data import CONSTITUENT_FILE, DATA_DIR, load_constituents_map
+
+CONSTITUENT_HISTORY_FILE = DATA_DIR / "index_constituents_history.parquet"
+SPELL_COLUMNS = ["index_entity_id", "stock_entity_id", "effective_from", "effective_to"]
+
+# Open ends compare as the earliest / latest representable instant
+_MIN = np.iinfo(np.int64).min + 1
+_MAX = np.iinfo(np.int64).max
+
+
+def _ns(values) -> np.ndarray:
+    values = pd.to_datetime(pd.Series(values)).to_numpy(dtype="datetime64[ns]")
+    return values.view(np.int64)
+
+
+class MembershipHistory:
+    """
+    Interval index over membership spells.
+
+    Spells are grouped per index and sorted by start, so the spells of an
+    index are one slice and any date splits them with a searchsorted.
+    Bulk queries compare all of an index's spells against all dates at once.
+    """
+
+    def __init__(self, spells: pd.DataFrame):
+        spells = spells[SPELL_COLUMNS].sort_values(
+            ["index_entity_id", "effective_from"], kind="stable", na_position="first"
+        )
+
+        starts = _ns(spells["effective_from"])
+        ends = _ns(spells["effective_to"])
+        self._from = np.where(starts == np.iinfo(np.int64).min, _MIN, starts)
+        self._to = np.where(ends == np.iinfo(np.int64).min, _MAX, ends)
+
+        if (self._from >= self._to).any():
+            raise ValueError("membership spells must end after they start")
+
+        index_ids = spells["index_entity_id"].to_numpy(dtype=object)
+        bounds = np.flatnonzero(np.r_[True, index_ids[1:] != index_ids[:-1]])[: len(index_ids)]
+
+        self.index_ids = pd.Index(index_ids[bounds])
+        self._indptr = np.r_[bounds, len(index_ids)]
+        self._stocks = spells["stock_entity_id"].to_numpy(dtype=object)
+
+    def _spells(self, index_id: str) -> slice:
+        row = self.index_ids.get_indexer([index_id])[0]
+        if row < 0:
+            return slice(0, 0)
+        return slice(self._indptr[row], self._indptr[row + 1])
+
+    def members_on(self, index_id: str, date) -> list:
+        """Members of an index on `date`, sorted by ID."""
+        spells = self._spells(index_id)
+        date = _ns([date])[0]
+
+        # Spells are sorted by start, so only a prefix can have begun
+        begun = spells.start + np.searchsorted(self._from[spells], date, side="right")
+        live = np.flatnonzero(self._to[spells.start:begun] > date) + spells.start
+        return sorted(set(self._stocks[live]))
+
+    def ever_members(self, index_id: str, start=None, end=None) -> list:
+        """Stocks with a spell overlapping [start, end], sorted by ID."""
+        spells = self._spells(index_id)
+        lo = _MIN if start is None else _ns([start])[0]
+        hi = _MAX if end is None else _ns([end])[0]
+
+        hit = (self._from[spells] <= hi) & (self._to[spells] > lo)
+        return sorted(set(self._stocks[spells][hit]))
+
+    def member_mask(self, index_id: str, stock_ids, dates) -> np.ndarray:
+        """(dates x stocks) bool matrix: was the stock a member on that date."""
+        stock_ids = pd.Index(list(stock_ids))
+        dates = _ns(dates)
+        spells = self._spells(index_id)
+
+        cols = stock_ids.get_indexer(self._stocks[spells])
+        order = np.flatnonzero(cols >= 0)
+        order = order[np.argsort(cols[order], kind="stable")]
+
+        mask = np.zeros((len(dates), len(stock_ids)), dtype=bool)
+        if not len(order):
+            return mask
+
+        live = (
+            (self._from[spells][order][None, :] <= dates[:, None])
+            & (self._to[spells][order][None, :] > dates[:, None])
+        )
+
+        # A stock can have several spells; fold them into its column
+        cols = cols[order]
+        first = np.flatnonzero(np.r_[True, cols[1:] != cols[:-1]])
+        mask[:, cols[first]] = np.logical_or.reduceat(live, first, axis=1)
+        return mask
+
+
+def load_membership_spells(
+    path: Path = CONSTITUENT_HISTORY_FILE,
+    current_path: Path = CONSTITUENT_FILE,
+) -> pd.DataFrame:
+    if Path(path).exists():
+        return pd.read_parquet(path)
+
+    spells = load_constituents_map(current_path)[["index_entity_id", "stock_entity_id"]]
+    return spells.drop_duplicates().assign(effective_from=pd.NaT, effective_to=pd.NaT)
+
+
+def membership_version(
+    path: Path = CONSTITUENT_HISTORY_FILE,
+    current_path: Path = CONSTITUENT_FILE,
+) -> str:
+    """Stamp of the file membership is read from: the history, or today's map without one."""
+    for f in (Path(path), Path(current_path)):
+        if f.exists():
+            stat = f.stat()
+            return f"{f.name}:{stat.st_size}:{stat.st_mtime_ns}"
+    return ""
+
+
+@lru_cache(maxsize=2)
+def _cached_membership(path: Path, current_path: Path, version: str) -> MembershipHistory:
+    return MembershipHistory(load_membership_spells(path, current_path))
+
+
+def get_membership_history(
+    path: Path = CONSTITUENT_HISTORY_FILE,
+    current_path: Path = CONSTITUENT_FILE,
+) -> MembershipHistory:
+    """The process-wide membership, reloaded once the file it is read from changes."""
+    path, current_path = Path(path), Path(current_path)
+    return _cached_membership(path, current_path, membership_version(path, current_path))
+
+
+def record_snapshot(spells: pd.DataFrame, const_map: pd.DataFrame, as_of) -> pd.DataFrame:
+    """
+    Spells updated so that membership from `as_of` on equals `const_map`:
+    open spells for pairs no longer listed end at `as_of`, and listed pairs
+    without an open spell get one starting at `as_of`.
+    """
+    as_of = pd.Timestamp(as_of)
+    spells = spells[SPELL_COLUMNS].copy()
+
+    key = ["index_entity_id", "stock_entity_id"]
+    listed = pd.MultiIndex.from_frame(const_map[key].drop_duplicates())
+    pairs = pd.MultiIndex.from_frame(spells[key])
+
+    is_open = spells["effective_to"].isna().to_numpy()
+    if (is_open & (spells["effective_from"] >= as_of).to_numpy()).any():
+        raise ValueError(f"history already has spells opened on or after {as_of.date()}")
+
+    spells.loc[is_open & ~pairs.isin(listed), "effective_to"] = as_of
+
+    opened = listed.difference(pairs[is_open])
+    new = pd.DataFrame(list(opened), columns=key).assign(
+        effective_from=as_of, effective_to=pd.NaT
+    )
+    return pd.concat([spells, new], ignore_index=True).sort_values(
+        ["index_entity_id", "stock_entity_id", "effective_from"], ignore_index=True
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--as-of", type=pd.Timestamp, default=pd.Timestamp.today().normalize())
+    parser.add_argument("--out", type=Path, default=CONSTITUENT_HISTORY_FILE)
+    args = parser.parse_args(argv)
+
+    spells = record_snapshot(
+        load_membership_spells(args.out), load_constituents_map(), args.as_of
+    )
+    spells["effective_from"] = pd.to_datetime(spells["effective_from"])
+    spells["effective_to"] = pd.to_datetime(spells["effective_to"])
+
+    tmp_path = args.out.with_suffix(".parquet.tmp")
+    spells.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, args.out)
+
+    print(
+        f"Recorded membership as of {args.as_of.date()}: {len(spells):,} spells, "
+        f"{spells['effective_to'].isna().sum():,} open"
+    )
+
+
+if __name__ == "__main__":
+    main()
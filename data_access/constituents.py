@@ -0,0 +1,88 @@
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_access.entity_codes import EntityCodes, get_entity_codes
+from data_access.reference_data import CONSTITUENT_FILE, ENTITY_FILE, load_constituents_map
+
+
+class ConstituentIndex:
+    """
+    Index membership in both directions, built once from
+    index_constituents_map.
+
+    Members of index row r are the stock codes
+    member_codes[indptr[r]:indptr[r + 1]] (compressed sparse rows, in map
+    order). For the reverse lookup, every stock code has a bitset with bit
+    r set for each index row r that holds it.
+    """
+
+    def __init__(self, const_map: pd.DataFrame, codes: EntityCodes):
+        pairs = const_map[["index_entity_id", "stock_entity_id"]].drop_duplicates()
+
+        self.codes = codes.with_ids(pairs["stock_entity_id"])
+        self.index_ids = pd.Index(pairs["index_entity_id"].unique())
+
+        rows = self.index_ids.get_indexer(pairs["index_entity_id"])
+        order = np.argsort(rows, kind="stable")
+
+        self.member_codes = self.codes.encode(pairs["stock_entity_id"])[order]
+        self.indptr = np.r_[0, np.cumsum(np.bincount(rows, minlength=len(self.index_ids)))]
+
+        n_words = max(1, -(-len(self.index_ids) // 64))
+        self.bits = np.zeros((len(self.codes), n_words), dtype=np.uint64)
+        np.bitwise_or.at(
+            self.bits,
+            (self.member_codes, rows[order] // 64),
+            np.left_shift(np.uint64(1), (rows[order] % 64).astype(np.uint64)),
+        )
+
+    def _row(self, index_id: str) -> int:
+        return self.index_ids.get_indexer([index_id])[0]
+
+    def members(self, index_id: str) -> np.ndarray:
+        """Stock codes of an index; empty for unknown indices."""
+        row = self._row(index_id)
+        if row < 0:
+            return self.member_codes[:0]
+        return self.member_codes[self.indptr[row]:self.indptr[row + 1]]
+
+    def member_ids(self, index_id: str) -> list:
+        return self.codes.decode(self.members(index_id)).tolist()
+
+    def contains(self, index_id: str, stock_ids) -> np.ndarray:
+        """Whether each stock is a member of the index."""
+        row = self._row(index_id)
+        codes = self.codes.encode(list(stock_ids))
+        if row < 0:
+            return np.zeros(len(codes), dtype=bool)
+
+        words = self.bits[np.maximum(codes, 0), row // 64]
+        hit = (words >> np.uint64(row % 64)) & np.uint64(1)
+        return (codes >= 0) & hit.astype(bool)
+
+    def indices_of(self, stock_id: str) -> list:
+        """Indices holding a stock, in index_ids order."""
+        code = self.codes.encode([stock_id])[0]
+        if code < 0:
+            return []
+
+        bits = np.unpackbits(self.bits[code].view(np.uint8), bitorder="little")
+        return self.index_ids[np.flatnonzero(bits[: len(self.index_ids)])].tolist()
+
+
+@lru_cache(maxsize=2)
+def _cached_index(path: Path, entity_path: Path, version: str) -> ConstituentIndex:
+    return ConstituentIndex(load_constituents_map(path), get_entity_codes(entity_path))
+
+
+def get_constituent_index(
+    path: Path = CONSTITUENT_FILE,
+    entity_path: Path = ENTITY_FILE,
+) -> ConstituentIndex:
+    """The process-wide index, rebuilt once the constituent map is rewritten."""
+    path = Path(path)
+    stat = path.stat()
+    return _cached_index(path, Path(entity_path), f"{stat.st_size}:{stat.st_mtime_ns}")
@@ -0,0 +1,82 @@
+from functools import cached_property, lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_access.reference_data import ENTITY_FILE, load_entity_master
+
+# Fallback typing for IDs that are not in entity_master
+TYPE_PREFIXES = {"IDX_": "INDEX", "STK_": "STOCK"}
+
+
+def _type_from_prefix(entity_id: str) -> str:
+    for prefix, entity_type in TYPE_PREFIXES.items():
+        if entity_id.startswith(prefix):
+            return entity_type
+    return None
+
+
+class EntityCodes:
+    """
+    Integer codes for entity IDs in entity_master order.
+
+    A code is a position in `ids`, so per-code arrays such as is_index and
+    is_stock are indexed directly by code arrays. Instances are shared and
+    never mutated; with_ids returns an extended copy instead.
+    """
+
+    def __init__(self, entity_ids, entity_types):
+        self.ids = pd.Index(entity_ids)
+        self._labels = self.ids.to_numpy(dtype=object)
+        self.types = np.asarray(entity_types, dtype=object)
+        self.is_index = self.types == "INDEX"
+        self.is_stock = self.types == "STOCK"
+
+    @classmethod
+    def from_master(cls, master: pd.DataFrame) -> "EntityCodes":
+        master = master.drop_duplicates("entity_id")
+        return cls(master["entity_id"].to_numpy(), master["entity_type"].to_numpy())
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def dtype(self) -> pd.CategoricalDtype:
+        return pd.CategoricalDtype(self.ids)
+
+    @cached_property
+    def index_codes(self) -> np.ndarray:
+        return np.flatnonzero(self.is_index)
+
+    @cached_property
+    def stock_codes(self) -> np.ndarray:
+        return np.flatnonzero(self.is_stock)
+
+    def with_ids(self, entity_ids) -> "EntityCodes":
+        """These codes, extended with any unknown IDs typed by their prefix."""
+        unknown = pd.Index(entity_ids).unique().difference(self.ids, sort=False)
+        if unknown.empty:
+            return self
+
+        return EntityCodes(
+            self.ids.append(unknown),
+            np.r_[self.types, [_type_from_prefix(e) for e in unknown]],
+        )
+
+    def encode(self, entity_ids) -> np.ndarray:
+        """Codes for IDs of any shape, -1 where unknown."""
+        entity_ids = np.asarray(entity_ids, dtype=object)
+        codes = self.ids.get_indexer(entity_ids.ravel()).astype(np.int32)
+        return codes.reshape(entity_ids.shape)
+
+    def decode(self, codes) -> np.ndarray:
+        return self._labels[np.asarray(codes)]
+
+
+@lru_cache(maxsize=None)
+def get_entity_codes(path: Path = ENTITY_FILE) -> EntityCodes:
+    if not Path(path).exists():
+        return EntityCodes([], [])
+    return EntityCodes.from_master(load_entity_master(path))
+
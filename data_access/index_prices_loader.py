@@ -1,5 +1,31 @@
 import pandas as pd
+import pyarrow as pa
+from pyarrow import csv
+
+# Raw exports carry IST offsets ("2015-01-01 00:00:00+05:30"); arrow parses
+# them natively into UTC instants, far faster than pandas' strptime path.
+PRICE_COLUMN_TYPES = {
+    "date": pa.timestamp("s", tz="UTC"),
+    "open": pa.float64(),
+    "high": pa.float64(),
+    "low": pa.float64(),
+    "close": pa.float64(),
+    "volume": pa.float64(),
+}
+
+
+def read_price_csv(path, extra_columns: dict = None) -> pd.DataFrame:
+    column_types = {**PRICE_COLUMN_TYPES, **(extra_columns or {})}
+
+    table = csv.read_csv(
+        path,
+        convert_options=csv.ConvertOptions(
+            column_types=column_types,
+            include_columns=list(column_types),
+        ),
+    )
+    return table.to_pandas()
+
 
 def load_index_prices_from_csv(path: str) -> pd.DataFrame:
-    df = pd.read_csv(path, parse_dates=["date"])
-    return df
+    return read_price_csv(path, {"index_name": pa.string()})
@@ -0,0 +1,59 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from data_access.price_store import PRICE_FILE, source_stamp
+
+INDICATOR_DIR = Path("data/processed/indicators")
+
+# Full build; incremental updates sit next to it as append-YYYYMMDD.parquet
+INDICATOR_BASE_FILE = "history.parquet"
+# Running state for appends; the leading underscore keeps parquet readers off it
+INDICATOR_STATE_FILE = "_state.npz"
+# Build stamp of the price file the base was computed from
+INDICATOR_META_FILE = "_meta.json"
+
+
+def indicators_available(path: Path = INDICATOR_DIR, source: Path = PRICE_FILE) -> bool:
+    """
+    True if indicators are built from the current `source`, when there is
+    one. Appended sessions extend them, so daily segments do not make them
+    stale; a rebuilt or corrected base file does.
+    """
+    path = Path(path)
+    if not (path / INDICATOR_BASE_FILE).exists() or not (path / INDICATOR_META_FILE).exists():
+        return False
+    if not Path(source).exists():
+        return True
+    return json.loads((path / INDICATOR_META_FILE).read_text()).get("source") == source_stamp(source)
+
+
+def read_indicators(
+    entity_ids=None,
+    start=None,
+    end=None,
+    dates=None,
+    columns=None,
+    path: Path = INDICATOR_DIR,
+) -> pd.DataFrame:
+    """
+    Stored indicator rows sorted by (entity_id, date), optionally limited to
+    some entities, a date range or an explicit list of dates.
+    """
+    filters = []
+
+    if entity_ids is not None:
+        filters.append(("entity_id", "in", list(entity_ids)))
+    if start is not None:
+        filters.append(("date", ">=", pd.Timestamp(start)))
+    if end is not None:
+        filters.append(("date", "<=", pd.Timestamp(end)))
+    if dates is not None:
+        filters.append(("date", "in", list(pd.DatetimeIndex(dates))))
+
+    if columns is not None:
+        columns = list(dict.fromkeys(["entity_id", "date", *columns]))
+
+    df = pd.read_parquet(path, filters=filters or None, columns=columns)
+    return df.sort_values(["entity_id", "date"], kind="stable", ignore_index=True)
@@ -0,0 +1,359 @@
+"""
+Publish price history as memory-mapped (dates x entities) matrices.
+
+    python -m data_access.price_matrix [--out DIR]
+
+One .npy file per price column holds a C-ordered dates x entities float64
+matrix, NaN where an entity has no row. Two int32 matrices of the same shape
+give, per cell, the date position of the entity's last row on or before it
+and its first row on or after it (-1 if none), so as-of lookups are plain
+indexing. Every server process maps the files read-only. The OS page cache
+holds one copy however many replicas and sessions read it, and opening the
+matrix costs a few file maps. The directory is swapped in whole, and
+readers pick up a new build on their next call. Daily segments appended
+after the build are overlaid on the matrix until the next one.
+"""
+import argparse
+import json
+import time
+from functools import cached_property, lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_access.asof import AppendedAsOf, AsOfIndex
+from data_access.atomic import fresh_tmp_dir, swap_in_dir
+from data_access.entity_codes import get_entity_codes
+from data_access.price_store import (
+    PRICE_FILE,
+    PriceStore,
+    get_price_store,
+    load_price_segments,
+    price_segments,
+    source_stamp,
+)
+from data_access.profiling import span
+from data_access.reference_data import DATA_DIR
+from data_access.trading_calendar import TradingCalendar
+
+PRICE_MATRIX_DIR = DATA_DIR / "price_matrix"
+MATRIX_META_FILE = "meta.json"
+MATRIX_COLUMNS = ("open", "high", "low", "close", "volume")
+
+# Entities per build block, bounding build memory to dates x block cells
+BUILD_BLOCK = 1024
+
+
+def build_price_matrix(store, out_dir: Path = PRICE_MATRIX_DIR, source: Path = PRICE_FILE) -> dict:
+    out_dir = Path(out_dir)
+    tmp_dir = fresh_tmp_dir(out_dir)
+
+    prices = store.prices
+    entity_ids = store.entity_ids
+    dates = store.dates.to_numpy()
+    n_dates, n_entities = len(dates), len(entity_ids)
+
+    # Rows are sorted by entity, so each entity's rows are one contiguous run
+    starts, stops = store.bounds(entity_ids)
+    date_pos = np.searchsorted(dates, prices["date"].to_numpy()).astype(np.int32)
+    columns = [c for c in MATRIX_COLUMNS if c in prices]
+
+    def matrix(name, dtype):
+        return np.lib.format.open_memmap(tmp_dir / f"{name}.npy", "w+", dtype, (n_dates, n_entities))
+
+    out = {c: matrix(c, np.float64) for c in columns}
+    last = matrix("last_row", np.int32)
+    first = matrix("next_row", np.int32)
+
+    for lo in range(0, n_entities, BUILD_BLOCK):
+        hi = min(lo + BUILD_BLOCK, n_entities)
+        rows = slice(starts[lo], stops[hi - 1])
+        pos = date_pos[rows]
+        cols = np.repeat(np.arange(hi - lo), stops[lo:hi] - starts[lo:hi])
+
+        for c in columns:
+            block = np.full((n_dates, hi - lo), np.nan)
+            block[pos, cols] = prices[c].to_numpy()[rows]
+            out[c][:, lo:hi] = block
+
+        here = np.full((n_dates, hi - lo), -1, dtype=np.int32)
+        here[pos, cols] = pos
+        last[:, lo:hi] = np.maximum.accumulate(here, axis=0)
+
+        here[here < 0] = n_dates
+        nxt = np.minimum.accumulate(here[::-1], axis=0)[::-1]
+        first[:, lo:hi] = np.where(nxt == n_dates, -1, nxt)
+
+    for m in [*out.values(), last, first]:
+        m.flush()
+    del out, last, first
+
+    np.save(tmp_dir / "dates.npy", dates.astype("datetime64[ns]"))
+    np.save(tmp_dir / "entities.npy", np.asarray(entity_ids, dtype=str))
+
+    meta = {
+        "built_at": pd.Timestamp.now().isoformat(),
+        "dates": n_dates,
+        "entities": n_entities,
+        "columns": columns,
+        "source": source_stamp(source) if Path(source).exists() else None,
+        # The store passed in is expected to hold these segments too
+        "segments": [f.name for f in price_segments(source)],
+    }
+    (tmp_dir / MATRIX_META_FILE).write_text(json.dumps(meta, indent=2))
+
+    swap_in_dir(tmp_dir, out_dir)
+    return meta
+
+
+class MatrixAsOf:
+    """
+    AsOfIndex over a memory-mapped price matrix.
+
+    A row is the flat cell position date_pos * n_entities + entity_col, so
+    take() is one gather from the flattened matrix and rows() reads the
+    precomputed last / next row matrices instead of searching.
+    """
+
+    def __init__(self, matrix: "PriceMatrix"):
+        self._matrix = matrix
+        self.entities = matrix.entities
+        self.dates = matrix.dates.to_numpy()
+        self._n = len(self.entities)
+        self._last = matrix.column("last_row")
+        self._next = matrix.column("next_row")
+
+    @cached_property
+    def calendar(self) -> TradingCalendar:
+        """Trading calendar over every date present in the matrix."""
+        return TradingCalendar(self.dates)
+
+    def codes(self, entity_ids) -> np.ndarray:
+        entity_ids = np.asarray(entity_ids, dtype=object)
+        return self.entities.get_indexer(entity_ids.ravel()).reshape(entity_ids.shape)
+
+    def rows(self, entity_ids, dates, side: str = "before") -> np.ndarray:
+        """
+        Row positions for broadcastable entity/date arrays, -1 where missing.
+
+        side="before" finds the last row on or before each date;
+        side="after" finds the first row on or after it.
+        """
+        cols = self.codes(entity_ids)
+        dates = np.asarray(dates, dtype="datetime64[ns]")
+        cols, dates = np.broadcast_arrays(cols, dates)
+
+        valid = (cols >= 0) & ~np.isnat(dates)
+
+        if side == "before":
+            pos = np.searchsorted(self.dates, dates, side="right") - 1
+            valid &= pos >= 0
+            found = self._last[np.maximum(pos, 0), np.maximum(cols, 0)]
+        elif side == "after":
+            pos = np.searchsorted(self.dates, dates, side="left")
+            valid &= pos < len(self.dates)
+            found = self._next[np.minimum(pos, len(self.dates) - 1), np.maximum(cols, 0)]
+        else:
+            raise ValueError(f"side must be 'before' or 'after', got {side!r}")
+
+        if not len(self.dates):
+            valid[...] = False
+        valid &= found >= 0
+
+        return np.where(valid, found.astype(np.int64) * self._n + cols, -1)
+
+    def take(self, rows: np.ndarray, column: str = "close") -> np.ndarray:
+        values = self._matrix.flat(column)[np.maximum(rows, 0)].astype("float64")
+        return np.where(rows >= 0, values, np.nan)
+
+    def take_dates(self, rows: np.ndarray) -> np.ndarray:
+        found = self.dates[np.maximum(rows, 0) // max(self._n, 1)]
+        return np.where(rows >= 0, found, np.datetime64("NaT"))
+
+    def lookup(self, entity_ids, dates, column: str = "close", side: str = "before"):
+        """Return (row dates, values) for each entity/date pair."""
+        rows = self.rows(entity_ids, dates, side=side)
+        return self.take_dates(rows), self.take(rows, column)
+
+
+class PriceMatrix:
+    """
+    Read-only view of a published matrix directory.
+
+    Files are mapped on first use; nothing is copied into the process until
+    a query gathers from them, and those pages are shared with every other
+    process mapping the same build.
+    """
+
+    def __init__(self, path: Path = PRICE_MATRIX_DIR):
+        self.path = Path(path)
+        self.meta = json.loads((self.path / MATRIX_META_FILE).read_text())
+        self.dates = pd.DatetimeIndex(np.load(self.path / "dates.npy"))
+        self.entities = pd.Index(np.load(self.path / "entities.npy").astype(object))
+        self._columns = {}
+
+    def column(self, name: str) -> np.ndarray:
+        """(dates x entities) memory map of a price or row-index matrix."""
+        if name not in self._columns:
+            self._columns[name] = np.load(self.path / f"{name}.npy", mmap_mode="r")
+        return self._columns[name]
+
+    def flat(self, name: str) -> np.ndarray:
+        return self.column(name).reshape(-1)
+
+    def frame(self, column: str = "close", entity_ids=None, start=None, end=None) -> pd.DataFrame:
+        """Dates x entities frame of one column, copied for the requested block only."""
+        lo = 0 if start is None else self.dates.searchsorted(pd.Timestamp(start), "left")
+        hi = len(self.dates) if end is None else self.dates.searchsorted(pd.Timestamp(end), "right")
+
+        values = self.column(column)[lo:hi]
+        entities = self.entities
+        if entity_ids is not None:
+            entities = pd.Index(list(entity_ids))
+            cols = self.entities.get_indexer(entities)
+            values = np.where(cols >= 0, values[:, np.maximum(cols, 0)], np.nan)
+
+        return pd.DataFrame(np.array(values), index=self.dates[lo:hi], columns=entities)
+
+
+class MatrixStore:
+    """
+    The PriceStore interface that pages 1-8 use (entity lists, dates,
+    per-entity history and as-of lookups), served from a PriceMatrix.
+    Row-level access (prices, bounds, select) stays on PriceStore.
+
+    `tail` holds price rows dated after the matrix, such as daily segments
+    published since it was built; they are overlaid on every lookup.
+    """
+
+    def __init__(self, matrix: PriceMatrix, codes=None, tail: pd.DataFrame = None):
+        self.matrix = matrix
+        self.tail = tail if tail is not None and len(tail) else None
+
+        entities = matrix.entities
+        if self.tail is not None:
+            entities = entities.append(
+                pd.Index(self.tail["entity_id"].unique()).difference(entities, sort=False)
+            )
+        self._entities = entities
+        self.codes = (codes or get_entity_codes()).with_ids(entities)
+
+    @cached_property
+    def asof(self):
+        base = MatrixAsOf(self.matrix)
+        if self.tail is None:
+            return base
+
+        tail = self.tail
+        columns = {c: tail[c].to_numpy() for c in self.matrix.meta["columns"] if c in tail}
+        return AppendedAsOf(base, AsOfIndex(tail["entity_id"], tail["date"].to_numpy(), columns))
+
+    @property
+    def entity_ids(self) -> list:
+        return self._entities.tolist()
+
+    @cached_property
+    def index_ids(self) -> list:
+        codes = self.codes.encode(self._entities)
+        return self._entities[self.codes.is_index[codes]].tolist()
+
+    @cached_property
+    def stock_ids(self) -> list:
+        codes = self.codes.encode(self._entities)
+        return self._entities[self.codes.is_stock[codes]].tolist()
+
+    @cached_property
+    def dates(self) -> pd.DatetimeIndex:
+        if self.tail is None:
+            return self.matrix.dates
+        return self.matrix.dates.union(pd.DatetimeIndex(self.tail["date"].unique()))
+
+    @property
+    def max_date(self) -> pd.Timestamp:
+        return self.dates[-1]
+
+    def history(self, entity_id: str) -> pd.DataFrame:
+        columns = ["date", "entity_id", *self.matrix.meta["columns"]]
+        col = self.matrix.entities.get_indexer([entity_id])[0]
+
+        if col < 0:
+            df = pd.DataFrame(columns=columns)
+        else:
+            positions = np.arange(len(self.matrix.dates))
+            present = self.matrix.column("last_row")[:, col] == positions
+
+            df = pd.DataFrame({"date": self.matrix.dates[present], "entity_id": entity_id})
+            for c in self.matrix.meta["columns"]:
+                df[c] = self.matrix.column(c)[present, col]
+
+        if self.tail is not None:
+            tail = self.tail.loc[self.tail["entity_id"] == entity_id, columns]
+            if len(tail):
+                df = pd.concat([df, tail], ignore_index=True)
+        return df
+
+
+def _overlay_segments(meta: dict, source: Path) -> list:
+    built_with = set(meta.get("segments", []))
+    return [f for f in price_segments(source) if f.name not in built_with]
+
+
+def matrix_available(path: Path = PRICE_MATRIX_DIR, source: Path = PRICE_FILE) -> bool:
+    """
+    True if a matrix is published and built from the current `source`, when
+    there is one. Segments appended since the build are overlaid, so they
+    do not make it stale.
+    """
+    meta_file = Path(path) / MATRIX_META_FILE
+    if not meta_file.exists():
+        return False
+    if not Path(source).exists():
+        return True
+
+    meta = json.loads(meta_file.read_text())
+    current = {f.name for f in price_segments(source)}
+    return meta.get("source") == source_stamp(source) and set(meta.get("segments", [])) <= current
+
+
+@lru_cache(maxsize=2)
+def _open_matrix_store(path: Path, built_at: str, segments: tuple = ()) -> MatrixStore:
+    with span("open price matrix"):
+        tail = load_price_segments(segments) if segments else None
+        return MatrixStore(PriceMatrix(path), tail=tail)
+
+
+def get_shared_store(path: Path = PRICE_MATRIX_DIR, source: Path = PRICE_FILE):
+    """
+    The memory-mapped MatrixStore, with any newer daily segments overlaid,
+    when a current matrix is published; otherwise the process's PriceStore
+    for `source`.
+    """
+    path = Path(path)
+    if not matrix_available(path, source):
+        return get_price_store(source)
+
+    meta = json.loads((path / MATRIX_META_FILE).read_text())
+    segments = tuple(_overlay_segments(meta, source)) if Path(source).exists() else ()
+    return _open_matrix_store(path, meta["built_at"], segments)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", type=Path, default=PRICE_MATRIX_DIR)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    # Every column at full precision, whatever RTA_PRICE_STORE the servers use
+    meta = build_price_matrix(PriceStore.load(mode="full"), args.out)
+    elapsed = time.perf_counter() - started
+
+    size = sum(f.stat().st_size for f in args.out.iterdir())
+    print(
+        f"Wrote {meta['dates']:,} dates x {meta['entities']:,} entities "
+        f"({size / 2**20:,.0f} MiB) to {args.out} in {elapsed:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Report the memory the price store holds per column against a budget.
+
+    python -m data_access.price_memory [--mode full|compact] [--budget-mib N] [--entities N] [--years N]
+
+Loads the store the way a server worker does (RTA_PRICE_STORE unless --mode
+is given) and lists the bytes of every price column and as-of index array,
+with its share of the budget. Each component is also scaled by its bytes per
+row to a universe of --entities entities over --years years of sessions, the
+size the store must fit in one worker. Exits non-zero when either total is
+over budget.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+from data_access.price_store import PRICE_FILE, PRICE_STORE_MODES, PriceStore, selected_store_mode
+
+# What one server worker may spend on the price store
+PRICE_MEMORY_BUDGET_MIB = 2048
+SESSIONS_PER_YEAR = 252
+
+
+def memory_report(store: PriceStore, budget_mib: float, projected_rows: int = None) -> pd.DataFrame:
+    """
+    MiB and share of the budget per component of the store and, given
+    projected_rows, the same scaled to a store of that many rows.
+    """
+    usage = store.memory_usage().set_index("component")
+    mib = usage["bytes"] / 2**20
+    out = pd.DataFrame({"dtype": usage["dtype"], "MiB": mib, "% budget": mib / budget_mib * 100})
+    if projected_rows is not None:
+        projected = mib * projected_rows / max(len(store.prices), 1)
+        out["projected MiB"] = projected
+        out["projected % budget"] = projected / budget_mib * 100
+    out.loc["total"] = out.drop(columns="dtype").sum()
+    out.loc["total", "dtype"] = ""
+    return out.round(1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--source", type=Path, default=PRICE_FILE)
+    parser.add_argument("--mode", choices=PRICE_STORE_MODES, default=None)
+    parser.add_argument("--budget-mib", type=float, default=PRICE_MEMORY_BUDGET_MIB)
+    parser.add_argument("--entities", type=int, default=5000)
+    parser.add_argument("--years", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    mode = args.mode or selected_store_mode()
+    store = PriceStore.load(args.source, mode=mode)
+    projected_rows = args.entities * args.years * SESSIONS_PER_YEAR
+    report = memory_report(store, args.budget_mib, projected_rows)
+
+    with pd.option_context("display.width", 200):
+        print(report.to_string())
+    if store.constants:
+        print(f"Constant columns: {store.constants}")
+
+    total = report.loc["total"]
+    print(
+        f"{mode} store: {len(store.prices):,} rows in {total['MiB']:,.1f} MiB, "
+        f"{args.entities:,} entities x {args.years} years ({projected_rows:,} rows) in "
+        f"{total['projected MiB']:,.1f} MiB of a {args.budget_mib:,.0f} MiB budget"
+    )
+    if max(total["MiB"], total["projected MiB"]) > args.budget_mib:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
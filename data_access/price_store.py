@@ -0,0 +1,426 @@
+import hashlib
+import os
+import shutil
+import threading
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from data_access.asof import AsOfIndex
+from data_access.entity_codes import TYPE_PREFIXES, EntityCodes, get_entity_codes
+from data_access.profiling import span
+
+PRICE_FILE = Path("data/processed/price_history.parquet")
+
+# Small row groups over the (entity_id, date) order keep one entity's rows
+# in one or two groups, so entity filters skip nearly the whole file
+PRICE_ROW_GROUP = 16_384
+PRICE_SORT_COLUMNS = [("entity_id", "ascending"), ("date", "ascending")]
+PRICE_COLUMNS = ("open", "high", "low", "close", "volume")
+BAR_COLUMNS = ("open", "high", "low", "close")
+
+# Deployments opt into the compact store with RTA_PRICE_STORE=compact. Only
+# the columns the pages read are loaded and prices are held as float32, whose
+# seven significant digits can move returns in their last digits. A column
+# holding a single value is dropped into PriceStore.constants, and one mostly
+# filled with zeros or NaN, like index volume, is stored sparse.
+PRICE_STORE_ENV = "RTA_PRICE_STORE"
+PRICE_STORE_MODES = ("full", "compact")
+COMPACT_COLUMNS = ("close",)
+
+# Sparse cells cost a float32 value plus an int32 position, so a column is
+# stored sparse once its fill value covers more than half the rows
+SPARSE_FILL_SHARE = 0.5
+
+
+def price_segments_dir(path: Path = PRICE_FILE) -> Path:
+    """Directory of daily segments appended to `path` since its last full build."""
+    path = Path(path)
+    return path.with_name(path.stem + "_appends")
+
+
+def price_segments(path: Path = PRICE_FILE) -> list:
+    """Published daily segments of `path`, oldest first."""
+    seg_dir = price_segments_dir(path)
+    if not seg_dir.is_dir():
+        return []
+    # In-progress writes carry a leading underscore
+    return sorted(f for f in seg_dir.glob("*.parquet") if not f.name.startswith("_"))
+
+
+def price_files(path: Path = PRICE_FILE) -> list:
+    return [Path(path), *price_segments(path)]
+
+
+def source_stamp(path: Path = PRICE_FILE) -> dict:
+    """Size and mtime of the base file, which derived stores record to detect a rebuild."""
+    stat = Path(path).stat()
+    return {"path": str(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def price_version(path: Path = PRICE_FILE) -> str:
+    """
+    Short ID of the published price data, changing whenever the base file
+    is rebuilt or a daily segment is appended.
+    """
+    stamps = []
+    for f in price_files(path):
+        stat = f.stat()
+        stamps.append(f"{f.name}:{stat.st_size}:{stat.st_mtime_ns}")
+    return hashlib.sha1("|".join(stamps).encode()).hexdigest()[:16]
+
+
+def selected_store_mode() -> str:
+    mode = os.environ.get(PRICE_STORE_ENV, "full").strip().lower() or "full"
+    if mode not in PRICE_STORE_MODES:
+        raise ValueError(f"{PRICE_STORE_ENV} must be one of {PRICE_STORE_MODES}, got {mode!r}")
+    return mode
+
+
+def load_price_history(path: Path = PRICE_FILE, columns=None) -> pd.DataFrame:
+    """The base file plus every published daily segment, optionally only some price columns."""
+    if columns is not None:
+        columns = list(dict.fromkeys(["entity_id", "date", *columns]))
+    return _read_files(price_files(path), columns=columns)
+
+
+def load_price_segments(segments) -> pd.DataFrame:
+    return _read_files(list(segments))
+
+
+def read_prices(
+    entity_ids=None,
+    start=None,
+    end=None,
+    columns=None,
+    entity_type: str = None,
+    path: Path = PRICE_FILE,
+) -> pd.DataFrame:
+    """
+    Price rows matching every given filter, sorted by (entity_id, date).
+
+    Filters and the column list are pushed down to the parquet reader,
+    which skips row groups whose entity_id / date statistics cannot match.
+    entity_type ("INDEX" or "STOCK") selects by ID prefix. entity_id and
+    date are always returned.
+    """
+    filters = []
+
+    if entity_ids is not None:
+        filters.append(("entity_id", "in", list(entity_ids)))
+    if entity_type is not None:
+        prefix = {t: p for p, t in TYPE_PREFIXES.items()}[entity_type]
+        filters += [
+            ("entity_id", ">=", prefix),
+            ("entity_id", "<", prefix[:-1] + chr(ord(prefix[-1]) + 1)),
+        ]
+
+    tz = pq.read_schema(path).field("date").type.tz
+    if start is not None:
+        filters.append(("date", ">=", _file_time(start, tz)))
+    if end is not None:
+        filters.append(("date", "<=", _file_time(end, tz)))
+
+    if columns is not None:
+        columns = list(dict.fromkeys(["entity_id", "date", *columns]))
+
+    return _read_files(price_files(path), filters=filters or None, columns=columns)
+
+
+def _read_files(files: list, **kwargs) -> pd.DataFrame:
+    with span("read parquet") as read:
+        df = pd.read_parquet(files if len(files) > 1 else files[0], **kwargs)
+        if len(files) > 1:
+            # A full rebuild interrupted before clearing the segments can leave
+            # a session in both; the segment is the later write
+            df = df.drop_duplicates(["entity_id", "date"], keep="last")
+        read.rows = len(df)
+
+    with span("normalize dates", rows=len(df)):
+        return _normalized(df)
+
+
+def _file_time(value, tz) -> pd.Timestamp:
+    # Older builds stored exchange-local timestamps; compare in their zone
+    value = pd.Timestamp(value)
+    return value.tz_localize(tz) if tz is not None else value
+
+
+def write_price_history(prices: pd.DataFrame, path: Path = PRICE_FILE):
+    """
+    Write `prices` in the sorted, small-row-group layout, replacing `path`
+    atomically. `prices` is the full history, so daily segments are dropped.
+    """
+    if not _is_sorted(prices):
+        prices = prices.sort_values(["entity_id", "date"], kind="stable")
+
+    table = pa.Table.from_pandas(prices, preserve_index=False)
+    table = table.set_column(
+        table.schema.get_field_index("entity_id"), "entity_id",
+        table.column("entity_id").cast(pa.string()),
+    )
+
+    path = Path(path)
+    tmp_path = path.with_suffix(".parquet.tmp")
+    pq.write_table(
+        table,
+        tmp_path,
+        compression="zstd",
+        row_group_size=PRICE_ROW_GROUP,
+        sorting_columns=pq.SortingColumn.from_ordering(table.schema, PRICE_SORT_COLUMNS),
+    )
+    os.replace(tmp_path, path)
+    shutil.rmtree(price_segments_dir(path), ignore_errors=True)
+
+
+def append_price_segment(day: pd.DataFrame, path: Path = PRICE_FILE) -> Path:
+    """
+    Publish one session's rows as a daily segment of `path`. The segment
+    appears in a single rename, so readers see all of the session or none.
+    """
+    dates = pd.DatetimeIndex(day["date"].unique())
+    if len(dates) != 1:
+        raise ValueError(f"a segment holds one session, got {len(dates)}")
+
+    schema = pq.read_schema(path).remove_metadata()
+    day = day.sort_values("entity_id", kind="stable")
+    if schema.field("date").type.tz is not None:
+        day = day.assign(date=day["date"].dt.tz_localize(schema.field("date").type.tz))
+    table = pa.Table.from_pandas(day[schema.names], preserve_index=False).cast(schema)
+
+    seg_dir = price_segments_dir(path)
+    seg_dir.mkdir(parents=True, exist_ok=True)
+    out = seg_dir / f"{dates[0]:%Y%m%d}.parquet"
+    tmp_path = seg_dir / f"_{out.name}.tmp"
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, out)
+    return out
+
+
+def compact_prices(prices: pd.DataFrame, columns=COMPACT_COLUMNS) -> tuple:
+    """
+    (prices, constants): `prices` projected to entity_id, date and
+    `columns`, with prices (not volume) as float32, columns holding one
+    value moved to `constants` and mostly zero or NaN columns made sparse.
+    """
+    out = {"entity_id": prices["entity_id"], "date": prices["date"]}
+    constants = {}
+
+    for c in columns:
+        if c not in prices:
+            continue
+        values = prices[c].to_numpy()
+        if c in BAR_COLUMNS:
+            values = values.astype("float32")
+
+        missing = np.count_nonzero(pd.isna(values))
+        zeros = np.count_nonzero(values == 0)
+        if len(values) and (missing == len(values) or (values == values[0]).all()):
+            constants[c] = np.nan if missing else values[0].item()
+            continue
+
+        if max(zeros, missing) > SPARSE_FILL_SHARE * len(values):
+            values = pd.arrays.SparseArray(values, fill_value=0 if zeros >= missing else np.nan)
+        out[c] = values
+
+    return pd.DataFrame(out, index=prices.index), constants
+
+
+def _normalized(df: pd.DataFrame) -> pd.DataFrame:
+    df["date"] = pd.to_datetime(df["date"])
+    if df["date"].dt.tz is not None:
+        df["date"] = df["date"].dt.tz_localize(None)
+
+    if not _is_sorted(df):
+        df = df.sort_values(["entity_id", "date"], kind="stable")
+
+    return df.reset_index(drop=True)
+
+
+def _is_sorted(df: pd.DataFrame) -> bool:
+    # The build step writes sorted files, so this usually saves the sort
+    ids = df["entity_id"].to_numpy()
+    dates = df["date"].to_numpy()
+
+    same = ids[1:] == ids[:-1]
+    return bool(((ids[1:] > ids[:-1]) | (same & (dates[1:] > dates[:-1]))).all())
+
+
+class PriceStore:
+    """
+    Price history sorted by (entity_id, date) with a slice per entity.
+
+    entity_id is interned as a categorical over `codes`, so the column costs
+    a small integer per row and type filters are integer lookups.
+
+    One instance is shared by every session in the server process, so
+    callers must treat `prices` and anything returned from it as read-only.
+
+    `constants` maps price columns dropped from `prices` because they hold
+    a single value to that value (see compact_prices).
+    """
+
+    def __init__(self, prices: pd.DataFrame, codes: EntityCodes = None, constants: dict = None):
+        ids = np.asarray(prices["entity_id"].to_numpy(), dtype=object)
+        starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])[: len(ids)]
+        stops = np.r_[starts[1:], len(ids)]
+
+        self.codes = (codes or EntityCodes([], [])).with_ids(ids[starts])
+        self._run_codes = self.codes.encode(ids[starts])
+
+        self._prices = prices.assign(
+            entity_id=pd.Categorical.from_codes(
+                np.repeat(self._run_codes, stops - starts), dtype=self.codes.dtype
+            )
+        )
+
+        # Row bounds per code; entities without prices get empty bounds
+        self._starts = np.zeros(len(self.codes), dtype=np.int64)
+        self._stops = np.zeros(len(self.codes), dtype=np.int64)
+        self._starts[self._run_codes] = starts
+        self._stops[self._run_codes] = stops
+
+        self._slices = {
+            ids[start]: slice(int(start), int(stop))
+            for start, stop in zip(starts, stops)
+        }
+        self.constants = dict(constants or {})
+
+    @classmethod
+    def load(cls, path: Path = PRICE_FILE, mode: str = None) -> "PriceStore":
+        """The store for `path`, full or compact as RTA_PRICE_STORE selects unless `mode` is given."""
+        mode = mode or selected_store_mode()
+        if mode == "compact":
+            prices, constants = compact_prices(load_price_history(path, COMPACT_COLUMNS))
+            return cls(prices, get_entity_codes(), constants)
+        return cls(load_price_history(path), get_entity_codes())
+
+    @property
+    def prices(self) -> pd.DataFrame:
+        return self._prices
+
+    @property
+    def entity_ids(self) -> list:
+        return list(self._slices)
+
+    @cached_property
+    def row_codes(self) -> np.ndarray:
+        """Entity code of every price row."""
+        return self._prices["entity_id"].cat.codes.to_numpy()
+
+    @cached_property
+    def index_ids(self) -> list:
+        return self.codes.decode(self._run_codes[self.codes.is_index[self._run_codes]]).tolist()
+
+    @cached_property
+    def stock_ids(self) -> list:
+        return self.codes.decode(self._run_codes[self.codes.is_stock[self._run_codes]]).tolist()
+
+    @cached_property
+    def dates(self) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(np.unique(self._prices["date"].to_numpy()))
+
+    @cached_property
+    def stock_dates(self) -> pd.DatetimeIndex:
+        dates = self._prices["date"].to_numpy()
+        return pd.DatetimeIndex(np.unique(dates[self.codes.is_stock[self.row_codes]]))
+
+    @property
+    def max_date(self) -> pd.Timestamp:
+        return self.dates[-1]
+
+    @cached_property
+    def asof(self) -> AsOfIndex:
+        prices = self._prices
+        return AsOfIndex(
+            prices["entity_id"],
+            prices["date"].to_numpy(),
+            {
+                # Sparse columns stay sparse; AsOfIndex gathers from them directly
+                c: prices[c].array if isinstance(prices[c].dtype, pd.SparseDtype) else prices[c].to_numpy()
+                for c in PRICE_COLUMNS
+                if c in prices
+            },
+        )
+
+    def memory_usage(self) -> pd.DataFrame:
+        """
+        (component, dtype, bytes) per price column and per array of the
+        as-of index, leaving out index arrays that are views of a price
+        column.
+        """
+        rows = [
+            (f"prices.{c}", str(s.dtype), int(s.memory_usage(index=False, deep=True)))
+            for c, s in self._prices.items()
+        ]
+        held = [
+            s.array.sp_values if isinstance(s.dtype, pd.SparseDtype) else s.to_numpy()
+            for _, s in self._prices.items()
+            if isinstance(s.dtype, (np.dtype, pd.SparseDtype))
+        ]
+        for name, values in self.asof.arrays().items():
+            data = values.sp_values if isinstance(values, pd.arrays.SparseArray) else values
+            if not any(np.may_share_memory(data, h) for h in held):
+                rows.append((f"asof.{name}", str(values.dtype), int(values.nbytes)))
+
+        rows.append(("entity bounds", "int64", self._starts.nbytes + self._stops.nbytes))
+        return pd.DataFrame(rows, columns=["component", "dtype", "bytes"])
+
+    def bounds(self, entity_ids):
+        """(starts, stops) row positions per entity; empty for unknown IDs."""
+        codes = self.codes.encode(list(entity_ids))
+        known = codes >= 0
+        return (
+            np.where(known, self._starts[codes], 0),
+            np.where(known, self._stops[codes], 0),
+        )
+
+    def history(self, entity_id: str) -> pd.DataFrame:
+        return self._prices.iloc[self._slices.get(entity_id, slice(0, 0))]
+
+    def select(self, entity_ids) -> pd.DataFrame:
+        slices = [self._slices[e] for e in entity_ids if e in self._slices]
+        if not slices:
+            return self._prices.iloc[0:0]
+
+        rows = np.concatenate([np.arange(s.start, s.stop) for s in slices])
+        return self._prices.iloc[rows]
+
+
+_stores: dict = {}
+_lock = threading.Lock()
+
+
+def get_price_store(path: Path = PRICE_FILE) -> PriceStore:
+    """
+    Return the process-wide store for `path`, loading it on first use and
+    again once a new version is published.
+    """
+    path = Path(path)
+    version = price_version(path)
+
+    cached = _stores.get(path)
+    if cached is None or cached[0] != version:
+        with _lock:
+            cached = _stores.get(path)
+            if cached is None or cached[0] != version:
+                cached = (version, PriceStore.load(path))
+                _stores[path] = cached
+
+    return cached[1]
+
+
+def warm_up(path: Path = PRICE_FILE) -> threading.Thread:
+    """Load the store in the background so the first page view is warm."""
+    thread = threading.Thread(
+        target=get_price_store,
+        args=(path,),
+        name="price-store-warm-up",
+        daemon=True,
+    )
+    thread.start()
+    return thread
@@ -0,0 +1,212 @@
+"""
+Summarize the profiling spans recorded by pages and engines.
+
+    python -m data_access.profiling [--log FILE] [--page NAME]
+
+Spans are opt-in: with RTA_PROFILE=1 every `with span(name):` block records
+its wall time, the rows it reports touching and its tracemalloc peak, the
+most memory allocated through Python and NumPy while it ran above what was
+in use when it opened (Arrow buffers are not traced). Tracing slows
+allocation-heavy code several times over, so profile development runs, not
+production. tracemalloc counts the whole process, so peaks are only right
+while one session runs: a span that overlaps a span on another thread (a
+second session, the store warm-up) records no peak, and allocations made
+outside spans by another thread still inflate one. Spans nest and are named
+by their path, e.g. "p5 sector rank matrix/sector cube/horizon returns".
+Each record is shown in the page's developer sidebar and appended as one
+JSON object per line to data/processed/profile_spans.jsonl (or
+RTA_PROFILE_LOG), which this command aggregates per page and span across
+every session that wrote to it.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from data_access.reference_data import DATA_DIR
+
+PROFILE_ENV = "RTA_PROFILE"
+PROFILE_LOG_ENV = "RTA_PROFILE_LOG"
+PROFILE_LOG = DATA_DIR / "profile_spans.jsonl"
+
+
+def profiling_enabled() -> bool:
+    return os.environ.get(PROFILE_ENV, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def profile_log() -> Path:
+    return Path(os.environ.get(PROFILE_LOG_ENV) or PROFILE_LOG)
+
+
+class Span:
+    """One timed block. Set `rows` inside it to record how many rows it touched."""
+
+    def __init__(self, name: str, rows: int = None):
+        self.name = name
+        self.rows = rows
+        self.seconds = None
+        self.peak_bytes = None
+        # Peak of nested spans, whose tracemalloc.reset_peak hides it
+        self._nested_peak = 0
+        # Set when a span on another thread was open at the same time
+        self._overlapped = False
+
+
+# Streamlit runs each session's script on its own thread, so the open spans
+# and the records of the page being run are kept per thread. A thread's
+# stack is registered in _stacks while it has spans open, to tell when
+# spans on two threads overlap.
+_local = threading.local()
+_log_lock = threading.Lock()
+_stacks: dict = {}
+_stacks_lock = threading.Lock()
+
+
+def _state():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+        _local.page = None
+        _local.records = []
+    return _local
+
+
+def _push(stack: list, current: Span):
+    """Open `current`, marking it and every open span as overlapped if another thread has one open."""
+    with _stacks_lock:
+        stack.append(current)
+        _stacks[threading.get_ident()] = stack
+        if len(_stacks) > 1:
+            for s in _stacks.values():
+                for open_span in s:
+                    open_span._overlapped = True
+
+
+def _pop(stack: list):
+    with _stacks_lock:
+        stack.pop()
+        if not stack:
+            del _stacks[threading.get_ident()]
+
+
+def begin_page(page: str):
+    """Start a page run: spans on this thread are tagged with `page` and listed by page_spans."""
+    state = _state()
+    state.page = page
+    state.records = []
+
+
+@contextmanager
+def span(name: str, rows: int = None):
+    """
+    Time the enclosed block when profiling is enabled; otherwise only hand
+    out the Span, so instrumented code costs next to nothing.
+    """
+    current = Span(name, rows)
+    if not profiling_enabled():
+        yield current
+        return
+
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    state = _state()
+    outer_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+
+    _push(state.stack, current)
+    path = "/".join(s.name for s in state.stack)
+    started_at = datetime.now(timezone.utc)
+    started = time.perf_counter()
+    try:
+        yield current
+    finally:
+        current.seconds = time.perf_counter() - started
+        peak = max(tracemalloc.get_traced_memory()[1], current._nested_peak)
+        current.peak_bytes = None if current._overlapped else max(peak - base, 0)
+
+        _pop(state.stack)
+        if state.stack:
+            parent = state.stack[-1]
+            parent._nested_peak = max(parent._nested_peak, outer_peak, peak)
+        _record(state, path, current, started_at, started)
+
+
+def _record(state, path: str, current: Span, started_at: datetime, started: float):
+    record = {
+        "time": started_at.isoformat(timespec="milliseconds"),
+        "pid": os.getpid(),
+        "page": state.page,
+        "span": path,
+        "seconds": round(current.seconds, 6),
+        "rows": None if current.rows is None else int(current.rows),
+        "peak_bytes": None if current.peak_bytes is None else int(current.peak_bytes),
+    }
+    state.records.append((started, record))
+
+    log = profile_log()
+    line = json.dumps(record) + "\n"
+    with _log_lock:
+        log.parent.mkdir(parents=True, exist_ok=True)
+        with open(log, "a") as f:
+            f.write(line)
+
+
+def page_spans() -> pd.DataFrame:
+    """Spans recorded on this thread since begin_page, in the order they opened."""
+    records = pd.DataFrame(
+        [record for _, record in sorted(_state().records, key=lambda r: r[0])],
+        columns=["time", "span", "seconds", "rows", "peak_bytes"],
+    )
+    return pd.DataFrame({
+        "span": records["span"],
+        "ms": (records["seconds"] * 1000).round(1),
+        "rows": records["rows"].astype("Int64"),
+        "peak MiB": (records["peak_bytes"] / 2**20).round(1),
+    }).reset_index(drop=True)
+
+
+def read_span_log(path: Path = None) -> pd.DataFrame:
+    path = Path(path or profile_log())
+    if not path.exists() or not path.stat().st_size:
+        return pd.DataFrame(columns=["time", "pid", "page", "span", "seconds", "rows", "peak_bytes"])
+    return pd.read_json(path, lines=True, dtype={"page": "string", "span": "string"})
+
+
+def summarize_spans(spans: pd.DataFrame) -> pd.DataFrame:
+    """Runs, wall time percentiles, median rows and the largest peak per (page, span), costliest first."""
+    grouped = spans.assign(page=spans["page"].fillna("")).groupby(["page", "span"], sort=False)
+    out = pd.DataFrame({
+        "runs": grouped.size(),
+        "total_s": grouped["seconds"].sum(),
+        "median_ms": grouped["seconds"].median() * 1000,
+        "p95_ms": grouped["seconds"].quantile(0.95) * 1000,
+        "median_rows": grouped["rows"].median(),
+        "max_peak_mib": grouped["peak_bytes"].max() / 2**20,
+    })
+    return out.sort_values("total_s", ascending=False).round(1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--log", type=Path, default=None)
+    parser.add_argument("--page", default=None)
+    args = parser.parse_args(argv)
+
+    spans = read_span_log(args.log)
+    if args.page is not None:
+        spans = spans[spans["page"] == args.page]
+
+    with pd.option_context("display.width", 200, "display.max_rows", None, "display.max_colwidth", 80):
+        print(summarize_spans(spans).to_string())
+    print(f"{len(spans):,} spans from {spans['pid'].nunique():,} processes in {args.log or profile_log()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from data_access.price_store import PRICE_FILE, source_stamp
+
+RANK_HISTORY_DIR = Path("data/processed/rank_history")
+
+# Hive partition keys; every file holds one index for one calendar year
+PARTITION_COLUMNS = ["index_entity_id", "year"]
+
+# Build stamp of the price file the ranks were computed from. Parquet
+# readers skip files with a leading underscore.
+RANK_META_FILE = "_meta.json"
+
+
+def rank_history_available(path: Path = RANK_HISTORY_DIR, source: Path = PRICE_FILE) -> bool:
+    """
+    True if a history is published and built from the current `source`, when
+    there is one. Appended sessions add their own rank files, so daily
+    segments do not make it stale; a rebuilt or corrected base file does.
+    """
+    meta_file = Path(path) / RANK_META_FILE
+    if not meta_file.exists():
+        return False
+    if not Path(source).exists():
+        return True
+    return json.loads(meta_file.read_text()).get("source") == source_stamp(source)
+
+
+def read_rank_history(
+    index_id: str,
+    start=None,
+    end=None,
+    dates=None,
+    columns=None,
+    path: Path = RANK_HISTORY_DIR,
+) -> pd.DataFrame:
+    """
+    Materialized ranks for one index, optionally limited to a date range or
+    an explicit list of dates. Filters are pushed down to the partition and
+    row-group level, so only the matching files are opened.
+    """
+    filters = [("index_entity_id", "==", index_id)]
+
+    if start is not None:
+        start = pd.Timestamp(start)
+        filters += [("year", ">=", start.year), ("date", ">=", start)]
+    if end is not None:
+        end = pd.Timestamp(end)
+        filters += [("year", "<=", end.year), ("date", "<=", end)]
+    if dates is not None:
+        dates = pd.DatetimeIndex(dates)
+        filters += [
+            ("year", "in", sorted(set(dates.year))),
+            ("date", "in", list(dates)),
+        ]
+
+    df = pd.read_parquet(path, filters=filters, columns=columns)
+    return df.drop(columns=PARTITION_COLUMNS, errors="ignore")
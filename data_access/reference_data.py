@@ -0,0 +1,19 @@
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+
+DATA_DIR = Path("data/processed")
+ENTITY_FILE = DATA_DIR / "entity_master.parquet"
+CONSTITUENT_FILE = DATA_DIR / "index_constituents_map.parquet"
+
+
+# Both frames are shared across sessions; treat them as read-only.
+@lru_cache(maxsize=None)
+def load_entity_master(path: Path = ENTITY_FILE) -> pd.DataFrame:
+    return pd.read_parquet(path)
+
+
+@lru_cache(maxsize=None)
+def load_constituents_map(path: Path = CONSTITUENT_FILE) -> pd.DataFrame:
+    return pd.read_parquet(path)
@@ -0,0 +1,201 @@
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_access.constituent_history import CONSTITUENT_HISTORY_FILE, membership_version
+from data_access.price_store import PRICE_FILE, price_version
+from data_access.profiling import span
+from data_access.reference_data import CONSTITUENT_FILE, DATA_DIR
+
+# Page results are cached per dataset version and query parameters, in a
+# per-process memory tier in front of a disk tier shared by every process
+# and kept across restarts. Both tiers evict least recently used entries
+# past their byte budget. Entry files are named <version>-<key>.pkl, so a
+# newly published version makes earlier entries unreachable. The memory
+# tier is cleared when a process sees a new version; on disk, earlier
+# versions age out through eviction, since replicas still on the old
+# version during a publish keep reading and writing theirs.
+RESULT_CACHE_DIR = DATA_DIR / "result_cache"
+MEMORY_BUDGET = 256 * 2**20
+DISK_BUDGET = 2 * 2**30
+
+# Part of every key; bump it when a cached page's output changes shape
+RESULT_FORMAT = 1
+
+
+def dataset_version(prices: Path = PRICE_FILE, membership: Path = CONSTITUENT_HISTORY_FILE) -> str:
+    """
+    Short ID of everything the pages read: the published prices and
+    the membership history, or today's constituent map when no history
+    has been recorded.
+    """
+    # The same stamp get_membership_history reloads on, so a result is never
+    # computed from an older membership than the version it is stored under
+    stamps = [price_version(prices), membership_version(membership, CONSTITUENT_FILE)]
+    return hashlib.sha1("|".join(stamps).encode()).hexdigest()[:16]
+
+
+def _canonical(value):
+    """A repr-stable form of a query parameter."""
+    if isinstance(value, (pd.Timestamp, np.datetime64)) or hasattr(value, "isoformat"):
+        return pd.Timestamp(value).isoformat()
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _canonical(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset, pd.Index, np.ndarray)):
+        items = [_canonical(v) for v in value]
+        return tuple(sorted(items) if isinstance(value, (set, frozenset)) else items)
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def cache_key(page: str, params: dict) -> str:
+    return hashlib.sha1(repr((RESULT_FORMAT, page, _canonical(params))).encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier LRU cache of picklable results.
+
+    The memory tier is an OrderedDict of pickled payloads, so both tiers
+    count the same bytes and a hit hands out a fresh copy that callers may
+    modify. Disk entries are written aside and renamed into place, and a
+    disk hit refreshes the file's mtime, which orders eviction.
+    """
+
+    def __init__(self, path: Path = RESULT_CACHE_DIR, memory_budget: int = MEMORY_BUDGET, disk_budget: int = DISK_BUDGET):
+        self.path = Path(path)
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _file(self, version: str, key: str) -> Path:
+        return self.path / f"{version}-{key}.pkl"
+
+    def _entries(self) -> list:
+        """(mtime, size, path) of every disk entry, oldest first."""
+        entries = []
+        for f in self.path.glob("*.pkl"):
+            try:
+                stat = f.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, f))
+        return sorted(entries)
+
+    def _switch_version(self, version: str):
+        """Drop the memory tier, once per version change."""
+        if version == self._version:
+            return
+        self._memory.clear()
+        self._memory_bytes = 0
+        self._version = version
+
+    def _remember(self, version: str, key: str, payload: bytes):
+        # A result computed under a version replaced meanwhile is not kept
+        if version != self._version:
+            return
+        if (version, key) in self._memory:
+            self._memory_bytes -= len(self._memory.pop((version, key)))
+        if len(payload) > self.memory_budget:
+            return
+        self._memory[version, key] = payload
+        self._memory_bytes += len(payload)
+        while self._memory_bytes > self.memory_budget:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _read(self, version: str, key: str):
+        f = self._file(version, key)
+        try:
+            payload = f.read_bytes()
+            os.utime(f)
+        except FileNotFoundError:
+            return None
+        return payload
+
+    def _write(self, version: str, key: str, payload: bytes):
+        if len(payload) > self.disk_budget:
+            return
+        self.path.mkdir(parents=True, exist_ok=True)
+        f = self._file(version, key)
+        tmp = f.with_name(f"_{f.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(payload)
+        os.replace(tmp, f)
+
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, old in entries:
+            if total <= self.disk_budget:
+                break
+            old.unlink(missing_ok=True)
+            total -= size
+
+    def get_or_compute(self, page: str, params: dict, compute, version: str = None):
+        """
+        The cached result of `compute()` for page and params under the
+        current dataset version, computing and storing it on a miss.
+        """
+        version = version or dataset_version()
+        key = cache_key(page, params)
+
+        with self._lock:
+            self._switch_version(version)
+            payload = self._memory.get((version, key))
+            if payload is not None:
+                self._memory.move_to_end((version, key))
+
+        if payload is None:
+            payload = self._read(version, key)
+            if payload is not None:
+                with self._lock:
+                    self._remember(version, key, payload)
+
+        if payload is not None:
+            try:
+                return pickle.loads(payload)
+            except Exception:
+                # A truncated or stale entry is recomputed and replaced
+                pass
+
+        with span("cache miss"):
+            result = compute()
+        payload = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._remember(version, key, payload)
+        self._write(version, key, payload)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            for _, _, f in self._entries():
+                f.unlink(missing_ok=True)
+
+
+_caches: dict = {}
+_caches_lock = threading.Lock()
+
+
+def get_result_cache(path: Path = RESULT_CACHE_DIR) -> ResultCache:
+    """The process-wide cache over `path`."""
+    path = Path(path)
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = ResultCache(path)
+        return _caches[path]
+
+
+def cached_result(page: str, params: dict, compute, path: Path = RESULT_CACHE_DIR):
+    """get_or_compute on the process-wide cache under the current dataset version."""
+    return get_result_cache(path).get_or_compute(page, params, compute)
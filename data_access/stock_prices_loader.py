@@ -0,0 +1,12 @@
+from pathlib import Path
+
+import pandas as pd
+
+from data_access.index_prices_loader import read_price_csv
+
+
+def load_stock_prices_from_csv(path: str) -> pd.DataFrame:
+    """Read one per-symbol file; the symbol is taken from the file name."""
+    df = read_price_csv(path)
+    df["symbol"] = Path(path).stem
+    return df
@@ -0,0 +1,104 @@
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+# Horizon label -> calendar lookback, shared by every page
+HORIZONS = {
+    "1W": pd.DateOffset(weeks=1),
+    "1M": pd.DateOffset(months=1),
+    "3M": pd.DateOffset(months=3),
+    "6M": pd.DateOffset(months=6),
+    "1Y": pd.DateOffset(years=1),
+}
+
+
+class TradingCalendar:
+    """
+    Sorted trading sessions with horizon lookbacks resolved to positions.
+
+    Any date maps to the last session on or before it; from there each
+    horizon start is a precomputed position, so horizon lookups for many
+    dates are plain integer indexing.
+    """
+
+    def __init__(self, sessions):
+        self.sessions = pd.DatetimeIndex(np.unique(np.asarray(sessions, dtype="datetime64[ns]")))
+        self._values = self.sessions.to_numpy()
+        self._lookbacks = {}
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def position(self, dates, side: str = "before") -> np.ndarray:
+        """
+        Session position per date, -1 where there is none.
+
+        side="before" gives the last session on or before each date;
+        side="after" gives the first session on or after it.
+        """
+        dates = np.asarray(dates, dtype="datetime64[ns]")
+
+        if side == "before":
+            pos = np.searchsorted(self._values, dates, side="right") - 1
+        elif side == "after":
+            pos = np.searchsorted(self._values, dates, side="left")
+            pos = np.where(pos < len(self._values), pos, -1)
+        else:
+            raise ValueError(f"side must be 'before' or 'after', got {side!r}")
+
+        return np.where(np.isnat(dates), -1, pos)
+
+    def session(self, positions) -> np.ndarray:
+        """Session dates for positions, NaT where the position is -1."""
+        positions = np.asarray(positions)
+        if not len(self._values):
+            return np.full(positions.shape, np.datetime64("NaT"), "datetime64[ns]")
+        found = self._values[np.maximum(positions, 0)]
+        return np.where(positions >= 0, found, np.datetime64("NaT"))
+
+    def lookback(self, horizon: str, side: str = "before") -> np.ndarray:
+        """
+        Position of the horizon start for every session.
+
+        side="before" is the last session on or before session - horizon
+        (-1 when that precedes the calendar); side="after" is the first
+        session on or after it, so the window is clipped to the calendar.
+        """
+        key = (horizon, side)
+        if key not in self._lookbacks:
+            targets = self.sessions - HORIZONS[horizon]
+            self._lookbacks[key] = self.position(targets, side=side)
+        return self._lookbacks[key]
+
+    def horizon_start(self, dates, horizon: str, side: str = "before") -> np.ndarray:
+        """
+        Horizon start session for each date, anchored on the last session on
+        or before the date. NaT where either end is outside the calendar.
+        """
+        anchor = self.position(dates)
+        start = np.where(anchor >= 0, self.lookback(horizon, side)[np.maximum(anchor, 0)], -1)
+        return self.session(start)
+
+    def _period_ends(self, freq: str) -> pd.DatetimeIndex:
+        if not len(self.sessions):
+            return self.sessions
+
+        periods = self.sessions.to_period(freq)
+        ends = self.sessions[np.r_[periods[1:] != periods[:-1], True]]
+
+        # The trailing period only counts once its last weekday has traded
+        last_weekday = pd.offsets.BDay().rollback(periods[-1].end_time.normalize())
+        if ends[-1] < last_weekday:
+            ends = ends[:-1]
+        return ends
+
+    @cached_property
+    def week_ends(self) -> pd.DatetimeIndex:
+        """Last session of each Monday-Sunday week, so holiday Fridays fall back to Thursday."""
+        return self._period_ends("W")
+
+    @cached_property
+    def month_ends(self) -> pd.DatetimeIndex:
+        """Last session of each calendar month."""
+        return self._period_ends("M")
@@ -0,0 +1,133 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+
+from analytics.dashboards import NIFTY_50, page_rank_map, page_rank_trajectory
+from analytics.rank_trajectories import get_rank_cube
+from data_access.constituent_history import get_membership_history
+from data_access.price_matrix import get_shared_store
+from data_access.profiling import begin_page, page_spans, profiling_enabled, span
+
+# -------------------------------------------------
+# PAGE CONFIG
+# -------------------------------------------------
+st.set_page_config(
+    page_title="RTA | Rank Trajectory Maps",
+    layout="wide"
+)
+
+MAP_FREQUENCIES = {
+    "Weekly": "week_ends",
+    "Monthly": "month_ends",
+    "Daily": None,
+}
+
+# -------------------------------------------------
+# SIDEBAR — INDEX AND WINDOW
+# -------------------------------------------------
+begin_page("p10 rank trajectory maps")
+
+with span("load data"):
+    membership = get_membership_history()
+    store = get_shared_store()
+
+st.sidebar.header("Controls")
+
+# Only indices with a price history can be ranked against
+index_ids = sorted(set(membership.index_ids) & set(store.index_ids))
+if not index_ids:
+    st.warning("No index with constituents has price history.")
+    st.stop()
+
+selected_index = st.sidebar.selectbox(
+    "Select Index",
+    index_ids,
+    index=index_ids.index(NIFTY_50) if NIFTY_50 in index_ids else 0
+)
+
+# Ranks for every session of the index's history, computed once per version
+with span("rank cube") as cube_span:
+    cube = get_rank_cube(selected_index)
+    cube_span.rows = cube.rank.size
+
+first_date, last_date = cube.dates[0].date(), cube.dates[-1].date()
+start_date, end_date = st.sidebar.slider(
+    "Window",
+    min_value=first_date,
+    max_value=last_date,
+    value=(max(first_date, (cube.dates[-1] - pd.DateOffset(years=2)).date()), last_date),
+    format="MMM YYYY"
+)
+
+view = st.sidebar.radio("View", ["Stock trajectory", "Rank map"])
+
+st.title("Rank Trajectory Maps")
+
+# -------------------------------------------------
+# STOCK TRAJECTORY
+# -------------------------------------------------
+if view == "Stock trajectory":
+    stocks = cube.rank_map(start_date, end_date, "month_ends").index.tolist() or cube.stock_ids.tolist()
+    selected_stock = st.sidebar.selectbox("Select Stock", sorted(stocks))
+
+    with span("stock trajectory") as trajectory_span:
+        trajectory = page_rank_trajectory(cube, selected_stock, start_date, end_date)
+        trajectory_span.rows = len(trajectory)
+
+    if trajectory.empty:
+        st.warning("The stock was not ranked in this window.")
+        st.stop()
+
+    st.caption(
+        f"{selected_stock.replace('STK_', '')} in {selected_index.replace('IDX_', '')} | "
+        f"{start_date} to {end_date} | Rank 1 = strongest return relative to the index, "
+        "on the dates the stock was a member"
+    )
+
+    fig = px.line(
+        trajectory.reset_index().melt("date", var_name="Rank", value_name="Value"),
+        x="date",
+        y="Value",
+        color="Rank"
+    )
+    fig.update_yaxes(autorange="reversed", title="Rank")
+    fig.update_layout(height=460, margin=dict(t=20, l=20, r=20, b=20), xaxis_title="")
+
+    with span("plotly chart", rows=len(trajectory)):
+        st.plotly_chart(fig, use_container_width=True)
+
+# -------------------------------------------------
+# RANK MAP
+# -------------------------------------------------
+else:
+    frequency = st.sidebar.selectbox("Sessions", list(MAP_FREQUENCIES))
+    with span("rank map") as map_span:
+        matrix = page_rank_map(cube, start_date, end_date, MAP_FREQUENCIES[frequency])
+        map_span.rows = 0 if matrix is None else matrix.size
+
+    if matrix is None:
+        st.warning("No stocks were ranked in this window.")
+        st.stop()
+
+    st.caption(
+        f"Index: {selected_index.replace('IDX_', '')} | Rows: Stocks, strongest at window end first | "
+        f"Columns: {frequency} sessions | Cell = Avg Rank (3M, 6M, 1Y) vs index"
+    )
+
+    fig = px.imshow(
+        matrix.rename(index=lambda s: s.replace("STK_", "")),
+        aspect="auto",
+        color_continuous_scale="RdYlGn_r",
+        labels=dict(x="", y="", color="Avg Rank")
+    )
+    fig.update_layout(height=max(400, 14 * len(matrix)), margin=dict(t=20, l=20, r=20, b=20))
+
+    with span("plotly heatmap", rows=matrix.size):
+        st.plotly_chart(fig, use_container_width=True)
+
+# -------------------------------------------------
+# DEVELOPER OVERLAY (RTA_PROFILE=1)
+# -------------------------------------------------
+if profiling_enabled():
+    st.sidebar.subheader("Performance")
+    st.sidebar.dataframe(page_spans(), use_container_width=True, hide_index=True)
@@ -0,0 +1,117 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+
+from analytics.dashboards import NIFTY_50, page_momentum_maturity
+from analytics.momentum_maturity import DEFAULT_WINDOW, MATURITY_WINDOWS, STAGES
+from analytics.rank_trajectories import get_rank_cube
+from data_access.constituent_history import get_membership_history
+from data_access.price_matrix import get_shared_store
+from data_access.profiling import begin_page, page_spans, profiling_enabled, span
+
+# -------------------------------------------------
+# PAGE CONFIG
+# -------------------------------------------------
+st.set_page_config(
+    page_title="RTA | Momentum Maturity Matrix",
+    layout="wide"
+)
+
+STAGE_COLORS = {
+    "Emerging": "#56CCF2",
+    "Accelerating": "#27AE60",
+    "Mature": "#6FCF97",
+    "Fading": "#F2994A",
+    "Bottoming": "#BB6BD9",
+    "Lagging": "#EB5757",
+}
+
+# -------------------------------------------------
+# SIDEBAR
+# -------------------------------------------------
+begin_page("p11 momentum maturity matrix")
+
+with span("load data"):
+    membership = get_membership_history()
+    store = get_shared_store()
+
+st.sidebar.header("Controls")
+
+# Only indices with a price history can be ranked against
+index_ids = sorted(set(membership.index_ids) & set(store.index_ids))
+if not index_ids:
+    st.warning("No index with constituents has price history.")
+    st.stop()
+
+selected_index = st.sidebar.selectbox(
+    "Select Index",
+    index_ids,
+    index=index_ids.index(NIFTY_50) if NIFTY_50 in index_ids else 0
+)
+
+with span("rank cube") as cube_span:
+    cube = get_rank_cube(selected_index)
+    cube_span.rows = cube.rank.size
+
+ref_date = st.sidebar.date_input(
+    "Select reference date",
+    cube.dates[-1].date(),
+    min_value=cube.dates[0].date(),
+    max_value=cube.dates[-1].date()
+)
+ref_date = pd.to_datetime(ref_date)
+
+window = st.sidebar.selectbox(
+    "Trend window (sessions)",
+    MATURITY_WINDOWS,
+    index=MATURITY_WINDOWS.index(DEFAULT_WINDOW)
+)
+
+# -------------------------------------------------
+# STAGES
+# -------------------------------------------------
+with span("maturity stages") as stages_span:
+    out = page_momentum_maturity(cube, ref_date, window)
+    stages_span.rows = 0 if out is None else len(out)
+
+st.title(f"{selected_index.replace('IDX_', '')} – Momentum Maturity Matrix")
+
+if out is None:
+    st.warning(f"No stock has {window} sessions of ranks up to this date.")
+    st.stop()
+
+st.caption(
+    f"Reference date: {ref_date.date()} | Stage from the {window}-session trend of Avg Rank (3M, 6M, 1Y) | "
+    "Slope in ranks per session, negative = improving"
+)
+
+counts = out["stage"].value_counts()
+for col, stage in zip(st.columns(len(STAGES)), STAGES):
+    col.metric(stage, int(counts.get(stage, 0)))
+
+fig = px.scatter(
+    out.assign(improvement=-out[f"slope_{window}"]),
+    x="percentile_score",
+    y="improvement",
+    color="stage",
+    hover_name="entity_id",
+    category_orders={"stage": list(STAGES)},
+    color_discrete_map=STAGE_COLORS,
+    labels={"percentile_score": "Percentile Score", "improvement": "Rank improvement per session"}
+)
+fig.add_vline(x=50, line_dash="dot")
+fig.add_hline(y=0, line_dash="dot")
+fig.update_layout(height=420, margin=dict(t=20, l=20, r=20, b=20))
+
+with span("plotly chart", rows=len(out)):
+    st.plotly_chart(fig, use_container_width=True)
+
+with span("table", rows=len(out)):
+    st.dataframe(out, use_container_width=True)
+
+# -------------------------------------------------
+# DEVELOPER OVERLAY (RTA_PROFILE=1)
+# -------------------------------------------------
+if profiling_enabled():
+    st.sidebar.subheader("Performance")
+    st.sidebar.dataframe(page_spans(), use_container_width=True, hide_index=True)
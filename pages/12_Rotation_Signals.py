@@ -0,0 +1,98 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+
+from analytics.dashboards import page_rotation_signals
+from analytics.rotation_signals import EVENTS, RANK_SIGNAL_INDICES, get_rotation_signals
+from data_access.profiling import begin_page, page_spans, profiling_enabled, span
+
+# -------------------------------------------------
+# PAGE CONFIG
+# -------------------------------------------------
+st.set_page_config(
+    page_title="RTA | Rotation Signals",
+    layout="wide"
+)
+
+# -------------------------------------------------
+# LOAD DATA
+# -------------------------------------------------
+begin_page("p12 rotation signals")
+
+# Every event over the full history, scanned once per published version
+with span("load events") as events_span:
+    events = get_rotation_signals()
+    events_span.rows = len(events)
+
+if events.empty:
+    st.warning("No rotation-signal events in the price history.")
+    st.stop()
+
+dates = events.index.get_level_values("date")
+last_date = dates.max().date()
+
+# -------------------------------------------------
+# SIDEBAR
+# -------------------------------------------------
+st.sidebar.header("Controls")
+
+window = st.sidebar.date_input(
+    "Window",
+    value=((dates.max() - pd.DateOffset(months=1)).date(), last_date),
+    min_value=dates.min().date(),
+    max_value=last_date
+)
+
+# The picker returns one date until the range is complete
+if len(window) != 2:
+    st.stop()
+start_date, end_date = window
+
+selected_events = st.sidebar.multiselect(
+    "Events",
+    EVENTS,
+    default=list(EVENTS)
+)
+
+# -------------------------------------------------
+# EVENTS
+# -------------------------------------------------
+with span("filter events") as filter_span:
+    out = page_rotation_signals(events, start_date, end_date, selected_events)
+    filter_span.rows = len(out)
+
+st.title("Rotation Signals")
+
+st.caption(
+    f"{start_date} to {end_date} | SMA crossovers, new 52-week closing highs and "
+    "percentile-score moves across rank thresholds vs "
+    f"{', '.join(i.replace('IDX_', '') for i in RANK_SIGNAL_INDICES)}"
+)
+
+if out.empty:
+    st.warning("No events in this window.")
+    st.stop()
+
+daily = out.groupby(["date", "event"]).size().rename("Events").reset_index()
+
+fig = px.bar(
+    daily,
+    x="date",
+    y="Events",
+    color="event",
+    category_orders={"event": list(EVENTS)}
+)
+fig.update_layout(height=360, margin=dict(t=20, l=20, r=20, b=20), xaxis_title="")
+
+with span("plotly chart", rows=len(daily)):
+    st.plotly_chart(fig, use_container_width=True)
+
+with span("table", rows=len(out)):
+    st.dataframe(out, use_container_width=True)
+
+# -------------------------------------------------
+# DEVELOPER OVERLAY (RTA_PROFILE=1)
+# -------------------------------------------------
+if profiling_enabled():
+    st.sidebar.subheader("Performance")
+    st.sidebar.dataframe(page_spans(), use_container_width=True, hide_index=True)
@@ -1,7 +1,9 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from datetime import timedelta
+from analytics.dashboards import BENCHMARK_INDICES, TIMEFRAMES, page_index_returns
+from data_access.price_matrix import get_shared_store
+from data_access.profiling import begin_page, page_spans, profiling_enabled, span
 
 # ---------------------------------
 # Page config
@@ -14,69 +16,26 @@ st.set_page_config(
 # ---------------------------------
 # Load data
 # ---------------------------------
-@st.cache_data
-def load_data():
-    df = pd.read_parquet("data/processed/price_history.parquet")
-    df["date"] = pd.to_datetime(df["date"]).dt.tz_localize(None)  
-    return df
+begin_page("p1 benchmark indices")
 
-price_history = load_data()
-
-# ---------------------------------
-# Helpers
-# ---------------------------------
-def get_target_start_date(ref_date, period):
-    if period == "1W":
-        return ref_date - timedelta(weeks=1)
-    if period == "1M":
-        return ref_date - pd.DateOffset(months=1)
-    if period == "3M":
-        return ref_date - pd.DateOffset(months=3)
-    if period == "6M":
-        return ref_date - pd.DateOffset(months=6)
-    if period == "1Y":
-        return ref_date - pd.DateOffset(years=1)
-
-def compute_return(df, window_start, window_end):
-    df_window = df[
-        (df["date"] >= window_start) &
-        (df["date"] <= window_end)
-    ].sort_values("date")
-
-    if len(df_window) < 2:
-        return None
-
-    start_price = df_window.iloc[0]["close"]
-    end_price = df_window.iloc[-1]["close"]
-
-    return (end_price / start_price - 1) * 100
+with span("load data"):
+    store = get_shared_store()
 
 # ---------------------------------
 # Sidebar
 # ---------------------------------
 st.sidebar.title("RTA Dashboard")
 
-all_indices = sorted(
-    price_history[
-        price_history["entity_id"].str.startswith("IDX_")
-    ]["entity_id"].unique()
-)
+all_indices = sorted(store.index_ids)
 
 selected_indices = st.sidebar.multiselect(
     "Select Indices",
     options=all_indices,
-    default=[
-        "IDX_NIFTY 50",
-        "IDX_NIFTY NEXT 50",
-        "IDX_NIFTY 500",
-        "IDX_NIFTY MIDCAP 150",
-        "IDX_NIFTY SMLCAP 250"
-    ]
-
+    default=BENCHMARK_INDICES
 )
 
 # Reference date selector (GLOBAL anchor)
-max_available_date = price_history["date"].max().date()
+max_available_date = store.max_date.date()
 
 reference_date = st.sidebar.date_input(
     "Reference Date",
@@ -99,9 +58,7 @@ if "period" not in st.session_state:
 st.subheader("Timeframe")
 
 tf_cols = st.columns(5)
-timeframes = ["1W", "1M", "3M", "6M", "1Y"]
-
-for col, tf in zip(tf_cols, timeframes):
+for col, tf in zip(tf_cols, TIMEFRAMES):
     if tf == st.session_state.period:
         col.button(
             tf,
@@ -125,26 +82,9 @@ period = st.session_state.period
 if not selected_indices:
     st.warning("Please select at least one index.")
 else:
-    target_start_date = get_target_start_date(reference_date, period)
-
-    rows = []
-    for idx in selected_indices:
-        df_idx = price_history[
-            price_history["entity_id"] == idx
-        ]
-
-        ret = compute_return(df_idx, target_start_date, reference_date)
-
-        rows.append({
-            "Index": idx.replace("IDX_", ""),
-            "Return (%)": round(ret, 2) if ret is not None else None
-        })
-
-    result_df = (
-        pd.DataFrame(rows)
-        .dropna()
-        .sort_values("Return (%)", ascending=False)
-    )
+    with span("index returns") as returns_span:
+        result_df = page_index_returns(store, selected_indices, reference_date, period)
+        returns_span.rows = len(result_df)
 
     fig = px.bar(
         result_df,
@@ -169,4 +109,12 @@ else:
         uniformtext_mode="hide"
     )
 
-    st.plotly_chart(fig, use_container_width=True)
+    with span("plotly chart", rows=len(result_df)):
+        st.plotly_chart(fig, use_container_width=True)
+
+# ---------------------------------
+# Developer overlay (RTA_PROFILE=1)
+# ---------------------------------
+if profiling_enabled():
+    st.sidebar.subheader("Performance")
+    st.sidebar.dataframe(page_spans(), use_container_width=True, hide_index=True)
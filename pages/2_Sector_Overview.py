@@ -1,7 +1,9 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from datetime import timedelta
+from analytics.dashboards import SECTOR_INDICES, TIMEFRAMES, page_index_returns
+from data_access.price_matrix import get_shared_store
+from data_access.profiling import begin_page, page_spans, profiling_enabled, span
 
 # ---------------------------------
 # Page config
@@ -14,42 +16,10 @@ st.set_page_config(
 # ---------------------------------
 # Load data
 # ---------------------------------
-@st.cache_data
-def load_data():
-    df = pd.read_parquet("data/processed/price_history.parquet")
-    df["date"] = pd.to_datetime(df["date"]).dt.tz_localize(None)
-    return df
+begin_page("p2 sector overview")
 
-price_history = load_data()
-
-# ---------------------------------
-# Helpers
-# ---------------------------------
-def get_target_start_date(ref_date, period):
-    if period == "1W":
-        return ref_date - timedelta(weeks=1)
-    if period == "1M":
-        return ref_date - pd.DateOffset(months=1)
-    if period == "3M":
-        return ref_date - pd.DateOffset(months=3)
-    if period == "6M":
-        return ref_date - pd.DateOffset(months=6)
-    if period == "1Y":
-        return ref_date - pd.DateOffset(years=1)
-
-def compute_return(df, window_start, window_end):
-    df_window = df[
-        (df["date"] >= window_start) &
-        (df["date"] <= window_end)
-    ].sort_values("date")
-
-    if len(df_window) < 2:
-        return None
-
-    start_price = df_window.iloc[0]["close"]
-    end_price = df_window.iloc[-1]["close"]
-
-    return (end_price / start_price - 1) * 100
+with span("load data"):
+    store = get_shared_store()
 
 # ---------------------------------
 # Page Title
@@ -60,7 +30,7 @@ st.caption("Sectoral index returns as of selected reference date")
 # ---------------------------------
 # Reference Date
 # ---------------------------------
-max_available_date = price_history["date"].max().date()
+max_available_date = store.max_date.date()
 
 reference_date = st.date_input(
     "Reference Date",
@@ -79,9 +49,7 @@ if "sector_period" not in st.session_state:
 st.subheader("Timeframe")
 
 tf_cols = st.columns(5)
-timeframes = ["1W", "1M", "3M", "6M", "1Y"]
-
-for col, tf in zip(tf_cols, timeframes):
+for col, tf in zip(tf_cols, TIMEFRAMES):
     if tf == st.session_state.sector_period:
         col.button(
             tf,
@@ -99,57 +67,14 @@ for col, tf in zip(tf_cols, timeframes):
 
 period = st.session_state.sector_period
 
-# ---------------------------------
-# Frozen Sector Universe
-# ---------------------------------
-SECTOR_INDICES = [
-    "IDX_NIFTY AUTO",
-    "IDX_NIFTY BANK",
-    "IDX_NIFTY ENERGY",
-    "IDX_NIFTY FMCG",
-    "IDX_NIFTY IT",
-    "IDX_NIFTY MEDIA",
-    "IDX_NIFTY METAL",
-    "IDX_NIFTY OIL AND GAS",
-    "IDX_NIFTY PHARMA",
-    "IDX_NIFTY PSU BANK",
-    "IDX_NIFTY PVT BANK",
-    "IDX_NIFTY REALTY",
-    "IDX_NIFTY INFRA",
-    "IDX_NIFTY MNC",
-    "IDX_NIFTY CONSUMPTION",
-    "IDX_NIFTY FINANCIAL SERVICES"
-    "IDX_NIFTY CPSE"
-    "IDX_NIFTY PSE"
-    "IDX_NIFTY INDIA DEFENCE"
-    "IDX_NIFTY INDIA TOURISM"
-    "IDX_NIFTY COMMODITIES"
-    "IDX_NIFTY FIN SERVICE"
-    "IDX_NIFTY CAPITAL MARKETS"
-    
-]
-
 # ---------------------------------
 # Compute returns
 # ---------------------------------
-target_start_date = get_target_start_date(reference_date, period)
-
-rows = []
-for idx in SECTOR_INDICES:
-    df_idx = price_history[price_history["entity_id"] == idx]
-
-    ret = compute_return(df_idx, target_start_date, reference_date)
-
-    rows.append({
-        "Sector": idx.replace("IDX_NIFTY ", ""),
-        "Return (%)": round(ret, 2) if ret is not None else None
-    })
-
-result_df = (
-    pd.DataFrame(rows)
-    .dropna()
-    .sort_values("Return (%)", ascending=False)
-)
+with span("index returns") as returns_span:
+    result_df = page_index_returns(
+        store, SECTOR_INDICES, reference_date, period, label="Sector", prefix="IDX_NIFTY "
+    )
+    returns_span.rows = len(result_df)
 
 # ---------------------------------
 # Plot
@@ -177,4 +102,12 @@ fig.update_layout(
     uniformtext_mode="hide"
 )
 
-st.plotly_chart(fig, use_container_width=True)
+with span("plotly chart", rows=len(result_df)):
+    st.plotly_chart(fig, use_container_width=True)
+
+# ---------------------------------
+# Developer overlay (RTA_PROFILE=1)
+# ---------------------------------
+if profiling_enabled():
+    st.sidebar.subheader("Performance")
+    st.sidebar.dataframe(page_spans(), use_container_width=True, hide_index=True)
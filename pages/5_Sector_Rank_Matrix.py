@@ -1,124 +1,68 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
+
+import plotly.express as px
+
+from analytics.dashboards import (
+    SECTOR_MATRIX_COLUMNS,
+    page_sector_rank_snapshot,
+    page_sector_rotation,
+    sector_indices,
+)
+from analytics.sector_rotation import get_sector_cube
+from data_access.price_matrix import get_shared_store
+from data_access.profiling import begin_page, page_spans, profiling_enabled, span
 
 # -------------------------------------------------
 # LOAD DATA
 # -------------------------------------------------
-price = pd.read_parquet("data/processed/price_history.parquet")
-price["date"] = pd.to_datetime(price["date"]).dt.tz_localize(None)
+begin_page("p5 sector rank matrix")
+
+with span("load data"):
+    store = get_shared_store()
+
+    # Ranks for every session, computed once per version; dates are cube slices
+    cube = get_sector_cube(sector_indices(store))
+
+PLAYBACK_FREQUENCIES = {
+    "Weekly": "week_ends",
+    "Monthly": "month_ends",
+    "Daily": None,
+}
 
 # -------------------------------------------------
 # SIDEBAR
 # -------------------------------------------------
 st.sidebar.header("Controls")
 
-ref_date = st.sidebar.date_input(
+first_date, last_date = cube.dates[0].date(), cube.dates[-1].date()
+ref_date = st.sidebar.slider(
     "Select reference date",
-    price["date"].max().date()
+    min_value=first_date,
+    max_value=last_date,
+    value=last_date,
+    format="DD MMM YYYY"
 )
 ref_date = pd.to_datetime(ref_date)
 
-# -------------------------------------------------
-# FILTER SECTOR / THEMATIC INDICES
-# (EXCLUDES BROAD MARKET INDICES)
-# -------------------------------------------------
-exclude_indices = {
-    "IDX_NIFTY 50",
-    "IDX_NIFTY 100",
-    "IDX_NIFTY 200",
-    "IDX_NIFTY 500",
-    "IDX_NIFTY MIDCAP 100",
-    "IDX_NIFTY MIDCAP 150",
-    "IDX_NIFTY MIDCAP 50",
-    "IDX_NIFTY NEXT 50",
-    "IDX_NIFTY SMLCAP 50",
-    "IDX_NIFTY SMLCAP 100",
-    "IDX_NIFTY SMLCAP 250",
-    "IDX_NIFTY TOTAL MKT"
-}
+st.sidebar.subheader("Rotation playback")
 
-sector_indices = (
-    price.loc[
-        price["entity_id"].str.startswith("IDX_")
-        & ~price["entity_id"].isin(exclude_indices),
-        "entity_id"
-    ]
-    .drop_duplicates()
-    .sort_values()
-    .tolist()
+start_date, end_date = st.sidebar.slider(
+    "Window",
+    min_value=first_date,
+    max_value=last_date,
+    value=(max(first_date, (cube.dates[-1] - pd.DateOffset(years=1)).date()), last_date),
+    format="MMM YYYY"
 )
+frequency = st.sidebar.selectbox("Frames", list(PLAYBACK_FREQUENCIES))
 
 # -------------------------------------------------
-# RETURN FUNCTIONS
-# -------------------------------------------------
-def calc_return_months(df, end_date, months):
-    start_date = end_date - pd.DateOffset(months=months)
-
-    px_end = (
-        df[df["date"] <= end_date]
-        .sort_values("date")
-        .groupby("entity_id")
-        .tail(1)
-        .set_index("entity_id")["close"]
-    )
-
-    px_start = (
-        df[df["date"] <= start_date]
-        .sort_values("date")
-        .groupby("entity_id")
-        .tail(1)
-        .set_index("entity_id")["close"]
-    )
-
-    return (px_end / px_start - 1) * 100
-
-
-def calc_return_weeks(df, end_date, weeks):
-    start_date = end_date - pd.DateOffset(weeks=weeks)
-
-    px_end = (
-        df[df["date"] <= end_date]
-        .sort_values("date")
-        .groupby("entity_id")
-        .tail(1)
-        .set_index("entity_id")["close"]
-    )
-
-    px_start = (
-        df[df["date"] <= start_date]
-        .sort_values("date")
-        .groupby("entity_id")
-        .tail(1)
-        .set_index("entity_id")["close"]
-    )
-
-    return (px_end / px_start - 1) * 100
-
-# -------------------------------------------------
-# CALCULATE RETURNS
-# -------------------------------------------------
-df = price[price["entity_id"].isin(sector_indices)]
-
-ret_1W = calc_return_weeks(df, ref_date, 1)
-ret_1M = calc_return_months(df, ref_date, 1)
-ret_3M = calc_return_months(df, ref_date, 3)
-ret_6M = calc_return_months(df, ref_date, 6)
-ret_1Y = calc_return_months(df, ref_date, 12)
-
-mat = pd.DataFrame({
-    "Sector": ret_1M.index,
-    "1 Week": ret_1W,
-    "1 Month": ret_1M,
-    "3 Month": ret_3M,
-    "6 Month": ret_6M,
-    "1 Year": ret_1Y
-}).set_index("Sector")
-
-# -------------------------------------------------
-# COLUMN-WISE RANKING
+# COLUMN-WISE RANKING OF SECTOR / THEMATIC RETURNS
+# (EXCLUDES BROAD MARKET INDICES)
 # -------------------------------------------------
-rank_mat = mat.rank(ascending=False, method="min")
+with span("rank matrix") as matrix_span:
+    rank_mat = page_sector_rank_snapshot(cube, ref_date)
+    matrix_span.rows = len(rank_mat)
 
 # -------------------------------------------------
 # COLOR LOGIC
@@ -147,4 +91,51 @@ st.caption(
     "Column-wise ranking | Top 5 = Green, Bottom 5 = Red"
 )
 
-st.dataframe(styled, use_container_width=True)
+# Styler formatting runs when the table is rendered
+with span("styled table", rows=len(rank_mat)):
+    st.dataframe(styled, use_container_width=True)
+
+# -------------------------------------------------
+# ROTATION PLAYBACK — ONE FRAME PER SESSION
+# -------------------------------------------------
+st.subheader("Sector Rotation Playback")
+
+with span("playback frames") as frames_span:
+    playback = page_sector_rotation(cube, start_date, end_date, PLAYBACK_FREQUENCIES[frequency])
+    frames_span.rows = 0 if playback is None else playback[0].size
+
+if playback is None:
+    st.warning("No sessions in this window.")
+    st.stop()
+
+ranks, sessions, sectors = playback
+
+st.caption(
+    f"{frequency} frames from {start_date} to {end_date} | "
+    "Press play or drag the slider | Rank 1 = strongest return"
+)
+
+with span("plotly animation", rows=ranks.size):
+    fig = px.imshow(
+        ranks,
+        animation_frame=0,
+        x=[SECTOR_MATRIX_COLUMNS[h] for h in cube.horizons],
+        y=[s.replace("IDX_", "") for s in sectors],
+        zmin=1,
+        zmax=len(sectors),
+        aspect="auto",
+        color_continuous_scale="RdYlGn_r",
+        labels=dict(x="", y="", color="Rank", animation_frame="Session")
+    )
+    for step, session in zip(fig.layout.sliders[0].steps, sessions):
+        step.label = f"{session.date()}"
+    fig.update_layout(height=max(400, 22 * len(sectors)), margin=dict(t=20, l=20, r=20, b=20))
+
+    st.plotly_chart(fig, use_container_width=True)
+
+# -------------------------------------------------
+# DEVELOPER OVERLAY (RTA_PROFILE=1)
+# -------------------------------------------------
+if profiling_enabled():
+    st.sidebar.subheader("Performance")
+    st.sidebar.dataframe(page_spans(), use_container_width=True, hide_index=True)
@@ -1,6 +1,11 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
+
+from analytics.dashboards import page_rank_trend, recent_week_ends
+from analytics.ranks import RANK_HORIZONS
+from data_access.constituent_history import get_membership_history
+from data_access.price_matrix import get_shared_store
+from data_access.profiling import begin_page, page_spans, profiling_enabled, span
+from data_access.result_cache import cached_result
 
 # -------------------------------------------------
 # CONFIG
@@ -10,103 +15,51 @@ INDEX_ID = "IDX_NIFTY 50"
 # -------------------------------------------------
 # LOAD DATA
 # -------------------------------------------------
-price = pd.read_parquet("data/processed/price_history.parquet")
-const_map = pd.read_parquet("data/processed/index_constituents_map.parquet")
-
-price["date"] = pd.to_datetime(price["date"]).dt.tz_localize(None)
+begin_page("p6 nifty 50 rank trend")
 
-# -------------------------------------------------
-# GET NIFTY 50 STOCKS
-# -------------------------------------------------
-stocks = (
-    const_map
-    .query("index_entity_id == @INDEX_ID")["stock_entity_id"]
-    .unique()
-    .tolist()
-)
+with span("load data"):
+    store = get_shared_store()
+    membership = get_membership_history()
 
 # -------------------------------------------------
-# GET LAST 8 FRIDAYS
+# SIDEBAR
 # -------------------------------------------------
-idx_dates = (
-    price.loc[price["entity_id"] == INDEX_ID, "date"]
-    .drop_duplicates()
-    .sort_values()
-)
+st.sidebar.header("Controls")
 
-fridays = (
-    idx_dates[idx_dates.dt.weekday == 4]   # Friday
-    .tail(8)
-    .tolist()
+n_weeks = st.sidebar.slider(
+    "Weeks of history",
+    min_value=8,
+    max_value=104,
+    value=8,
+    step=4
 )
 
 # -------------------------------------------------
-# RETURN FUNCTION
+# GET LAST N WEEK-ENDS
 # -------------------------------------------------
-def calc_return(df, end_date, months):
-    start_date = end_date - pd.DateOffset(months=months)
+week_ends = recent_week_ends(store, INDEX_ID, n_weeks)
 
-    px_end = (
-        df[df["date"] <= end_date]
-        .sort_values("date")
-        .groupby("entity_id")
-        .tail(1)
-        .set_index("entity_id")["close"]
-    )
-
-    px_start = (
-        df[df["date"] <= start_date]
-        .sort_values("date")
-        .groupby("entity_id")
-        .tail(1)
-        .set_index("entity_id")["close"]
-    )
-
-    return (px_end / px_start - 1) * 100
+if len(week_ends) < 1:
+    st.warning("No weekly data available.")
+    st.stop()
 
 # -------------------------------------------------
-# BUILD MATRIX
+# BUILD MATRIX (POINT IN TIME MEMBERSHIP)
 # -------------------------------------------------
-matrix = pd.DataFrame(index=stocks)
-
-for ref_date in fridays:
-    # Index returns
-    idx_df = price[price["entity_id"] == INDEX_ID]
-    idx_3M = calc_return(idx_df, ref_date, 3).iloc[0]
-    idx_6M = calc_return(idx_df, ref_date, 6).iloc[0]
-    idx_1Y = calc_return(idx_df, ref_date, 12).iloc[0]
-
-    # Stock returns
-    stk_df = price[price["entity_id"].isin(stocks)]
-
-    r3 = calc_return(stk_df, ref_date, 3) - idx_3M
-    r6 = calc_return(stk_df, ref_date, 6) - idx_6M
-    r1 = calc_return(stk_df, ref_date, 12) - idx_1Y
-
-    df = pd.DataFrame({
-        "rel_3M": r3,
-        "rel_6M": r6,
-        "rel_1Y": r1
-    })
-
-    # Ranks (within NIFTY 50)
-    df["rank_3M"] = df["rel_3M"].rank(ascending=False, method="min")
-    df["rank_6M"] = df["rel_6M"].rank(ascending=False, method="min")
-    df["rank_1Y"] = df["rel_1Y"].rank(ascending=False, method="min")
-
-    # Average rank for the stock on this date
-    df["avg_rank"] = (
-        df[["rank_3M", "rank_6M", "rank_1Y"]]
-        .mean(axis=1, skipna=True)
-        .round(0)
+with span("rank trend") as trend_span:
+    matrix = cached_result(
+        "p6 rank trend",
+        {"index": INDEX_ID, "week_ends": week_ends, "horizons": RANK_HORIZONS},
+        lambda: page_rank_trend(store, membership, INDEX_ID, week_ends)
     )
+    trend_span.rows = 0 if matrix is None else matrix.size
 
-    matrix[ref_date.strftime("%d %b")] = df["avg_rank"]
+if matrix is None:
+    st.warning("No NIFTY 50 members in this window.")
+    st.stop()
 
-# -------------------------------------------------
-# FINAL FORMAT
-# -------------------------------------------------
-matrix = matrix.dropna(how="all").astype("Int64")
+# Day-month labels repeat once the window spans more than a year
+matrix.columns = matrix.columns.strftime("%d %b" if n_weeks <= 52 else "%d %b %y")
 
 # -------------------------------------------------
 # UI
@@ -114,8 +67,16 @@ matrix = matrix.dropna(how="all").astype("Int64")
 st.title("NIFTY 50 – Stock Average Rank Matrix")
 
 st.caption(
-    "Rows: Stocks | Columns: Last 8 Fridays | "
+    f"Rows: Stocks | Columns: Last {n_weeks} Week-Ends | "
     "Cell = Avg Rank of (3M, 6M, 1Y) vs NIFTY 50"
 )
 
-st.dataframe(matrix, use_container_width=True)
+with span("table", rows=matrix.size):
+    st.dataframe(matrix, use_container_width=True)
+
+# -------------------------------------------------
+# DEVELOPER OVERLAY (RTA_PROFILE=1)
+# -------------------------------------------------
+if profiling_enabled():
+    st.sidebar.subheader("Performance")
+    st.sidebar.dataframe(page_spans(), use_container_width=True, hide_index=True)
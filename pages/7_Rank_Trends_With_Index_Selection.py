@@ -1,14 +1,20 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
+
+from analytics.dashboards import page_rank_trend, rank_trend_sectors, recent_week_ends
+from analytics.ranks import RANK_HORIZONS
+from data_access.constituent_history import get_membership_history
+from data_access.price_matrix import get_shared_store
+from data_access.profiling import begin_page, page_spans, profiling_enabled, span
+from data_access.result_cache import cached_result
 
 # -------------------------------------------------
 # LOAD DATA
 # -------------------------------------------------
-price = pd.read_parquet("data/processed/price_history.parquet")
-const_map = pd.read_parquet("data/processed/index_constituents_map.parquet")
+begin_page("p7 sector rank trend")
 
-price["date"] = pd.to_datetime(price["date"]).dt.tz_localize(None)
+with span("load data"):
+    store = get_shared_store()
+    membership = get_membership_history()
 
 # -------------------------------------------------
 # SIDEBAR — SECTOR FILTER
@@ -16,127 +22,47 @@ price["date"] = pd.to_datetime(price["date"]).dt.tz_localize(None)
 st.sidebar.header("Controls")
 
 # Sector indices only (exclude market-wide indices)
-exclude_indices = {
-    "IDX_NIFTY 50",
-    "IDX_NIFTY 100",
-    "IDX_NIFTY 200",
-    "IDX_NIFTY 500"
-}
-
-sector_indices = (
-    const_map["index_entity_id"]
-    .drop_duplicates()
-    .sort_values()
-    .tolist()
-)
-
-sector_indices = [i for i in sector_indices if i not in exclude_indices]
+sector_indices = rank_trend_sectors(membership)
 
 selected_sector = st.sidebar.selectbox(
     "Select Sector Index",
     sector_indices
 )
 
-# -------------------------------------------------
-# GET STOCKS IN SELECTED SECTOR
-# -------------------------------------------------
-stocks = (
-    const_map
-    .query("index_entity_id == @selected_sector")["stock_entity_id"]
-    .unique()
-    .tolist()
+n_weeks = st.sidebar.slider(
+    "Weeks of history",
+    min_value=8,
+    max_value=104,
+    value=8,
+    step=4
 )
 
-if not stocks:
-    st.warning("No stocks found for selected sector.")
-    st.stop()
-
 # -------------------------------------------------
-# GET LAST 8 FRIDAYS
+# GET LAST N WEEK-ENDS
 # -------------------------------------------------
-sector_dates = (
-    price.loc[price["entity_id"] == selected_sector, "date"]
-    .drop_duplicates()
-    .sort_values()
-)
-
-fridays = (
-    sector_dates[sector_dates.dt.weekday == 4]
-    .tail(8)
-    .tolist()
-)
+week_ends = recent_week_ends(store, selected_sector, n_weeks)
 
-if len(fridays) < 1:
-    st.warning("No Friday data available.")
+if len(week_ends) < 1:
+    st.warning("No weekly data available.")
     st.stop()
 
 # -------------------------------------------------
-# RETURN FUNCTION
+# BUILD MATRIX (POINT IN TIME MEMBERSHIP)
 # -------------------------------------------------
-def calc_return(df, end_date, months):
-    start_date = end_date - pd.DateOffset(months=months)
-
-    px_end = (
-        df[df["date"] <= end_date]
-        .sort_values("date")
-        .groupby("entity_id")
-        .tail(1)
-        .set_index("entity_id")["close"]
-    )
-
-    px_start = (
-        df[df["date"] <= start_date]
-        .sort_values("date")
-        .groupby("entity_id")
-        .tail(1)
-        .set_index("entity_id")["close"]
+with span("rank trend") as trend_span:
+    matrix = cached_result(
+        "p7 rank trend",
+        {"index": selected_sector, "week_ends": week_ends, "horizons": RANK_HORIZONS},
+        lambda: page_rank_trend(store, membership, selected_sector, week_ends)
     )
+    trend_span.rows = 0 if matrix is None else matrix.size
 
-    return (px_end / px_start - 1) * 100
-
-# -------------------------------------------------
-# BUILD MATRIX
-# -------------------------------------------------
-matrix = pd.DataFrame(index=stocks)
-
-for ref_date in fridays:
-    # Sector index returns (benchmark)
-    idx_df = price[price["entity_id"] == selected_sector]
-
-    idx_3M = calc_return(idx_df, ref_date, 3).iloc[0]
-    idx_6M = calc_return(idx_df, ref_date, 6).iloc[0]
-    idx_1Y = calc_return(idx_df, ref_date, 12).iloc[0]
-
-    # Stock returns
-    stk_df = price[price["entity_id"].isin(stocks)]
-
-    r3 = calc_return(stk_df, ref_date, 3) - idx_3M
-    r6 = calc_return(stk_df, ref_date, 6) - idx_6M
-    r1 = calc_return(stk_df, ref_date, 12) - idx_1Y
-
-    df = pd.DataFrame({
-        "rel_3M": r3,
-        "rel_6M": r6,
-        "rel_1Y": r1
-    })
-
-    # Ranks within sector
-    df["rank_3M"] = df["rel_3M"].rank(ascending=False, method="min")
-    df["rank_6M"] = df["rel_6M"].rank(ascending=False, method="min")
-    df["rank_1Y"] = df["rel_1Y"].rank(ascending=False, method="min")
-
-    df["avg_rank"] = (
-        df[["rank_3M", "rank_6M", "rank_1Y"]]
-        .mean(axis=1, skipna=True)
-        .round(0)
-    )
-
-    matrix[ref_date.strftime("%d %b")] = df["avg_rank"]
+if matrix is None:
+    st.warning("No stocks found for selected sector.")
+    st.stop()
 
-# -------------------------------------------------
-# FINAL FORMAT
-# -------------------------------------------------
-matrix = matrix.dropna(how="all").astype("Int64")
+# Day-month labels repeat once the window spans more than a year
+matrix.columns = matrix.columns.strftime("%d %b" if n_weeks <= 52 else "%d %b %y")
 
 # -------------------------------------------------
 # UI
@@ -145,8 +71,16 @@ st.title("Sector Stock Rank Matrix")
 
 st.caption(
     f"Sector: {selected_sector.replace('IDX_', '')} | "
-    "Rows: Stocks | Columns: Last 8 Fridays | "
+    f"Rows: Stocks | Columns: Last {n_weeks} Week-Ends | "
     "Cell = Avg Rank (3M, 6M, 1Y) vs Sector Index"
 )
 
-st.dataframe(matrix, use_container_width=True)
+with span("table", rows=matrix.size):
+    st.dataframe(matrix, use_container_width=True)
+
+# -------------------------------------------------
+# DEVELOPER OVERLAY (RTA_PROFILE=1)
+# -------------------------------------------------
+if profiling_enabled():
+    st.sidebar.subheader("Performance")
+    st.sidebar.dataframe(page_spans(), use_container_width=True, hide_index=True)
@@ -1,26 +1,25 @@
 import streamlit as st
-import pandas as pd
+
+from analytics.dashboards import page_sma_trend
+from data_access.constituents import get_constituent_index
+from data_access.price_matrix import get_shared_store
+from data_access.profiling import begin_page, page_spans, profiling_enabled, span
 
 # -------------------------------------------------
 # LOAD DATA
 # -------------------------------------------------
-price = pd.read_parquet("data/processed/price_history.parquet")
-const_map = pd.read_parquet("data/processed/index_constituents_map.parquet")
+begin_page("p8 sma trend lines")
 
-price["date"] = pd.to_datetime(price["date"]).dt.tz_localize(None)
+with span("load data"):
+    store = get_shared_store()
+    constituents = get_constituent_index()
 
 # -------------------------------------------------
 # GET NIFTY 50 STOCKS
 # -------------------------------------------------
 INDEX_ID = "IDX_NIFTY 50"
 
-nifty50_stocks = (
-    const_map
-    .query("index_entity_id == @INDEX_ID")["stock_entity_id"]
-    .drop_duplicates()
-    .sort_values()
-    .tolist()
-)
+nifty50_stocks = sorted(constituents.member_ids(INDEX_ID))
 
 # -------------------------------------------------
 # SIDEBAR
@@ -33,24 +32,17 @@ selected_stock = st.sidebar.selectbox(
 )
 
 # -------------------------------------------------
-# FILTER STOCK DATA (LAST 1 YEAR)
+# SMAs (LAST 1 YEAR)
 # -------------------------------------------------
-stk_df = price[price["entity_id"] == selected_stock].sort_values("date")
+with span("sma trend") as trend_span:
+    trend = page_sma_trend(store, selected_stock)
+    trend_span.rows = 0 if trend is None else len(trend[0])
 
-if stk_df.empty:
+if trend is None:
     st.warning("No price data available.")
     st.stop()
 
-end_date = stk_df["date"].max()
-start_date = end_date - pd.DateOffset(years=1)
-
-stk_df = stk_df[stk_df["date"] >= start_date].copy()
-
-# -------------------------------------------------
-# CALCULATE SMAs
-# -------------------------------------------------
-stk_df["SMA_50"] = stk_df["close"].rolling(window=50).mean()
-stk_df["SMA_200"] = stk_df["close"].rolling(window=200).mean()
+chart_df, start_date, end_date = trend
 
 # -------------------------------------------------
 # UI
@@ -61,6 +53,12 @@ st.caption(
     f"Period: {start_date.date()} to {end_date.date()} | Simple Moving Averages"
 )
 
-chart_df = stk_df.set_index("date")[["SMA_50", "SMA_200"]]
+with span("line chart", rows=len(chart_df)):
+    st.line_chart(chart_df)
 
-st.line_chart(chart_df)
+# -------------------------------------------------
+# DEVELOPER OVERLAY (RTA_PROFILE=1)
+# -------------------------------------------------
+if profiling_enabled():
+    st.sidebar.subheader("Performance")
+    st.sidebar.dataframe(page_spans(), use_container_width=True, hide_index=True)